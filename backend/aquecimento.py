@@ -0,0 +1,81 @@
+"""
+Aquecimento do servidor: carga dos datasets em paralelo antes da primeira requisição.
+
+Cada tarefa carrega e valida um dataset, preenche o cache e constrói os índices e
+o JSON serializado, de modo que a primeira requisição real já encontra tudo pronto
+e um arquivo inválido é detectado na inicialização, e não quando um usuário o abre.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from models import CargaDataset, EstadoProntidao
+
+
+def mensagem_erro(erro: Exception) -> str:
+    """Mensagem legível do erro de carga (o detail de uma HTTPException)."""
+    if isinstance(erro, HTTPException):
+        return f"{erro.status_code}: {erro.detail}"
+    return f"{type(erro).__name__}: {erro}"
+
+
+class Aquecimento:
+    """Executa as tarefas de carga e guarda o resultado de cada dataset."""
+
+    def __init__(self):
+        self._cargas: Dict[str, CargaDataset] = {}
+        self._duracao_ms: Optional[float] = None
+        self._concluido = False
+        self._trava = threading.Lock()
+
+    def executar(self, tarefas: Dict[str, Callable[[], Any]]) -> bool:
+        """
+        Executa as tarefas em paralelo, uma thread por dataset.
+
+        Returns:
+            True se todas terminaram sem erro.
+        """
+        with self._trava:
+            self._cargas = {nome: CargaDataset(pronto=False) for nome in tarefas}
+            self._concluido = False
+
+        def carregar(nome: str, tarefa: Callable[[], Any]) -> None:
+            inicio = time.perf_counter()
+            try:
+                tarefa()
+                carga = CargaDataset(pronto=True, duracao_ms=(time.perf_counter() - inicio) * 1000)
+            except Exception as e:
+                carga = CargaDataset(
+                    pronto=False,
+                    duracao_ms=(time.perf_counter() - inicio) * 1000,
+                    erro=mensagem_erro(e)
+                )
+            with self._trava:
+                self._cargas[nome] = carga
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(len(tarefas), 1), thread_name_prefix="aquecimento") as executor:
+            for futuro in [executor.submit(carregar, nome, tarefa) for nome, tarefa in tarefas.items()]:
+                futuro.result()
+
+        with self._trava:
+            self._duracao_ms = (time.perf_counter() - inicio) * 1000
+            self._concluido = True
+            return all(carga.pronto for carga in self._cargas.values())
+
+    def erros(self) -> Dict[str, str]:
+        """Datasets cuja carga falhou e a mensagem de cada um."""
+        with self._trava:
+            return {nome: carga.erro for nome, carga in self._cargas.items() if carga.erro is not None}
+
+    def prontidao(self) -> EstadoProntidao:
+        """Estado atual: pronto quando o aquecimento terminou e todos os datasets carregaram."""
+        with self._trava:
+            return EstadoProntidao(
+                pronto=self._concluido and all(carga.pronto for carga in self._cargas.values()),
+                duracao_ms=self._duracao_ms,
+                datasets=dict(self._cargas)
+            )
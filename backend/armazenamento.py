@@ -0,0 +1,858 @@
+"""
+Persistência da base de conhecimento e do histórico de prática.
+
+Os endpoints acessam esses datasets pela interface Armazenamento. A implementação
+padrão (ArmazenamentoJSON, em main.py) usa os arquivos [BASE] da pasta /public;
+ArmazenamentoSQLite guarda os registros em tabelas indexadas de um banco SQLite
+local, com consultas por índice e escritas de uma linha por vez.
+
+Importação dos arquivos [BASE] para o banco (na pasta backend):
+    python armazenamento.py [caminho_do_banco] [--public pasta]
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Container, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from busca import IndiceBusca
+from carga import (
+    ARQUIVO_CONHECIMENTO,
+    ARQUIVO_HISTORICO,
+    ARQUIVO_HISTORICO_SEGMENTO,
+    PUBLIC_DIR,
+    carregar_base_de_conhecimento,
+    carregar_historico_de_pratica
+)
+from cache import Assinatura, EntradaCache
+from estatisticas import EstatisticasHistorico
+from indices import codificar_cursor, decodificar_cursor, microssegundos
+from revisao import AgendadorRevisao
+from models import (
+    ADAPTADOR_EXERCICIO,
+    ConhecimentoIdioma,
+    ExercicioPraticaBase,
+    HistoricoPratica,
+    Idioma,
+    TipoPratica
+)
+
+
+class VersaoAlterada(Exception):
+    """O dataset mudou depois da leitura da entrada usada na iteração."""
+
+
+class Armazenamento(ABC):
+    """
+    Interface de persistência da base de conhecimento e do histórico de prática.
+
+    As leituras completas devolvem uma EntradaCache (objeto validado, ETag e
+    Last-Modified). Verificações seguidas de escrita, como a unicidade de IDs,
+    devem ser feitas pelo chamador sob a trava do dataset.
+    """
+
+    @abstractmethod
+    def entrada_conhecimento(self, completa: bool = True) -> EntradaCache:
+        """
+        Entrada com a lista validada de conhecimentos, na ordem de inserção.
+
+        Com completa=False, a implementação pode devolver uma entrada sem o objeto
+        carregado (objeto None), útil apenas para ETag e Last-Modified.
+        """
+
+    @abstractmethod
+    def iterar_conhecimentos(self, entrada: EntradaCache) -> Iterator[ConhecimentoIdioma]:
+        """
+        Percorre a base de conhecimento um registro validado por vez.
+
+        Os registros são os da versão de `entrada` (a do ETag da resposta).
+
+        Raises:
+            VersaoAlterada: Se a base não estiver mais nessa versão.
+        """
+
+    @abstractmethod
+    def obter_conhecimento(self, conhecimento_id: UUID) -> Optional[ConhecimentoIdioma]:
+        """Retorna o conhecimento com o identificador informado, se existir."""
+
+    @abstractmethod
+    def ids_conhecimentos(self) -> Container[UUID]:
+        """Identificadores da base de conhecimento, mantidos em memória por versão."""
+
+    @abstractmethod
+    def busca_conhecimentos(self) -> IndiceBusca:
+        """Índice de busca textual da base, mantido nas escritas por item."""
+
+    @abstractmethod
+    def contar_conhecimentos(self) -> int:
+        """Número de registros da base de conhecimento."""
+
+    @abstractmethod
+    def substituir_conhecimentos(self, conhecimentos: List[ConhecimentoIdioma]) -> None:
+        """Substitui a base inteira pelos conhecimentos informados."""
+
+    @abstractmethod
+    def salvar_conhecimento(self, conhecimento: ConhecimentoIdioma) -> None:
+        """Insere um conhecimento no final ou substitui um existente na mesma posição."""
+
+    @abstractmethod
+    def remover_conhecimento(self, conhecimento_id: UUID) -> None:
+        """Remove o conhecimento com o identificador informado."""
+
+    @abstractmethod
+    def entrada_historico(self, completa: bool = True) -> EntradaCache:
+        """
+        Entrada com o histórico de prática validado.
+
+        Com completa=False, a implementação pode devolver uma entrada sem o objeto
+        carregado (objeto None), útil apenas para ETag e Last-Modified.
+        """
+
+    @abstractmethod
+    def iterar_historico(self, entrada: EntradaCache) -> Iterator[ExercicioPraticaBase]:
+        """
+        Percorre o histórico completo na ordem de inserção, um exercício por vez.
+
+        Os exercícios são os da versão de `entrada` (a do ETag da resposta).
+
+        Raises:
+            VersaoAlterada: Se o histórico não estiver mais nessa versão.
+        """
+
+    @abstractmethod
+    def consultar_historico(
+        self,
+        entrada: EntradaCache,
+        idioma: Optional[Idioma] = None,
+        tipo_pratica: Optional[TipoPratica] = None,
+        conhecimento_id: Optional[UUID] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        limite: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[ExercicioPraticaBase], Optional[str]]:
+        """
+        Exercícios que atendem aos filtros, do mais recente ao mais antigo.
+
+        Returns:
+            (exercícios da página, cursor da próxima página ou None)
+
+        Raises:
+            CursorInvalido: Se o cursor não puder ser decodificado.
+        """
+
+    @abstractmethod
+    def contem_exercicio(self, exercicio_id: UUID) -> bool:
+        """Indica se já existe um exercício com o identificador informado."""
+
+    @abstractmethod
+    def anexar_exercicios(self, exercicios: Sequence[ExercicioPraticaBase]) -> None:
+        """Acrescenta exercícios já validados ao final do histórico."""
+
+    @abstractmethod
+    def estatisticas_historico(self, entrada: EntradaCache) -> EstatisticasHistorico:
+        """Contadores de exercícios e acertos do histórico, mantidos a cada anexação."""
+
+    @abstractmethod
+    def agendador_revisao(self, entrada: EntradaCache) -> AgendadorRevisao:
+        """Fila de revisão espaçada do histórico, mantida a cada anexação."""
+
+    @abstractmethod
+    def tamanhos(self) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+        """
+        (registros, bytes) da base de conhecimento e do histórico, para as métricas.
+
+        As chaves são os nomes dos datasets usados na API e nos eventos
+        ("base_de_conhecimento" e "historico_de_pratica").
+
+        Não carrega os datasets: valores que exigiriam carga ou varredura são None.
+        """
+
+
+# Banco usado quando ARQUIVO_SQLITE não é definido no .env
+ARQUIVO_SQLITE_PADRAO = Path(__file__).parent / "estudo_de_idiomas.sqlite3"
+
+CONHECIMENTO = "conhecimento"
+HISTORICO = "historico"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS metadados (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+
+-- Versão de cada dataset, incrementada a cada escrita (base do ETag)
+CREATE TABLE IF NOT EXISTS versoes (
+    dataset TEXT PRIMARY KEY,
+    versao INTEGER NOT NULL,
+    atualizado_em INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS conhecimentos (
+    posicao INTEGER PRIMARY KEY,
+    conhecimento_id TEXT NOT NULL UNIQUE,
+    idioma TEXT NOT NULL,
+    tipo_conhecimento TEXT NOT NULL,
+    data_hora TEXT NOT NULL,
+    dados TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conhecimentos_idioma ON conhecimentos (idioma, tipo_conhecimento);
+
+-- data_hora em microssegundos desde a época (UTC); a ordem do histórico é
+-- (data_hora DESC, exercicio_id, sequencia), a mesma do IndiceHistorico
+CREATE TABLE IF NOT EXISTS exercicios (
+    sequencia INTEGER PRIMARY KEY,
+    exercicio_id TEXT NOT NULL UNIQUE,
+    data_hora INTEGER NOT NULL,
+    idioma TEXT NOT NULL,
+    tipo_pratica TEXT NOT NULL,
+    conhecimento_id TEXT NOT NULL,
+    dados TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exercicios_data_hora
+    ON exercicios (data_hora DESC, exercicio_id, sequencia);
+CREATE INDEX IF NOT EXISTS exercicios_idioma
+    ON exercicios (idioma, data_hora DESC, exercicio_id, sequencia);
+CREATE INDEX IF NOT EXISTS exercicios_tipo_pratica
+    ON exercicios (tipo_pratica, data_hora DESC, exercicio_id, sequencia);
+CREATE INDEX IF NOT EXISTS exercicios_conhecimento_id
+    ON exercicios (conhecimento_id, data_hora DESC, exercicio_id, sequencia);
+
+-- Contadores do histórico por (idioma, tipo_pratica, dia UTC), atualizados na
+-- mesma transação que insere os exercícios
+CREATE TABLE IF NOT EXISTS estatisticas (
+    idioma TEXT NOT NULL,
+    tipo_pratica TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    acertos INTEGER NOT NULL,
+    PRIMARY KEY (idioma, tipo_pratica, dia)
+) WITHOUT ROWID;
+"""
+
+
+def _linha_conhecimento(conhecimento: ConhecimentoIdioma) -> Tuple[str, str, str, str, str]:
+    return (
+        str(conhecimento.conhecimento_id),
+        conhecimento.idioma.value,
+        conhecimento.tipo_conhecimento.value,
+        conhecimento.data_hora.isoformat(),
+        conhecimento.model_dump_json()
+    )
+
+
+def _linha_exercicio(exercicio: ExercicioPraticaBase) -> Tuple[str, int, str, str, str, str]:
+    return (
+        str(exercicio.exercicio_id),
+        microssegundos(exercicio.data_hora),
+        exercicio.idioma.value,
+        exercicio.tipo_pratica.value,
+        str(exercicio.conhecimento_id),
+        exercicio.model_dump_json()
+    )
+
+
+def _anexar_a_derivado(novos: Sequence[Any]) -> Callable[[Any], Any]:
+    """derivar() que mantém as estruturas com adicionar(), acrescentando os registros novos."""
+    def derivar(estrutura: Any) -> Any:
+        if not hasattr(estrutura, "adicionar"):
+            return None
+        estrutura.adicionar(novos)
+        return estrutura
+    return derivar
+
+
+def _alterar_copia(alterar: Callable[[Any], None]) -> Callable[[Any], Any]:
+    """
+    derivar() que aplica `alterar` a uma cópia da estrutura (a da versão anterior não muda).
+
+    Estruturas sem copiar() são descartadas e reconstruídas na próxima leitura.
+    """
+    def derivar(estrutura: Any) -> Any:
+        if not hasattr(estrutura, "copiar"):
+            return None
+        copia = estrutura.copiar()
+        alterar(copia)
+        return copia
+    return derivar
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """
+    Base de conhecimento e histórico de prática em um banco SQLite local.
+
+    Cada registro é uma linha com as colunas usadas em filtros indexadas e o JSON
+    validado em `dados`. Escritas alteram apenas as linhas envolvidas; consultas
+    filtradas e paginadas do histórico são resolvidas pelos índices do banco, sem
+    carregar o histórico inteiro. A lista completa de cada dataset e as estruturas
+    derivadas dele (ex.: a fila de revisão) são mantidas em memória enquanto a
+    versão registrada no banco não mudar.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._local = threading.local()
+        self._entradas: Dict[str, EntradaCache] = {}
+        self._derivados: Dict[str, Tuple[Tuple[Assinatura, ...], Dict[str, Any]]] = {}
+        self._trava = threading.Lock()
+
+        conexao = self._conexao()
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.executescript(ESQUEMA)
+        conexao.execute(
+            "INSERT OR IGNORE INTO metadados (chave, valor) VALUES ('identificador', ?)",
+            (uuid.uuid4().hex,)
+        )
+        for dataset in (CONHECIMENTO, HISTORICO):
+            conexao.execute(
+                "INSERT OR IGNORE INTO versoes (dataset, versao, atualizado_em) VALUES (?, 0, ?)",
+                (dataset, time.time_ns())
+            )
+        self._identificador = conexao.execute(
+            "SELECT valor FROM metadados WHERE chave = 'identificador'"
+        ).fetchone()[0]
+
+        # Bancos criados antes da tabela de estatísticas: contar o histórico uma vez
+        if conexao.execute("SELECT 1 FROM metadados WHERE chave = 'estatisticas'").fetchone() is None:
+            with self._transacao(escrita=True) as transacao:
+                linhas = transacao.execute("SELECT dados FROM exercicios").fetchall()
+                transacao.execute("DELETE FROM estatisticas")
+                self._contabilizar(transacao, self._validar_exercicios(linhas))
+                transacao.execute("INSERT OR IGNORE INTO metadados (chave, valor) VALUES ('estatisticas', '1')")
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão da thread atual (sqlite3 não compartilha conexões entre threads)."""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute("PRAGMA synchronous=FULL")
+            self._local.conexao = conexao
+        return conexao
+
+    @contextmanager
+    def _transacao(self, escrita: bool = False) -> Iterator[sqlite3.Connection]:
+        """
+        Transação explícita; leituras dentro dela veem um único snapshot do banco.
+
+        As alterações em memória registradas durante a transação
+        (_registrar_alteracao) só são publicadas depois do COMMIT.
+        """
+        conexao = self._conexao()
+        publicacoes: List[Callable[[], None]] = []
+        self._local.publicacoes = publicacoes
+        try:
+            conexao.execute("BEGIN IMMEDIATE" if escrita else "BEGIN")
+            try:
+                yield conexao
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+            try:
+                conexao.execute("COMMIT")
+            except sqlite3.Error:
+                if conexao.in_transaction:
+                    conexao.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro no banco de dados: {str(e)}"
+            )
+        finally:
+            self._local.publicacoes = None
+        for publicar in publicacoes:
+            publicar()
+
+    def _iterar(
+        self,
+        dataset: str,
+        entrada: EntradaCache,
+        consulta: str,
+        validar: Callable[[str], Any]
+    ) -> Iterator[Any]:
+        """
+        Percorre o resultado de uma consulta de `dados` validando uma linha por vez.
+
+        Usa uma conexão própria, pois o gerador pode ser consumido por threads
+        diferentes (respostas em streaming); apenas um lote de linhas fica em memória.
+        A versão do dataset é conferida na mesma transação de leitura que entrega as
+        linhas, antes de a resposta começar, para que o corpo corresponda ao ETag.
+
+        Raises:
+            VersaoAlterada: Se o dataset não estiver mais na versão de `entrada`.
+        """
+        conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None, check_same_thread=False)
+        try:
+            conexao.execute("BEGIN")
+            # A primeira leitura fixa o snapshot usado também pela consulta
+            if self._assinaturas(conexao, dataset) != entrada.assinaturas:
+                raise VersaoAlterada(dataset)
+        except BaseException:
+            conexao.close()
+            raise
+        return self._percorrer(conexao, consulta, validar)
+
+    @staticmethod
+    def _percorrer(conexao: sqlite3.Connection, consulta: str, validar: Callable[[str], Any]) -> Iterator[Any]:
+        try:
+            cursor = conexao.execute(consulta)
+            while True:
+                linhas = cursor.fetchmany(500)
+                if not linhas:
+                    break
+                for (dados,) in linhas:
+                    yield validar(dados)
+            conexao.execute("COMMIT")
+        finally:
+            conexao.close()
+
+    def _resumo(self, dataset: str, versao: int):
+        resumo = hashlib.blake2b(digest_size=16)
+        resumo.update(f"{self._identificador}:{dataset}:{versao}".encode())
+        return resumo
+
+    @staticmethod
+    def _assinaturas(conexao: sqlite3.Connection, dataset: str) -> Tuple[Assinatura, ...]:
+        """(atualizado_em_ns, versão, 0), no mesmo formato das assinaturas de arquivo."""
+        versao, atualizado_em = conexao.execute(
+            "SELECT versao, atualizado_em FROM versoes WHERE dataset = ?", (dataset,)
+        ).fetchone()
+        return ((atualizado_em, versao, 0),)
+
+    def _entrada(
+        self,
+        dataset: str,
+        carregar: Callable[[sqlite3.Connection], Any],
+        completa: bool = True
+    ) -> EntradaCache:
+        with self._transacao() as conexao:
+            assinaturas = self._assinaturas(conexao, dataset)
+            entrada = self._entradas.get(dataset)
+            if entrada is not None and entrada.assinaturas == assinaturas:
+                return entrada
+            objeto = carregar(conexao) if completa else None
+
+        entrada = EntradaCache(assinaturas, objeto, self._resumo(dataset, assinaturas[0][1]))
+        if completa:
+            with self._trava:
+                self._entradas[dataset] = entrada
+        return entrada
+
+    def _derivado(self, dataset: str, nome: str, construir: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Estrutura derivada do dataset, construída uma vez por versão do banco.
+
+        Equivale a EntradaCache.derivado para entradas que não carregam a lista completa.
+        """
+        with self._transacao() as conexao:
+            assinaturas = self._assinaturas(conexao, dataset)
+            atuais = self._derivados.get(dataset)
+            if atuais is not None and atuais[0] == assinaturas and nome in atuais[1]:
+                return atuais[1][nome]
+            valor = construir(conexao)
+
+        with self._trava:
+            atuais = self._derivados.get(dataset)
+            if atuais is None or atuais[0][0][1] < assinaturas[0][1]:
+                atuais = self._derivados[dataset] = (assinaturas, {})
+            if atuais[0] != assinaturas:
+                # Uma escrita terminou durante a construção; não guardar a versão antiga
+                return valor
+            return atuais[1].setdefault(nome, valor)
+
+    def _registrar_alteracao(
+        self,
+        conexao: sqlite3.Connection,
+        dataset: str,
+        combinar: Callable[[Any], Any],
+        derivar: Optional[Callable[[Any], Any]] = None
+    ) -> None:
+        """
+        Incrementa a versão do dataset dentro da transação de escrita.
+
+        Se a lista em memória corresponder à versão anterior, a nova lista é
+        construída com combinar(objeto) em vez de ser relida do banco na próxima
+        leitura. Com `derivar`, cada estrutura derivada da versão anterior passa a
+        ser derivar(estrutura) na nova versão (descartada se o resultado for None);
+        sem ele, as estruturas derivadas são descartadas.
+
+        Nada em memória muda antes do COMMIT: a nova entrada é publicada e
+        derivar() é aplicado (pode alterar a estrutura no lugar, como adicionar())
+        só depois que a transação é confirmada. Se ela falhar, os leitores
+        continuam com a versão anterior, igual à do banco.
+        """
+        anteriores = self._assinaturas(conexao, dataset)
+        conexao.execute(
+            "UPDATE versoes SET versao = versao + 1, atualizado_em = ? WHERE dataset = ?",
+            (max(time.time_ns(), anteriores[0][0] + 1), dataset)
+        )
+        novas = self._assinaturas(conexao, dataset)
+
+        with self._trava:
+            entrada = self._entradas.get(dataset)
+        nova = None
+        if entrada is not None and entrada.assinaturas == anteriores:
+            nova = EntradaCache(novas, combinar(entrada.objeto), self._resumo(dataset, novas[0][1]))
+        self._local.publicacoes.append(lambda: self._publicar(dataset, anteriores, novas, nova, derivar))
+
+    def _publicar(
+        self,
+        dataset: str,
+        anteriores: Tuple[Assinatura, ...],
+        novas: Tuple[Assinatura, ...],
+        nova: Optional[EntradaCache],
+        derivar: Optional[Callable[[Any], Any]]
+    ) -> None:
+        """Torna visível a versão `novas` confirmada no banco (ver _registrar_alteracao)."""
+        versao = novas[0][1]
+        with self._trava:
+            # Um leitor ou uma escrita posterior pode já ter guardado esta versão ou uma mais nova
+            entrada = self._entradas.get(dataset)
+            if entrada is None or entrada.assinaturas[0][1] < versao:
+                if nova is not None:
+                    self._entradas[dataset] = nova
+                else:
+                    self._entradas.pop(dataset, None)
+
+            derivados = self._derivados.get(dataset)
+            if derivados is None or derivados[0][0][1] >= versao:
+                return
+            del self._derivados[dataset]
+            if derivar is not None and derivados[0] == anteriores:
+                mantidos = {}
+                for nome, valor in derivados[1].items():
+                    valor = derivar(valor)
+                    if valor is not None:
+                        mantidos[nome] = valor
+                self._derivados[dataset] = (novas, mantidos)
+
+    # Base de conhecimento
+
+    @staticmethod
+    def _carregar_conhecimentos(conexao: sqlite3.Connection) -> List[ConhecimentoIdioma]:
+        linhas = conexao.execute("SELECT dados FROM conhecimentos ORDER BY posicao").fetchall()
+        if not linhas:
+            raise HTTPException(
+                status_code=400,
+                detail="Base de conhecimento não pode estar vazia"
+            )
+        try:
+            return [ConhecimentoIdioma.model_validate_json(dados) for (dados,) in linhas]
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Erro de validação: {e.errors()}"
+            )
+
+    def entrada_conhecimento(self, completa: bool = True) -> EntradaCache:
+        return self._entrada(CONHECIMENTO, self._carregar_conhecimentos, completa)
+
+    def iterar_conhecimentos(self, entrada: EntradaCache) -> Iterator[ConhecimentoIdioma]:
+        if entrada.objeto is not None:
+            return iter(entrada.objeto)
+        return self._iterar(
+            CONHECIMENTO,
+            entrada,
+            "SELECT dados FROM conhecimentos ORDER BY posicao",
+            ConhecimentoIdioma.model_validate_json
+        )
+
+    def obter_conhecimento(self, conhecimento_id: UUID) -> Optional[ConhecimentoIdioma]:
+        with self._transacao() as conexao:
+            linha = conexao.execute(
+                "SELECT dados FROM conhecimentos WHERE conhecimento_id = ?", (str(conhecimento_id),)
+            ).fetchone()
+        if linha is None:
+            return None
+        return ConhecimentoIdioma.model_validate_json(linha[0])
+
+    def contar_conhecimentos(self) -> int:
+        with self._transacao() as conexao:
+            return conexao.execute("SELECT COUNT(*) FROM conhecimentos").fetchone()[0]
+
+    @staticmethod
+    def _inserir_conhecimentos(conexao: sqlite3.Connection, conhecimentos: Sequence[ConhecimentoIdioma]) -> None:
+        conexao.execute("DELETE FROM conhecimentos")
+        conexao.executemany(
+            "INSERT INTO conhecimentos (conhecimento_id, idioma, tipo_conhecimento, data_hora, dados) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (_linha_conhecimento(c) for c in conhecimentos)
+        )
+
+    def substituir_conhecimentos(self, conhecimentos: List[ConhecimentoIdioma]) -> None:
+        with self._transacao(escrita=True) as conexao:
+            self._inserir_conhecimentos(conexao, conhecimentos)
+            self._registrar_alteracao(conexao, CONHECIMENTO, lambda _: list(conhecimentos))
+
+    def salvar_conhecimento(self, conhecimento: ConhecimentoIdioma) -> None:
+        def combinar(atuais: List[ConhecimentoIdioma]) -> List[ConhecimentoIdioma]:
+            novos = [conhecimento if c.conhecimento_id == conhecimento.conhecimento_id else c for c in atuais]
+            if all(c.conhecimento_id != conhecimento.conhecimento_id for c in atuais):
+                novos.append(conhecimento)
+            return novos
+
+        with self._transacao(escrita=True) as conexao:
+            # O upsert preserva a posição de um registro existente
+            conexao.execute(
+                "INSERT INTO conhecimentos (conhecimento_id, idioma, tipo_conhecimento, data_hora, dados) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (conhecimento_id) DO UPDATE SET idioma = excluded.idioma, "
+                "tipo_conhecimento = excluded.tipo_conhecimento, data_hora = excluded.data_hora, "
+                "dados = excluded.dados",
+                _linha_conhecimento(conhecimento)
+            )
+            self._registrar_alteracao(
+                conexao,
+                CONHECIMENTO,
+                combinar,
+                _alterar_copia(lambda busca: busca.salvar(conhecimento))
+            )
+
+    def remover_conhecimento(self, conhecimento_id: UUID) -> None:
+        with self._transacao(escrita=True) as conexao:
+            conexao.execute("DELETE FROM conhecimentos WHERE conhecimento_id = ?", (str(conhecimento_id),))
+            self._registrar_alteracao(
+                conexao,
+                CONHECIMENTO,
+                lambda atuais: [c for c in atuais if c.conhecimento_id != conhecimento_id],
+                _alterar_copia(lambda busca: busca.remover(conhecimento_id))
+            )
+
+    def ids_conhecimentos(self) -> Container[UUID]:
+        # Só a coluna indexada: nenhum registro é validado
+        return self._derivado(CONHECIMENTO, "ids", lambda conexao: frozenset(
+            UUID(conhecimento_id) for (conhecimento_id,) in conexao.execute("SELECT conhecimento_id FROM conhecimentos")
+        ))
+
+    def busca_conhecimentos(self) -> IndiceBusca:
+        return self._derivado(CONHECIMENTO, "busca", lambda conexao: IndiceBusca(
+            ConhecimentoIdioma.model_validate_json(dados)
+            for (dados,) in conexao.execute("SELECT dados FROM conhecimentos ORDER BY posicao")
+        ))
+
+    # Histórico de prática
+
+    @staticmethod
+    def _validar_exercicios(linhas: Sequence[Tuple[str]]) -> List[ExercicioPraticaBase]:
+        try:
+            return [ADAPTADOR_EXERCICIO.validate_json(dados) for (dados,) in linhas]
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Erro de validação: {e.errors()}"
+            )
+
+    def _carregar_historico(self, conexao: sqlite3.Connection) -> HistoricoPratica:
+        linhas = conexao.execute("SELECT dados FROM exercicios ORDER BY sequencia").fetchall()
+        return HistoricoPratica.model_construct(exercicios=self._validar_exercicios(linhas))
+
+    def entrada_historico(self, completa: bool = True) -> EntradaCache:
+        return self._entrada(HISTORICO, self._carregar_historico, completa)
+
+    def iterar_historico(self, entrada: EntradaCache) -> Iterator[ExercicioPraticaBase]:
+        if entrada.objeto is not None:
+            return iter(entrada.objeto.exercicios)
+        return self._iterar(
+            HISTORICO,
+            entrada,
+            "SELECT dados FROM exercicios ORDER BY sequencia",
+            ADAPTADOR_EXERCICIO.validate_json
+        )
+
+    def consultar_historico(
+        self,
+        entrada: EntradaCache,
+        idioma: Optional[Idioma] = None,
+        tipo_pratica: Optional[TipoPratica] = None,
+        conhecimento_id: Optional[UUID] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        limite: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[ExercicioPraticaBase], Optional[str]]:
+        condicoes: List[str] = []
+        parametros: List[Any] = []
+        for coluna, valor in (("idioma", idioma), ("tipo_pratica", tipo_pratica), ("conhecimento_id", conhecimento_id)):
+            if valor is not None:
+                condicoes.append(f"{coluna} = ?")
+                parametros.append(valor.value if isinstance(valor, (Idioma, TipoPratica)) else str(valor))
+        if data_inicio is not None:
+            condicoes.append("data_hora >= ?")
+            parametros.append(microssegundos(data_inicio))
+        if data_fim is not None:
+            condicoes.append("data_hora <= ?")
+            parametros.append(microssegundos(data_fim))
+        if cursor is not None:
+            negativo, exercicio_id, sequencia = decodificar_cursor(cursor)
+            condicoes.append("(data_hora < ? OR (data_hora = ? AND (exercicio_id, sequencia) > (?, ?)))")
+            parametros.extend([-negativo, -negativo, exercicio_id, sequencia])
+
+        consulta = "SELECT data_hora, exercicio_id, sequencia, dados FROM exercicios"
+        if condicoes:
+            consulta += " WHERE " + " AND ".join(condicoes)
+        consulta += " ORDER BY data_hora DESC, exercicio_id, sequencia"
+        if limite is not None:
+            # Uma linha a mais indica se existe próxima página
+            consulta += " LIMIT ?"
+            parametros.append(limite + 1)
+
+        with self._transacao() as conexao:
+            linhas = conexao.execute(consulta, parametros).fetchall()
+
+        proximo_cursor = None
+        if limite is not None and len(linhas) > limite:
+            linhas = linhas[:limite]
+            data_hora, exercicio_id, sequencia = linhas[-1][:3]
+            proximo_cursor = codificar_cursor((-data_hora, exercicio_id, sequencia))
+        return self._validar_exercicios([(linha[3],) for linha in linhas]), proximo_cursor
+
+    def contem_exercicio(self, exercicio_id: UUID) -> bool:
+        with self._transacao() as conexao:
+            linha = conexao.execute(
+                "SELECT 1 FROM exercicios WHERE exercicio_id = ?", (str(exercicio_id),)
+            ).fetchone()
+        return linha is not None
+
+    @staticmethod
+    def _inserir_exercicios(conexao: sqlite3.Connection, exercicios: Sequence[ExercicioPraticaBase]) -> None:
+        conexao.executemany(
+            "INSERT INTO exercicios (exercicio_id, data_hora, idioma, tipo_pratica, conhecimento_id, dados) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (_linha_exercicio(e) for e in exercicios)
+        )
+
+    @staticmethod
+    def _contabilizar(conexao: sqlite3.Connection, exercicios: Sequence[ExercicioPraticaBase]) -> None:
+        """Soma os exercícios aos contadores da tabela estatisticas."""
+        conexao.executemany(
+            "INSERT INTO estatisticas (idioma, tipo_pratica, dia, total, acertos) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (idioma, tipo_pratica, dia) DO UPDATE SET "
+            "total = total + excluded.total, acertos = acertos + excluded.acertos",
+            (
+                (idioma.value, tipo_pratica.value, dia.isoformat(), total, acertos)
+                for idioma, tipo_pratica, dia, total, acertos in EstatisticasHistorico(exercicios).celulas()
+            )
+        )
+
+    @staticmethod
+    def _carregar_estatisticas(conexao: sqlite3.Connection) -> EstatisticasHistorico:
+        estatisticas = EstatisticasHistorico()
+        for idioma, tipo_pratica, dia, total, acertos in conexao.execute(
+            "SELECT idioma, tipo_pratica, dia, total, acertos FROM estatisticas"
+        ):
+            estatisticas.somar(Idioma(idioma), TipoPratica(tipo_pratica), date.fromisoformat(dia), total, acertos)
+        return estatisticas
+
+    def estatisticas_historico(self, entrada: EntradaCache) -> EstatisticasHistorico:
+        # Lidas da tabela uma vez por versão; anexar_exercicios soma os novos exercícios
+        return self._derivado(HISTORICO, "estatisticas", self._carregar_estatisticas)
+
+    def agendador_revisao(self, entrada: EntradaCache) -> AgendadorRevisao:
+        return self._derivado(
+            HISTORICO,
+            "revisao",
+            lambda conexao: AgendadorRevisao(
+                ADAPTADOR_EXERCICIO.validate_json(dados)
+                for (dados,) in conexao.execute("SELECT dados FROM exercicios")
+            )
+        )
+
+    def anexar_exercicios(self, exercicios: Sequence[ExercicioPraticaBase]) -> None:
+        novos = list(exercicios)
+        with self._transacao(escrita=True) as conexao:
+            self._inserir_exercicios(conexao, novos)
+            self._contabilizar(conexao, novos)
+            self._registrar_alteracao(
+                conexao,
+                HISTORICO,
+                lambda h: HistoricoPratica.model_construct(exercicios=h.exercicios + novos),
+                _anexar_a_derivado(novos)
+            )
+
+    def tamanhos(self) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+        # O histórico é contado pela tabela de estatísticas, sem percorrer os exercícios
+        with self._transacao() as conexao:
+            conhecimentos = conexao.execute("SELECT COUNT(*) FROM conhecimentos").fetchone()[0]
+            exercicios = conexao.execute("SELECT COALESCE(SUM(total), 0) FROM estatisticas").fetchone()[0]
+        return {"base_de_conhecimento": (conhecimentos, None), "historico_de_pratica": (exercicios, None)}
+
+    def importar(
+        self,
+        conhecimentos: Sequence[ConhecimentoIdioma],
+        exercicios: Sequence[ExercicioPraticaBase]
+    ) -> None:
+        """Substitui o conteúdo do banco pelos registros informados em uma única transação."""
+        with self._transacao(escrita=True) as conexao:
+            self._inserir_conhecimentos(conexao, conhecimentos)
+            conexao.execute("DELETE FROM exercicios")
+            conexao.execute("DELETE FROM estatisticas")
+            self._inserir_exercicios(conexao, exercicios)
+            self._contabilizar(conexao, exercicios)
+            self._registrar_alteracao(conexao, CONHECIMENTO, lambda _: list(conhecimentos))
+            self._registrar_alteracao(
+                conexao,
+                HISTORICO,
+                lambda _: HistoricoPratica.model_construct(exercicios=list(exercicios))
+            )
+
+
+def importar_arquivos(banco: Path, pasta: Path) -> Tuple[int, int]:
+    """
+    Importa os arquivos [BASE] de `pasta` para o banco SQLite, validando-os antes.
+
+    O histórico inclui o segmento JSON Lines. O conteúdo anterior do banco é
+    substituído.
+
+    Returns:
+        (número de conhecimentos, número de exercícios) importados.
+
+    Raises:
+        HTTPException: Se algum arquivo estiver ausente ou inválido.
+    """
+    conhecimentos = carregar_base_de_conhecimento(pasta / ARQUIVO_CONHECIMENTO)
+    historico = carregar_historico_de_pratica(pasta / ARQUIVO_HISTORICO, pasta / ARQUIVO_HISTORICO_SEGMENTO)
+    ArmazenamentoSQLite(banco).importar(conhecimentos, historico.exercicios)
+    return len(conhecimentos), len(historico.exercicios)
+
+
+def main():
+    """Importa os arquivos da pasta public para o banco SQLite."""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Importa os arquivos [BASE] para o banco SQLite.")
+    parser.add_argument(
+        "banco",
+        nargs="?",
+        default=os.getenv("ARQUIVO_SQLITE", str(ARQUIVO_SQLITE_PADRAO)),
+        help="Caminho do banco SQLite, criado se não existir (padrão: ARQUIVO_SQLITE do .env)"
+    )
+    parser.add_argument(
+        "--public",
+        default=str(PUBLIC_DIR),
+        help="Pasta com os arquivos [BASE]"
+    )
+    argumentos = parser.parse_args()
+
+    try:
+        conhecimentos, exercicios = importar_arquivos(Path(argumentos.banco), Path(argumentos.public))
+    except HTTPException as e:
+        print(f"✗ Erro ao importar: {e.detail}")
+        sys.exit(1)
+    print(f"✓ {conhecimentos} conhecimentos e {exercicios} exercícios importados para {argumentos.banco}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Escrita segura de arquivos de dados.
+O conteúdo novo é gravado em um arquivo temporário no mesmo diretório, sincronizado
+em disco e trocado pelo original com os.replace, de forma que um leitor (ou uma queda
+do processo) nunca encontra um arquivo pela metade.
+"""
+import os
+import shutil
+import stat
+import tempfile
+from pathlib import Path
+from typing import Callable, IO, Optional
+
+
+def _sincronizar_diretorio(diretorio: Path) -> None:
+    """Garante que a troca de nomes no diretório foi persistida (apenas POSIX)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(diretorio, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def preservar_backup(caminho: Path, backup: Path) -> None:
+    """
+    Faz `backup` apontar para o conteúdo atual de `caminho` sem copiar bytes.
+
+    Usa um hardlink para o mesmo inode; como o original nunca é reescrito no lugar,
+    o backup continua com a versão anterior após a troca. Em sistemas de arquivos
+    sem suporte a hardlinks, faz uma cópia.
+    """
+    temporario = backup.with_name(f".{backup.name}.{os.getpid()}.tmp")
+    try:
+        os.link(caminho, temporario)
+    except OSError:
+        shutil.copyfile(caminho, temporario)
+    os.replace(temporario, backup)
+
+
+def gravar_atomico(
+    caminho: Path,
+    escrever: Callable[[IO[str]], None],
+    backup: Optional[Path] = None
+) -> None:
+    """
+    Grava um arquivo de texto de forma atômica.
+
+    Args:
+        caminho: Arquivo de destino.
+        escrever: Função que recebe o arquivo temporário aberto e grava o conteúdo.
+        backup: Se informado e o destino existir, preserva a versão anterior nele.
+    """
+    diretorio = caminho.parent
+    fd, nome_temporario = tempfile.mkstemp(prefix=f".{caminho.name}.", suffix=".tmp", dir=diretorio)
+    try:
+        # mkstemp cria o arquivo com permissão 0600; manter a do arquivo original
+        try:
+            os.chmod(nome_temporario, stat.S_IMODE(os.stat(caminho).st_mode))
+        except FileNotFoundError:
+            pass
+
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            escrever(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if backup is not None and caminho.exists():
+            preservar_backup(caminho, backup)
+
+        os.replace(nome_temporario, caminho)
+    except BaseException:
+        try:
+            os.unlink(nome_temporario)
+        except FileNotFoundError:
+            pass
+        raise
+
+    _sincronizar_diretorio(diretorio)
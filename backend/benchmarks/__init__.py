@@ -0,0 +1,5 @@
+"""
+Benchmarks do backend.
+Execute a partir da pasta backend, por exemplo: python -m benchmarks.bench_salvar_json
+A suíte completa, com dados sintéticos em várias escalas: python -m benchmarks.suite
+"""
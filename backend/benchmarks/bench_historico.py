@@ -0,0 +1,103 @@
+"""
+Benchmark da validação do histórico de prática.
+
+Compara a validação de resultado_exercicio como união simples (implementação
+anterior, em que o Pydantic testa os cinco modelos) com o discriminador por
+tipo_pratica, e mede os dois caminhos que usam HistoricoPratica: o carregamento
+do servidor (main.py) e o ValidadorJSON (validator.py), este também no modo
+streaming, comparando o pico de memória alocada (tracemalloc) nos dois modos.
+
+Uso (na pasta backend):
+    python -m benchmarks.bench_historico [quantidade_de_exercicios]
+"""
+import json
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import List, Union
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from benchmarks.geradores import gerar_historico
+from benchmarks.medicao import formatar_linha, medir
+from carga import ARQUIVO_HISTORICO, ARQUIVO_HISTORICO_SEGMENTO, carregar_historico_de_pratica
+from models import (
+    HistoricoPratica,
+    Idioma,
+    ResultadoAudicao,
+    ResultadoDialogo,
+    ResultadoPronuncia,
+    ResultadoPronunciaNumeros,
+    ResultadoTraducao,
+    TipoPratica
+)
+from validator import ValidadorJSON
+
+
+class ExercicioPraticaUniao(BaseModel):
+    """ExercicioPratica com resultado_exercicio como união simples (versão anterior)."""
+    data_hora: datetime
+    exercicio_id: UUID
+    conhecimento_id: UUID
+    idioma: Idioma
+    tipo_pratica: TipoPratica
+    resultado_exercicio: Union[
+        ResultadoTraducao,
+        ResultadoAudicao,
+        ResultadoPronuncia,
+        ResultadoDialogo,
+        ResultadoPronunciaNumeros
+    ]
+
+
+class HistoricoPraticaUniao(BaseModel):
+    exercicios: List[ExercicioPraticaUniao]
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dados = gerar_historico(quantidade)
+    print(f"{quantidade} exercícios sintéticos (cinco tipos de prática)\n")
+
+    resultados = {}
+    for nome, modelo in (("HistoricoPratica união (anterior)", HistoricoPraticaUniao),
+                         ("HistoricoPratica discriminado", HistoricoPratica)):
+        resultados[nome] = medir(lambda: modelo(**dados), rodadas=5)
+        vazao = quantidade / resultados[nome]["median"]
+        print(formatar_linha(nome, resultados[nome]))
+        print(f"{'':<45} {vazao:,.0f} exercícios/s")
+
+    anterior, atual = (r["median"] for r in resultados.values())
+    print(f"\nGanho de vazão: {anterior / atual:.2f}x\n")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        caminho = pasta / ARQUIVO_HISTORICO
+        caminho.write_text(json.dumps(dados, ensure_ascii=False), encoding="utf-8")
+
+        carregar = lambda: carregar_historico_de_pratica(caminho, pasta / ARQUIVO_HISTORICO_SEGMENTO)
+        print(formatar_linha("carga.carregar_historico_de_pratica", medir(carregar, rodadas=3)))
+
+        validador = ValidadorJSON(pasta_public=str(pasta))
+        print(formatar_linha("ValidadorJSON.validar_historico_pratica",
+                             medir(validador.validar_historico_pratica, rodadas=3)))
+
+        validador_streaming = ValidadorJSON(pasta_public=str(pasta), streaming=True)
+        print(formatar_linha("ValidadorJSON streaming",
+                             medir(validador_streaming.validar_historico_pratica, rodadas=3)))
+
+        print(f"\nPico de memória ({caminho.stat().st_size / 1e6:.1f} MB em disco)")
+        del dados
+        for nome, instancia in (("ValidadorJSON", validador), ("ValidadorJSON streaming", validador_streaming)):
+            tracemalloc.start()
+            instancia.validar_historico_pratica()
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{nome:<45} {pico / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark do GET do histórico de prática com o dataset já em cache.
+
+Compara a resposta anterior (o objeto validado é devolvido e o FastAPI o valida e
+serializa de novo pelo response_model) com o JSON pré-serializado, guardado junto
+à entrada do cache e reutilizado até o arquivo mudar.
+
+Também compara, com o histórico lido do banco SQLite, o pico de memória alocada
+pela resposta JSON e pela representação NDJSON em streaming. O TestClient acumula o
+corpo recebido, então o pico inclui o tamanho da resposta nos dois casos.
+
+Uso (na pasta backend):
+    python -m benchmarks.bench_respostas [quantidade_de_exercicios ...]
+"""
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main as servidor
+from benchmarks.geradores import gerar_historico
+from armazenamento import ArmazenamentoSQLite, importar_arquivos
+from benchmarks.medicao import formatar_linha, medir
+from models import PaginaHistoricoPratica
+
+
+# Pasta public original, de onde vem a base de conhecimento exigida pela importação
+PUBLIC_ORIGINAL = servidor.PUBLIC_DIR
+
+
+def criar_app_legado() -> FastAPI:
+    """Endpoint equivalente ao anterior, que passa pelo response_model a cada requisição."""
+    app = FastAPI()
+
+    @app.get("/api/historico_de_pratica", response_model=PaginaHistoricoPratica)
+    def get_historico_de_pratica():
+        return servidor.obter_entrada_historico().objeto
+
+    return app
+
+
+def executar(quantidade: int) -> None:
+    pasta_original = servidor.PUBLIC_DIR
+    armazenamento_original = servidor.armazenamento
+    with tempfile.TemporaryDirectory() as pasta:
+        servidor.PUBLIC_DIR = Path(pasta)
+        servidor.cache_datasets.limpar()
+        try:
+            caminho = servidor.PUBLIC_DIR / servidor.ARQUIVO_HISTORICO
+            with open(caminho, 'w', encoding='utf-8') as f:
+                json.dump(gerar_historico(quantidade), f, ensure_ascii=False, indent=2)
+
+            print(f"\n{quantidade} exercícios ({caminho.stat().st_size / 1e6:.1f} MB)")
+            for nome, app in (("response_model (anterior)", criar_app_legado()),
+                              ("JSON pré-serializado", servidor.app)):
+                cliente = TestClient(app)
+                estatisticas = medir(lambda: cliente.get("/api/historico_de_pratica"), rodadas=10)
+                print(formatar_linha(nome, estatisticas))
+
+            shutil.copy(PUBLIC_ORIGINAL / servidor.ARQUIVO_CONHECIMENTO, servidor.PUBLIC_DIR)
+            banco = servidor.PUBLIC_DIR / "bench.sqlite3"
+            importar_arquivos(banco, servidor.PUBLIC_DIR)
+            for nome, accept in (("SQLite JSON", "application/json"),
+                                 ("SQLite NDJSON (streaming)", "application/x-ndjson")):
+                # Instância nova: nada do histórico em memória antes da requisição
+                servidor.armazenamento = ArmazenamentoSQLite(banco)
+                cliente = TestClient(servidor.app)
+                tracemalloc.start()
+                inicio = time.perf_counter()
+                cliente.get("/api/historico_de_pratica", headers={"Accept": accept})
+                total = time.perf_counter() - inicio
+                pico = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{nome:<45} total {total * 1000:9.1f} ms (com tracemalloc)  pico {pico / 1e6:7.1f} MB")
+        finally:
+            servidor.PUBLIC_DIR = pasta_original
+            servidor.armazenamento = armazenamento_original
+            servidor.cache_datasets.limpar()
+
+def main():
+    quantidades = [int(q) for q in sys.argv[1:]] or [1_000, 20_000]
+    for quantidade in quantidades:
+        executar(quantidade)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark de salvar_json: I/O e tempo por PUT para bases de conhecimento de vários MB.
+
+Compara a implementação anterior (lê o arquivo, copia para .json.backup e reescreve
+o original no lugar) com a escrita atômica atual (arquivo temporário + os.replace,
+backup por hardlink).
+
+Uso (na pasta backend):
+    python -m benchmarks.bench_salvar_json [quantidade_de_itens ...]
+"""
+import json
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.medicao import contadores_io, formatar_linha, medir
+from main import salvar_json
+
+
+def salvar_json_legado(caminho: Path, dados):
+    """Implementação anterior de salvar_json, mantida apenas como referência."""
+    if caminho.exists():
+        backup_path = caminho.with_suffix('.json.backup')
+        with open(caminho, 'r', encoding='utf-8') as f:
+            backup_data = f.read()
+        with open(backup_path, 'w', encoding='utf-8') as f:
+            f.write(backup_data)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+def gerar_base(quantidade: int):
+    """Gera uma base de conhecimento sintética com `quantidade` itens."""
+    agora = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "conhecimento_id": str(uuid.uuid4()),
+            "data_hora": agora,
+            "idioma": "alemao",
+            "tipo_conhecimento": "palavra",
+            "texto_original": f"das Mädchen {i}",
+            "transcricao_ipa": "ˈmɛːtçən",
+            "traducao": f"a menina {i}",
+            "divisao_silabica": "Mäd-chen"
+        }
+        for i in range(quantidade)
+    ]
+
+
+def bytes_por_put(funcao, caminho: Path, dados) -> int:
+    """Bytes lidos + escritos pelo processo em um único PUT (ou -1 se indisponível)."""
+    antes = contadores_io()
+    if antes is None:
+        return -1
+    funcao(caminho, dados)
+    depois = contadores_io()
+    return (depois["rchar"] - antes["rchar"]) + (depois["wchar"] - antes["wchar"])
+
+
+def executar(quantidade: int) -> None:
+    dados = gerar_base(quantidade)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = Path(pasta) / "[BASE] Conhecimento de idiomas.json"
+        salvar_json_legado(caminho, dados)
+        tamanho = caminho.stat().st_size
+
+        print(f"\n{quantidade} itens ({tamanho / 1e6:.1f} MB)")
+        for nome, funcao in (("legado (cópia + reescrita)", salvar_json_legado),
+                             ("atômico (temp + os.replace)", salvar_json)):
+            io_total = bytes_por_put(funcao, caminho, dados)
+            estatisticas = medir(lambda: funcao(caminho, dados), rodadas=5)
+            print(formatar_linha(nome, estatisticas))
+            if io_total >= 0:
+                print(f"{'':<45} I/O por PUT: {io_total / 1e6:.1f} MB ({io_total / tamanho:.2f}x o arquivo)")
+
+
+def main():
+    quantidades = [int(q) for q in sys.argv[1:]] or [10_000, 50_000]
+    for quantidade in quantidades:
+        executar(quantidade)
+
+
+if __name__ == "__main__":
+    main()
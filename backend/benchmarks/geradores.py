@@ -0,0 +1,153 @@
+"""
+Geradores de dados sintéticos válidos para os benchmarks.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from models import TipoPratica
+
+_INICIO = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# (texto original, transcrição IPA, tradução, divisão silábica) por idioma
+_VOCABULARIO = {
+    "alemao": [
+        ("das Mädchen", "ˈmɛːtçən", "a menina", "Mäd-chen"),
+        ("Entschuldigung", "ɛntˈʃʊldɪɡʊŋ", "desculpe", "Ent-schul-di-gung"),
+        ("Wie geht es Ihnen?", "viː ɡeːt ɛs ˈiːnən", "Como vai o senhor?", None),
+        ("Straße", "ˈʃtʁaːsə", "rua", "Stra-ße"),
+    ],
+    "ingles": [
+        ("thoroughly", "ˈθʌrəli", "minuciosamente", "thor-ough-ly"),
+        ("Nice to meet you.", "naɪs tə miːt juː", "Prazer em conhecê-lo.", None),
+        ("squirrel", "ˈskwɪrəl", "esquilo", "squir-rel"),
+        ("weather", "ˈwɛðər", "tempo (clima)", "weath-er"),
+    ],
+}
+
+
+def _data_hora(segundos: int) -> str:
+    return (_INICIO + timedelta(seconds=segundos)).isoformat().replace("+00:00", "Z")
+
+
+def gerar_resultado(tipo_pratica: TipoPratica, aleatorio: random.Random) -> Dict:
+    """Gera um resultado_exercicio válido para o tipo de prática."""
+    if tipo_pratica == TipoPratica.TRADUCAO:
+        return {
+            "campo_fornecido": "traducao",
+            "campos_preenchidos": ["texto_original", "transcricao_ipa"],
+            "valores_preenchidos": ["das Mädchen", "/ˈmɛːtçən/"],
+            "campos_resultados": [aleatorio.random() < 0.7, aleatorio.random() < 0.5]
+        }
+    if tipo_pratica == TipoPratica.AUDICAO:
+        return {
+            "texto_original": "The quick brown fox jumps over the lazy dog.",
+            "transcricao_usuario": "The quick brown fox jumped over the lazy dog.",
+            "correto": aleatorio.random() < 0.6,
+            "velocidade_utilizada": aleatorio.choice(["1.0", "0.75", "0.5"])
+        }
+    if tipo_pratica == TipoPratica.PRONUNCIA:
+        return {
+            "texto_original": "Entschuldigung",
+            "transcricao_stt": "Enchuldegung",
+            "correto": aleatorio.choice(["Sim", "Parcial", "Não"]),
+            "comentario": "A pronúncia do dígrafo 'tsch' pode ser melhorada."
+        }
+    if tipo_pratica == TipoPratica.DIALOGO:
+        return {"correto": aleatorio.choice(["Sim", "Parcial", "Não"])}
+    numero = aleatorio.randint(0, 9999)
+    return {
+        "numero_referencia": str(numero),
+        "audio_usuario_url": f"https://storage.example.com/audio/{numero}-user-attempt.mp3",
+        "transcricao_correta": f"número {numero}",
+        "acertou": aleatorio.random() < 0.8
+    }
+
+
+def gerar_exercicios(quantidade: int, semente: int = 42) -> List[Dict]:
+    """Gera `quantidade` exercícios válidos alternando os cinco tipos de prática."""
+    aleatorio = random.Random(semente)
+    tipos = list(TipoPratica)
+    conhecimentos = [str(uuid.UUID(int=aleatorio.getrandbits(128))) for _ in range(max(1, quantidade // 20))]
+    exercicios = []
+    for i in range(quantidade):
+        tipo_pratica = tipos[i % len(tipos)]
+        exercicios.append({
+            "data_hora": _data_hora(i * 37),
+            "exercicio_id": str(uuid.UUID(int=aleatorio.getrandbits(128))),
+            "conhecimento_id": aleatorio.choice(conhecimentos),
+            "idioma": aleatorio.choice(["alemao", "ingles"]),
+            "tipo_pratica": tipo_pratica.value,
+            "resultado_exercicio": gerar_resultado(tipo_pratica, aleatorio)
+        })
+    return exercicios
+
+
+def gerar_historico(quantidade: int, semente: int = 42) -> Dict:
+    """Gera o conteúdo de um [BASE] Histórico de Prática.json com `quantidade` exercícios."""
+    return {"exercicios": gerar_exercicios(quantidade, semente)}
+
+
+def gerar_conhecimentos(quantidade: int, semente: int = 42) -> List[Dict]:
+    """Gera `quantidade` registros válidos da base de conhecimento (frases e palavras, dois idiomas)."""
+    aleatorio = random.Random(semente)
+    conhecimentos = []
+    for i in range(quantidade):
+        idioma = aleatorio.choice(list(_VOCABULARIO))
+        texto, ipa, traducao, silabas = aleatorio.choice(_VOCABULARIO[idioma])
+        conhecimento = {
+            "conhecimento_id": str(uuid.UUID(int=aleatorio.getrandbits(128))),
+            "data_hora": _data_hora(i * 61),
+            "idioma": idioma,
+            "tipo_conhecimento": "palavra" if silabas else "frase",
+            "texto_original": f"{texto} {i}",
+            "traducao": f"{traducao} {i}",
+        }
+        # Campos opcionais ora presentes, ora nulos, ora ausentes
+        if i % 3 == 0:
+            conhecimento["transcricao_ipa"] = ipa
+            conhecimento["divisao_silabica"] = silabas
+        elif i % 3 == 1:
+            conhecimento["transcricao_ipa"] = None
+        conhecimentos.append(conhecimento)
+    return conhecimentos
+
+
+def gerar_prompts(quantidade: int, semente: int = 42) -> Dict:
+    """Gera o conteúdo de um [BASE] Prompts.json com `quantidade` prompts."""
+    aleatorio = random.Random(semente)
+    prompts = []
+    for i in range(quantidade):
+        parametros = [f"parametro_{j}" for j in range(aleatorio.randint(1, 4))]
+        estruturada = i % 2 == 0
+        prompt = {
+            "prompt_id": f"prompt_{i}_v1",
+            "descricao": f"Prompt sintético {i} para exercícios de tradução e diálogo.",
+            "template": "Considere " + ", ".join(f"{{{{{p}}}}}" for p in parametros) + " e responda em português.",
+            "parametros": parametros,
+            "resposta_estruturada": estruturada,
+            "ultima_edicao": _data_hora(i * 113),
+        }
+        if estruturada:
+            prompt["estrutura_esperada"] = {
+                "type": "object",
+                "properties": {"resposta": {"type": "string"}, "pontuacao": {"type": "number"}},
+                "required": ["resposta"]
+            }
+        prompts.append(prompt)
+    return {
+        "descricao": "Coleção sintética de prompts para benchmarks.",
+        "data_atualizacao": _data_hora(quantidade * 113),
+        "marcador_de_paramentros": "{{param}}",
+        "prompts": prompts
+    }
+
+
+def gerar_frases(quantidade: int) -> Dict:
+    """Gera o conteúdo de um [BASE] Frases do Diálogo.json com `quantidade` frases intermediárias."""
+    return {
+        "saudacao": "Hallo",
+        "despedida": "Tschüss",
+        "intermediarias": [f"Frage Nummer {i}: Wie geht's?" for i in range(max(1, quantidade))]
+    }
@@ -0,0 +1,53 @@
+"""
+Utilitários de medição compartilhados pelos benchmarks.
+"""
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+def contadores_io() -> Optional[Dict[str, int]]:
+    """Retorna rchar/wchar do processo (Linux) ou None se indisponível."""
+    caminho = Path("/proc/self/io")
+    if not caminho.exists():
+        return None
+    contadores = {}
+    for linha in caminho.read_text().splitlines():
+        nome, valor = linha.split(":")
+        contadores[nome.strip()] = int(valor)
+    return contadores
+
+
+def medir(funcao: Callable[[], object], rodadas: int = 5, aquecimento: int = 1) -> Dict[str, float]:
+    """
+    Executa `funcao` várias vezes e retorna estatísticas de tempo em segundos,
+    no mesmo formato do pytest-benchmark (min, max, mean, stddev, median).
+    """
+    for _ in range(aquecimento):
+        funcao()
+
+    tempos: List[float] = []
+    for _ in range(rodadas):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    return {
+        "min": min(tempos),
+        "max": max(tempos),
+        "mean": statistics.fmean(tempos),
+        "stddev": statistics.stdev(tempos) if len(tempos) > 1 else 0.0,
+        "median": statistics.median(tempos),
+        "rounds": rodadas,
+    }
+
+
+def formatar_linha(nome: str, estatisticas: Dict[str, float]) -> str:
+    """Formata uma linha de resultado com tempos em milissegundos."""
+    ms = {k: v * 1000 for k, v in estatisticas.items() if k != "rounds"}
+    return (
+        f"{nome:<45} min {ms['min']:>10.3f}  max {ms['max']:>10.3f}  "
+        f"mean {ms['mean']:>10.3f}  stddev {ms['stddev']:>8.3f}  "
+        f"median {ms['median']:>10.3f}  (ms, {estatisticas['rounds']} rodadas)"
+    )
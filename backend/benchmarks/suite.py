@@ -0,0 +1,302 @@
+"""
+Suíte de benchmarks dos caminhos críticos do backend.
+
+Para cada escala, gera dados sintéticos válidos (base de conhecimento, prompts,
+histórico com os cinco tipos de prática e frases do diálogo) em uma pasta temporária
+e mede, com as estatísticas do pytest-benchmark:
+
+- carga: leitura e decodificação dos arquivos JSON;
+- validacao: modelos Pydantic, carregadores do servidor e ValidadorJSON;
+- serializacao: GETs com o cache frio e quente, NDJSON, 304 e página filtrada;
+- escrita: PUTs e operações de item de ponta a ponta pelo TestClient.
+
+Os resultados podem ser gravados em JSON (--json) e comparados com uma execução
+anterior (--comparar); medianas mais lentas que o limite são marcadas como
+regressão e o código de saída passa a ser 1.
+
+Uso (na pasta backend):
+    python -m benchmarks.suite [--escalas 1k 100k 1m] [--grupos carga escrita ...]
+                               [--armazenamento json|sqlite]
+                               [--json resultados.json] [--comparar anterior.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from pydantic_core import to_json
+
+import main as servidor
+from armazenamento import ArmazenamentoSQLite, importar_arquivos
+from benchmarks.geradores import (
+    gerar_conhecimentos,
+    gerar_exercicios,
+    gerar_frases,
+    gerar_historico,
+    gerar_prompts
+)
+from benchmarks.medicao import formatar_linha, medir
+from models import ColecaoPrompts, ConhecimentoIdioma, FrasesDialogo, HistoricoPratica
+from validator import ValidadorJSON
+
+
+GRUPOS = ("carga", "validacao", "serializacao", "escrita")
+ESCALAS_PADRAO = ["1k", "100k"]
+LIMITE_REGRESSAO = 20.0
+
+
+def interpretar_escala(texto: str) -> int:
+    """Converte '1k', '100k', '1m' ou um número em quantidade de registros."""
+    multiplicadores = {"k": 1_000, "m": 1_000_000}
+    texto = texto.strip().lower()
+    try:
+        if texto[-1:] in multiplicadores:
+            return int(float(texto[:-1]) * multiplicadores[texto[-1]])
+        return int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Escala inválida: {texto}") from None
+
+
+def rotulo_escala(quantidade: int) -> str:
+    """Rótulo curto da escala (1000 -> '1k')."""
+    for sufixo, valor in (("m", 1_000_000), ("k", 1_000)):
+        if quantidade >= valor and quantidade % valor == 0:
+            return f"{quantidade // valor}{sufixo}"
+    return str(quantidade)
+
+
+def rodadas_para(quantidade: int) -> Tuple[int, int]:
+    """(rodadas, aquecimento) proporcionais ao custo de cada medição na escala."""
+    if quantidade <= 10_000:
+        return 20, 2
+    if quantidade <= 100_000:
+        return 5, 1
+    return 2, 0
+
+
+def preparar_pasta(pasta: Path, quantidade: int) -> Dict[str, Any]:
+    """Grava os quatro datasets sintéticos na pasta e retorna os dados gerados."""
+    dados = {
+        servidor.ARQUIVO_CONHECIMENTO: gerar_conhecimentos(quantidade),
+        servidor.ARQUIVO_PROMPTS: gerar_prompts(quantidade),
+        servidor.ARQUIVO_HISTORICO: gerar_historico(quantidade),
+        servidor.ARQUIVO_FRASES: gerar_frases(quantidade),
+    }
+    for arquivo, conteudo in dados.items():
+        with open(pasta / arquivo, 'w', encoding='utf-8') as f:
+            json.dump(conteudo, f, ensure_ascii=False, indent=2)
+    return dados
+
+
+def requisitar(cliente: TestClient, metodo: str, url: str, esperado: int = 200, **opcoes):
+    """Executa a requisição e falha se o status não for o esperado."""
+    resposta = cliente.request(metodo, url, **opcoes)
+    if resposta.status_code != esperado:
+        raise RuntimeError(f"{metodo} {url}: {resposta.status_code} {resposta.text[:200]}")
+    return resposta
+
+
+class Suite:
+    """Executa as medições de uma escala e acumula os resultados."""
+
+    def __init__(self, grupos: List[str]):
+        self.grupos = grupos
+        self.resultados: List[Dict[str, Any]] = []
+
+    def registrar(self, grupo: str, nome: str, quantidade: int, funcao: Callable[[], object]) -> None:
+        if grupo not in self.grupos:
+            return
+        rodadas, aquecimento = rodadas_para(quantidade)
+        estatisticas = medir(funcao, rodadas=rodadas, aquecimento=aquecimento)
+        nome_completo = f"{grupo}/{nome}[{rotulo_escala(quantidade)}]"
+        print(formatar_linha(nome_completo, estatisticas))
+        self.resultados.append({
+            "group": grupo,
+            "name": nome,
+            "fullname": nome_completo,
+            "params": {"escala": quantidade},
+            "stats": estatisticas,
+        })
+
+    def carga(self, pasta: Path, quantidade: int) -> None:
+        for rotulo, arquivo in (("conhecimento", servidor.ARQUIVO_CONHECIMENTO),
+                                ("prompts", servidor.ARQUIVO_PROMPTS),
+                                ("historico", servidor.ARQUIVO_HISTORICO),
+                                ("frases", servidor.ARQUIVO_FRASES)):
+            self.registrar("carga", f"json.load {rotulo}", quantidade, lambda a=arquivo: servidor.carregar_json(pasta / a))
+
+    def validacao(self, pasta: Path, quantidade: int, dados: Dict[str, Any]) -> None:
+        conhecimentos = dados[servidor.ARQUIVO_CONHECIMENTO]
+        self.registrar("validacao", "ConhecimentoIdioma", quantidade,
+                       lambda: [ConhecimentoIdioma(**item) for item in conhecimentos])
+        self.registrar("validacao", "ColecaoPrompts", quantidade,
+                       lambda: ColecaoPrompts(**dados[servidor.ARQUIVO_PROMPTS]))
+        self.registrar("validacao", "HistoricoPratica", quantidade,
+                       lambda: HistoricoPratica(**dados[servidor.ARQUIVO_HISTORICO]))
+        self.registrar("validacao", "FrasesDialogo", quantidade,
+                       lambda: FrasesDialogo(**dados[servidor.ARQUIVO_FRASES]))
+        self.registrar("validacao", "carregar_base_de_conhecimento", quantidade,
+                       lambda: servidor.carregar_base_de_conhecimento(pasta / servidor.ARQUIVO_CONHECIMENTO))
+        self.registrar("validacao", "carregar_historico_de_pratica", quantidade,
+                       lambda: servidor.carregar_historico_de_pratica(
+                           pasta / servidor.ARQUIVO_HISTORICO, pasta / servidor.ARQUIVO_HISTORICO_SEGMENTO))
+
+        def validar_todos(**opcoes):
+            with contextlib.redirect_stdout(io.StringIO()):
+                if not ValidadorJSON(pasta, **opcoes).validar_todos():
+                    raise RuntimeError("ValidadorJSON: dados sintéticos inválidos")
+
+        self.registrar("validacao", "ValidadorJSON", quantidade, validar_todos)
+        self.registrar("validacao", "ValidadorJSON streaming", quantidade, lambda: validar_todos(streaming=True))
+
+    def serializacao(self, cliente: TestClient, quantidade: int) -> None:
+        def frio(url: str) -> Callable[[], object]:
+            def executar():
+                servidor.cache_datasets.limpar()
+                requisitar(cliente, "GET", url)
+            return executar
+
+        for rotulo, url in (("conhecimento", "/api/base_de_conhecimento"),
+                            ("prompts", "/api/prompts"),
+                            ("historico", "/api/historico_de_pratica"),
+                            ("frases", "/api/frases_do_dialogo")):
+            self.registrar("serializacao", f"GET {rotulo} (cache frio)", quantidade, frio(url))
+            self.registrar("serializacao", f"GET {rotulo}", quantidade, lambda u=url: requisitar(cliente, "GET", u))
+
+        etag = requisitar(cliente, "GET", "/api/historico_de_pratica").headers["etag"]
+        self.registrar("serializacao", "GET historico 304", quantidade,
+                       lambda: requisitar(cliente, "GET", "/api/historico_de_pratica", 304,
+                                          headers={"If-None-Match": etag}))
+        self.registrar("serializacao", "GET historico NDJSON", quantidade,
+                       lambda: requisitar(cliente, "GET", "/api/historico_de_pratica",
+                                          headers={"Accept": servidor.NDJSON}))
+        self.registrar("serializacao", "GET historico página filtrada", quantidade,
+                       lambda: requisitar(cliente, "GET", "/api/historico_de_pratica",
+                                          params={"idioma": "alemao", "limite": 50}))
+        historico = servidor.armazenamento.entrada_historico().objeto
+        self.registrar("serializacao", "to_json historico", quantidade, lambda: to_json(historico))
+
+    def escrita(self, cliente: TestClient, quantidade: int, dados: Dict[str, Any]) -> None:
+        rodadas, aquecimento = rodadas_para(quantidade)
+        chamadas = rodadas + aquecimento
+        conhecimentos = dados[servidor.ARQUIVO_CONHECIMENTO]
+
+        self.registrar("escrita", "PUT base_de_conhecimento", quantidade,
+                       lambda: requisitar(cliente, "PUT", "/api/base_de_conhecimento", json=conhecimentos))
+
+        # Itens criados por POST e removidos em seguida, mantendo o tamanho da base
+        novos = iter([{**conhecimentos[0], "conhecimento_id": str(uuid4())} for _ in range(chamadas)])
+        criados: List[str] = []
+
+        def criar():
+            item = next(novos)
+            requisitar(cliente, "POST", f"/api/base_de_conhecimento/{item['conhecimento_id']}", 201, json=item)
+            criados.append(item["conhecimento_id"])
+
+        self.registrar("escrita", "POST item", quantidade, criar)
+        alvo = conhecimentos[len(conhecimentos) // 2]["conhecimento_id"]
+        self.registrar("escrita", "PATCH item", quantidade,
+                       lambda: requisitar(cliente, "PATCH", f"/api/base_de_conhecimento/{alvo}",
+                                          json={"traducao": f"tradução {uuid4()}"}))
+        removidos = iter(criados)
+        self.registrar("escrita", "DELETE item", quantidade,
+                       lambda: requisitar(cliente, "DELETE", f"/api/base_de_conhecimento/{next(removidos)}", 204))
+
+        exercicios = iter(gerar_exercicios(chamadas, semente=quantidade + 1))
+        self.registrar("escrita", "POST historico (1 exercício)", quantidade,
+                       lambda: requisitar(cliente, "POST", "/api/historico_de_pratica", 201, json=next(exercicios)))
+        self.registrar("escrita", "PUT prompts", quantidade,
+                       lambda: requisitar(cliente, "PUT", "/api/prompts", json=dados[servidor.ARQUIVO_PROMPTS]))
+        self.registrar("escrita", "PUT frases_do_dialogo", quantidade,
+                       lambda: requisitar(cliente, "PUT", "/api/frases_do_dialogo", json=dados[servidor.ARQUIVO_FRASES]))
+
+
+def executar(suite: Suite, quantidade: int, armazenamento: str = "json") -> None:
+    """Executa os grupos selecionados com os dados sintéticos de uma escala."""
+    pasta_original = servidor.PUBLIC_DIR
+    armazenamento_original = servidor.armazenamento
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        dados = preparar_pasta(pasta, quantidade)
+        tamanho = sum(f.stat().st_size for f in pasta.iterdir())
+        print(f"\n{quantidade} registros por dataset ({tamanho / 1e6:.1f} MB, armazenamento {armazenamento})")
+
+        servidor.PUBLIC_DIR = pasta
+        servidor.cache_datasets.limpar()
+        try:
+            if armazenamento == "sqlite":
+                banco = pasta / "bench.sqlite3"
+                importar_arquivos(banco, pasta)
+                servidor.armazenamento = ArmazenamentoSQLite(banco)
+            suite.carga(pasta, quantidade)
+            suite.validacao(pasta, quantidade, dados)
+            with TestClient(servidor.app) as cliente:
+                suite.serializacao(cliente, quantidade)
+                suite.escrita(cliente, quantidade, dados)
+        finally:
+            servidor.PUBLIC_DIR = pasta_original
+            servidor.armazenamento = armazenamento_original
+            servidor.cache_datasets.limpar()
+
+
+def comparar(resultados: List[Dict[str, Any]], caminho: Path, limite: float) -> bool:
+    """Compara as medianas com uma execução anterior. Retorna True se houver regressão."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        anteriores = {b["fullname"]: b["stats"]["median"] for b in json.load(f)["benchmarks"]}
+
+    print(f"\nComparação com {caminho} (mediana, ms; regressão acima de +{limite:.0f}%)")
+    regressao = False
+    for resultado in resultados:
+        anterior = anteriores.get(resultado["fullname"])
+        if not anterior:
+            continue
+        atual = resultado["stats"]["median"]
+        variacao = (atual / anterior - 1) * 100
+        marca = ""
+        if variacao > limite:
+            marca = "  <- regressão"
+            regressao = True
+        print(f"{resultado['fullname']:<60} {anterior * 1000:>10.3f} -> {atual * 1000:>10.3f}  {variacao:+7.1f}%{marca}")
+    return regressao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos do backend.")
+    parser.add_argument("--escalas", nargs="+", type=interpretar_escala,
+                        default=[interpretar_escala(e) for e in ESCALAS_PADRAO],
+                        help="Registros por dataset, ex.: 1k 100k 1m (padrão: 1k 100k)")
+    parser.add_argument("--grupos", nargs="+", choices=GRUPOS, default=list(GRUPOS))
+    parser.add_argument("--armazenamento", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--json", type=Path, help="Grava os resultados no formato do pytest-benchmark")
+    parser.add_argument("--comparar", type=Path, help="Resultados anteriores gravados com --json")
+    parser.add_argument("--limite", type=float, default=LIMITE_REGRESSAO,
+                        help=f"Variação da mediana considerada regressão, em %% (padrão: {LIMITE_REGRESSAO:.0f})")
+    args = parser.parse_args()
+
+    suite = Suite(args.grupos)
+    for quantidade in args.escalas:
+        executar(suite, quantidade, args.armazenamento)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                "machine_info": {"python": platform.python_version(), "plataforma": platform.platform()},
+                "datetime": datetime.now(timezone.utc).isoformat(),
+                "armazenamento": args.armazenamento,
+                "benchmarks": suite.resultados,
+            }, f, ensure_ascii=False, indent=2)
+
+    if args.comparar and comparar(suite.resultados, args.comparar, args.limite):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
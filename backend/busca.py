@@ -0,0 +1,284 @@
+"""
+Índice de busca textual da base de conhecimento.
+
+Os campos texto_original, traducao e divisao_silabica são normalizados (sem
+acentos e sem distinção de maiúsculas, de modo que "Madchen" encontra "Mädchen")
+e divididos em palavras. Cada palavra distinta guarda os registros em que ocorre,
+já na ordem de relevância, e entra em um índice de trigramas do vocabulário: uma
+consulta encontra primeiro as palavras que contêm cada termo e só então percorre
+os registros dessas palavras, sem comparar texto registro a registro.
+"""
+import heapq
+from bisect import bisect_left, insort
+import re
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+from models import ConhecimentoIdioma, Idioma, TipoConhecimento
+
+
+# Campos indexados e o peso de cada um na relevância
+CAMPOS = (("texto_original", 3), ("traducao", 2), ("divisao_silabica", 1))
+# Pontos por termo conforme o tipo de ocorrência na palavra
+PONTOS_PALAVRA = 3
+PONTOS_PREFIXO = 2
+PONTOS_TRECHO = 1
+
+_PALAVRA = re.compile(r"\w+")
+
+# Ocorrência de uma palavra: (−peso do campo, tamanho do texto_original normalizado, posição)
+Ocorrencia = Tuple[int, int, int]
+
+
+def normalizar(texto: str) -> str:
+    """Remove acentos e diferenças de maiúsculas (ß vira ss)."""
+    decomposto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def palavras(texto: str) -> List[str]:
+    """Palavras do texto já normalizado."""
+    return _PALAVRA.findall(texto)
+
+
+def trigramas(palavra: str) -> Set[str]:
+    """Trigramas da palavra com dois espaços antes e um depois, para buscar prefixos curtos."""
+    completa = f"  {palavra} "
+    return {completa[i:i + 3] for i in range(len(completa) - 2)}
+
+
+def trigramas_termo(termo: str) -> Set[str]:
+    """Trigramas que toda palavra contendo o termo possui (termos curtos: como prefixo)."""
+    if len(termo) >= 3:
+        return {termo[i:i + 3] for i in range(len(termo) - 2)}
+    return {(" " * (3 - len(termo))) + termo}
+
+
+class IndiceBusca:
+    """
+    Índice de busca textual da base de conhecimento.
+
+    Assim como IndiceConhecimento, o índice guardado no cache não é alterado:
+    escritas usam copiar(), que compartilha as listas de ocorrências e de
+    trigramas com o original e só duplica as que forem modificadas.
+    """
+
+    def __init__(self, conhecimentos: Iterable[ConhecimentoIdioma] = ()):
+        # Posição → (conhecimento, tamanho do texto_original normalizado); a posição desempata a relevância
+        self._itens: Dict[int, Tuple[ConhecimentoIdioma, int]] = {}
+        self._posicoes: Dict[UUID, int] = {}
+        # Palavras de cada registro com o maior peso de campo em que aparecem
+        self._palavras: Dict[int, Dict[str, int]] = {}
+        # Palavra → ocorrências ordenadas; trigrama → palavras do vocabulário
+        self._ocorrencias: Dict[str, List[Ocorrencia]] = {}
+        self._trigramas: Dict[str, Set[str]] = {}
+        # Listas já copiadas por esta cópia (None: todas pertencem ao índice)
+        self._proprias: Optional[Set[Tuple[bool, str]]] = None
+        self._proxima = 0
+
+        # Carga inicial: acrescenta as ocorrências e ordena cada lista uma única vez
+        for conhecimento in conhecimentos:
+            self.salvar(conhecimento, ordenar=False)
+        for lista in self._ocorrencias.values():
+            lista.sort()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def copiar(self) -> "IndiceBusca":
+        """Cópia independente, compartilhando as listas até serem alteradas."""
+        copia = IndiceBusca()
+        copia._itens = dict(self._itens)
+        copia._posicoes = dict(self._posicoes)
+        copia._palavras = dict(self._palavras)
+        copia._ocorrencias = dict(self._ocorrencias)
+        copia._trigramas = dict(self._trigramas)
+        copia._proprias = set()
+        copia._proxima = self._proxima
+        return copia
+
+    def _propria(self, colecao: dict, chave: str, vazia: type):
+        """Lista de `colecao` pronta para alteração (copiada se compartilhada)."""
+        lista = colecao.get(chave)
+        if lista is None:
+            lista = colecao[chave] = vazia()
+        elif self._proprias is not None and (colecao is self._trigramas, chave) not in self._proprias:
+            lista = colecao[chave] = vazia(lista)
+        if self._proprias is not None:
+            self._proprias.add((colecao is self._trigramas, chave))
+        return lista
+
+    def salvar(self, conhecimento: ConhecimentoIdioma, ordenar: bool = True) -> None:
+        """
+        Indexa um registro novo ou reindexa um existente, mantendo sua posição.
+
+        Com ordenar=False as ocorrências são apenas acrescentadas; o construtor
+        usa isso e ordena cada lista uma vez ao final da carga.
+        """
+        posicao = self._posicoes.get(conhecimento.conhecimento_id)
+        if posicao is None:
+            posicao = self._proxima
+            self._proxima += 1
+            self._posicoes[conhecimento.conhecimento_id] = posicao
+        else:
+            self._desindexar(posicao)
+
+        pesos: Dict[str, int] = {}
+        for campo, peso in CAMPOS:
+            for palavra in palavras(normalizar(getattr(conhecimento, campo) or "")):
+                if peso > pesos.get(palavra, 0):
+                    pesos[palavra] = peso
+        tamanho = len(normalizar(conhecimento.texto_original))
+        self._itens[posicao] = (conhecimento, tamanho)
+        self._palavras[posicao] = pesos
+
+        for palavra, peso in pesos.items():
+            if palavra not in self._ocorrencias:
+                for trigrama in trigramas(palavra):
+                    self._propria(self._trigramas, trigrama, set).add(palavra)
+            ocorrencias = self._propria(self._ocorrencias, palavra, list)
+            if ordenar:
+                insort(ocorrencias, (-peso, tamanho, posicao))
+            else:
+                ocorrencias.append((-peso, tamanho, posicao))
+
+    def remover(self, conhecimento_id: UUID) -> None:
+        """Remove o registro do índice."""
+        posicao = self._posicoes.pop(conhecimento_id)
+        self._desindexar(posicao)
+        del self._itens[posicao]
+
+    def _desindexar(self, posicao: int) -> None:
+        tamanho = self._itens[posicao][1]
+        for palavra, peso in self._palavras.pop(posicao).items():
+            ocorrencias = self._propria(self._ocorrencias, palavra, list)
+            del ocorrencias[bisect_left(ocorrencias, (-peso, tamanho, posicao))]
+            if ocorrencias:
+                continue
+            # Palavra saiu do vocabulário
+            del self._ocorrencias[palavra]
+            for trigrama in trigramas(palavra):
+                lista = self._propria(self._trigramas, trigrama, set)
+                lista.discard(palavra)
+                if not lista:
+                    del self._trigramas[trigrama]
+
+    def _vocabulario(self, termo: str) -> List[Tuple[str, int]]:
+        """Palavras que casam com o termo e os pontos de cada uma (palavra, prefixo ou trecho)."""
+        listas = [self._trigramas.get(trigrama, set()) for trigrama in trigramas_termo(termo)]
+        listas.sort(key=len)
+        encontradas = []
+        for palavra in listas[0].intersection(*listas[1:]):
+            if palavra == termo:
+                encontradas.append((palavra, PONTOS_PALAVRA))
+            elif palavra.startswith(termo):
+                encontradas.append((palavra, PONTOS_PREFIXO))
+            elif len(termo) >= 3 and termo in palavra:
+                encontradas.append((palavra, PONTOS_TRECHO))
+        return encontradas
+
+    def _classificados_termo(self, encontradas: List[Tuple[str, int]]) -> Iterator[Tuple[int, int, int]]:
+        """
+        (−pontos, tamanho, posição) dos registros de um termo, do mais ao menos relevante.
+
+        Intercala as listas já ordenadas das palavras encontradas; um registro com
+        várias delas aparece só na primeira (a de maior pontuação).
+        """
+        listas = [(self._ocorrencias[palavra], pontos) for palavra, pontos in encontradas]
+        # (chave da próxima ocorrência, lista, índice nela)
+        fronteira = [
+            (pontos * ocorrencias[0][0], ocorrencias[0][1], ocorrencias[0][2], numero, 0)
+            for numero, (ocorrencias, pontos) in enumerate(listas)
+        ]
+        heapq.heapify(fronteira)
+        vistos: Set[int] = set()
+        while fronteira:
+            pontos_peso, tamanho, posicao, numero, indice = fronteira[0]
+            ocorrencias, pontos = listas[numero]
+            if indice + 1 < len(ocorrencias):
+                peso, proximo_tamanho, proxima_posicao = ocorrencias[indice + 1]
+                heapq.heapreplace(fronteira, (pontos * peso, proximo_tamanho, proxima_posicao, numero, indice + 1))
+            else:
+                heapq.heappop(fronteira)
+            if posicao not in vistos:
+                vistos.add(posicao)
+                yield (pontos_peso, tamanho, posicao)
+
+    def _pontos_registro(self, termo: str, posicao: int) -> int:
+        """Pontos do termo no registro (0 se não ocorrer), a partir das palavras do registro."""
+        melhor = 0
+        for palavra, peso in self._palavras[posicao].items():
+            if palavra == termo:
+                pontos = PONTOS_PALAVRA
+            elif palavra.startswith(termo):
+                pontos = PONTOS_PREFIXO
+            elif len(termo) >= 3 and termo in palavra:
+                pontos = PONTOS_TRECHO
+            else:
+                continue
+            melhor = max(melhor, pontos * peso)
+        return melhor
+
+    def buscar(
+        self,
+        consulta: str,
+        limite: int,
+        idioma: Optional[Idioma] = None,
+        tipo_conhecimento: Optional[TipoConhecimento] = None
+    ) -> List[ConhecimentoIdioma]:
+        """
+        Conhecimentos que contêm todos os termos da consulta, do mais ao menos relevante.
+
+        Cada termo vale mais como palavra inteira, depois como início de palavra e por
+        fim como trecho (termos com menos de 3 letras só casam com o início), com peso
+        maior em texto_original, depois traducao e divisao_silabica. Empates favorecem
+        textos mais curtos e a ordem da base.
+
+        As ocorrências do termo mais raro são percorridas em ordem de relevância e a
+        busca para quando nenhum registro restante pode entrar entre os `limite` melhores.
+        """
+        termos = set(palavras(normalizar(consulta)))
+        if not termos:
+            return []
+
+        # O termo com menos ocorrências conduz a busca; os demais são conferidos nos candidatos
+        vocabularios = {termo: self._vocabulario(termo) for termo in termos}
+        principal = min(
+            termos,
+            key=lambda termo: sum(len(self._ocorrencias[palavra]) for palavra, _ in vocabularios[termo])
+        ) if len(termos) > 1 else next(iter(termos))
+        outros = [termo for termo in termos if termo != principal]
+        bonus = len(outros) * PONTOS_PALAVRA * max(peso for _, peso in CAMPOS)
+
+        # Os `limite` melhores até aqui, com o pior na raiz: (pontos, −tamanho, −posição)
+        melhores: List[Tuple[int, int, int]] = []
+        for chave in self._classificados_termo(vocabularios[principal]):
+            # Nenhum candidato seguinte pode superar o pior dos guardados
+            if len(melhores) == limite and (chave[0] - bonus, chave[1], chave[2]) > self._chave(melhores[0]):
+                break
+            conhecimento = self._itens[chave[2]][0]
+            if idioma is not None and conhecimento.idioma != idioma:
+                continue
+            if tipo_conhecimento is not None and conhecimento.tipo_conhecimento != tipo_conhecimento:
+                continue
+
+            total = -chave[0]
+            for termo in outros:
+                pontos = self._pontos_registro(termo, chave[2])
+                if not pontos:
+                    break
+                total += pontos
+            else:
+                item = (total, -chave[1], -chave[2])
+                if len(melhores) < limite:
+                    heapq.heappush(melhores, item)
+                elif item > melhores[0]:
+                    heapq.heapreplace(melhores, item)
+
+        return [self._itens[chave[2]][0] for chave in sorted(map(self._chave, melhores))]
+
+    @staticmethod
+    def _chave(item: Tuple[int, int, int]) -> Tuple[int, int, int]:
+        """Converte (pontos, −tamanho, −posição) em (−pontos, tamanho, posição)."""
+        return (-item[0], -item[1], -item[2])
@@ -0,0 +1,220 @@
+"""
+Cache em memória dos datasets carregados e validados pelo servidor.
+Cada entrada é associada à assinatura dos arquivos de origem (mtime, tamanho e inode),
+de modo que leituras repetidas custam apenas uma chamada a os.stat por arquivo.
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+
+Assinatura = Optional[Tuple[int, int, int]]
+
+
+def assinatura_arquivo(caminho: Path) -> Assinatura:
+    """Retorna (mtime_ns, tamanho, inode) do arquivo ou None se ele não existir."""
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+
+def hash_arquivos(caminhos: Iterable[Path]):
+    """Retorna o hash incremental (blake2b) do conteúdo concatenado dos arquivos existentes."""
+    resumo = hashlib.blake2b(digest_size=16)
+    for caminho in caminhos:
+        try:
+            with open(caminho, 'rb') as f:
+                for bloco in iter(lambda: f.read(1 << 20), b''):
+                    resumo.update(bloco)
+        except FileNotFoundError:
+            pass
+    return resumo
+
+
+def hash_conteudo(conteudo: bytes):
+    """Hash dos bytes de um arquivo, igual ao que hash_arquivos calcularia lendo-o."""
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update(conteudo)
+    return resumo
+
+
+class EntradaCache:
+    """
+    Objeto validado e as assinaturas dos arquivos a partir dos quais foi construído.
+
+    Também guarda a versão (hash do conteúdo), usada como ETag, o mtime mais
+    recente dos arquivos, usado como Last-Modified, e estruturas derivadas do
+    objeto (índices), que vivem e morrem com a entrada.
+    """
+
+    def __init__(self, assinaturas: Tuple[Assinatura, ...], objeto: Any, resumo):
+        self.assinaturas = assinaturas
+        self.objeto = objeto
+        self.versao = resumo.hexdigest()
+        self._resumo = resumo
+        self._derivados: Dict[str, Any] = {}
+        self._trava = threading.Lock()
+
+    def derivado(self, nome: str, construir: Callable[[Any], Any]) -> Any:
+        """Retorna a estrutura derivada `nome`, construindo-a uma única vez."""
+        valor = self._derivados.get(nome)
+        if valor is None:
+            with self._trava:
+                valor = self._derivados.get(nome)
+                if valor is None:
+                    valor = construir(self.objeto)
+                    self._derivados[nome] = valor
+        return valor
+
+    @property
+    def etag(self) -> str:
+        """ETag forte derivado do hash do conteúdo."""
+        return f'"{self.versao}"'
+
+    @property
+    def ultima_modificacao(self) -> Optional[float]:
+        """mtime mais recente dos arquivos em segundos, ou None se nenhum existir."""
+        mtimes = [a[0] for a in self.assinaturas if a is not None]
+        if not mtimes:
+            return None
+        return max(mtimes) / 1e9
+
+
+class CacheDatasets:
+    """
+    Cache de processo para os datasets da pasta /public.
+
+    O objeto armazenado só é reutilizado enquanto a assinatura dos arquivos não mudar.
+    Escritas feitas pelo próprio servidor devem chamar armazenar() (ou invalidar())
+    e, para acréscimos ao final de um arquivo, anexar().
+    """
+
+    def __init__(self):
+        self._entradas: Dict[str, EntradaCache] = {}
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def assinaturas(caminho: Path, dependencias: Sequence[Path] = ()) -> Tuple[Assinatura, ...]:
+        """Assinaturas do arquivo principal seguido das dependências."""
+        return tuple(assinatura_arquivo(c) for c in (caminho, *dependencias))
+
+    def obter_entrada(
+        self,
+        caminho: Path,
+        carregar: Callable[[], Any],
+        dependencias: Sequence[Path] = ()
+    ) -> EntradaCache:
+        """
+        Retorna a entrada em cache para o arquivo ou a reconstrói com carregar().
+
+        Args:
+            dependencias: Arquivos adicionais lidos por carregar(); qualquer
+                alteração neles também invalida a entrada.
+
+        Exceções levantadas por carregar() são propagadas e nada é armazenado.
+        """
+        chave = str(caminho)
+        assinaturas = self.assinaturas(caminho, dependencias)
+
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada.assinaturas == assinaturas:
+                self.acertos += 1
+                return entrada
+            self.falhas += 1
+
+        resumo = hash_arquivos((caminho, *dependencias))
+        objeto = carregar()
+        entrada = EntradaCache(assinaturas, objeto, resumo)
+
+        # Só armazena se os arquivos não mudaram durante a leitura
+        if self.assinaturas(caminho, dependencias) == assinaturas:
+            with self._trava:
+                self._entradas[chave] = entrada
+        return entrada
+
+    def anexar(
+        self,
+        caminho: Path,
+        dependencias: Sequence[Path],
+        assinaturas_anteriores: Tuple[Assinatura, ...],
+        bytes_anexados: bytes,
+        combinar: Callable[[Any], Any],
+        itens: Sequence[Any]
+    ) -> None:
+        """
+        Atualiza a entrada após bytes serem acrescentados ao último arquivo.
+
+        O novo objeto é obtido com combinar(objeto_atual), o hash continua a partir
+        do estado anterior (mesmo resultado de reler os arquivos) e as estruturas
+        derivadas que implementam adicionar() recebem os itens novos; as demais
+        são descartadas. Se a entrada não corresponder ao estado anterior à
+        escrita, ela é apenas invalidada.
+        """
+        chave = str(caminho)
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada.assinaturas != assinaturas_anteriores:
+                self._entradas.pop(chave, None)
+                return
+
+            resumo = entrada._resumo.copy()
+            resumo.update(bytes_anexados)
+            nova = EntradaCache(self.assinaturas(caminho, dependencias), combinar(entrada.objeto), resumo)
+            for nome, derivado in entrada._derivados.items():
+                if hasattr(derivado, "adicionar"):
+                    derivado.adicionar(itens)
+                    nova._derivados[nome] = derivado
+            self._entradas[chave] = nova
+
+    def armazenar(
+        self,
+        caminho: Path,
+        objeto: Any,
+        conteudo: bytes,
+        derivados: Optional[Dict[str, Any]] = None
+    ) -> EntradaCache:
+        """
+        Registra um objeto já validado que acabou de ser gravado pelo servidor.
+
+        Evita que a leitura seguinte precise decodificar e validar o arquivo de novo.
+        O hash é calculado a partir de `conteudo` (os bytes gravados) e o arquivo
+        só recebe um os.stat.
+        """
+        entrada = EntradaCache(self.assinaturas(caminho), objeto, hash_conteudo(conteudo))
+        entrada._derivados.update(derivados or {})
+        with self._trava:
+            self._entradas[str(caminho)] = entrada
+        return entrada
+
+    def entrada_atual(self, caminho: Path) -> Optional[EntradaCache]:
+        """Entrada guardada para o arquivo, sem conferir a assinatura nem carregar (ex.: métricas)."""
+        with self._trava:
+            return self._entradas.get(str(caminho))
+
+    def invalidar(self, caminho: Path) -> None:
+        """Descarta a entrada associada ao arquivo."""
+        with self._trava:
+            self._entradas.pop(str(caminho), None)
+
+    def limpar(self) -> None:
+        """Descarta todas as entradas e zera os contadores."""
+        with self._trava:
+            self._entradas.clear()
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna os contadores de acertos e falhas do cache."""
+        with self._trava:
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "entradas": len(self._entradas),
+            }
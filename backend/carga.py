@@ -0,0 +1,135 @@
+"""
+Leitura e validação dos arquivos [BASE] da pasta /public.
+
+Usado pelo servidor (ArmazenamentoJSON e demais datasets) e pela importação para o
+banco SQLite, que não deve depender da aplicação FastAPI.
+"""
+import json
+from pathlib import Path
+from typing import List
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from metricas import medir
+from models import ADAPTADOR_EXERCICIO, ConhecimentoIdioma, ExercicioPraticaBase, HistoricoPratica
+
+
+# PUBLIC_DIR deve apontar para a pasta public na raiz do projeto
+PUBLIC_DIR = Path(__file__).parent.parent / "public"
+
+# Arquivos de dados dentro de PUBLIC_DIR
+ARQUIVO_CONHECIMENTO = "[BASE] Conhecimento de idiomas.json"
+ARQUIVO_PROMPTS = "[BASE] Prompts.json"
+ARQUIVO_HISTORICO = "[BASE] Histórico de Prática.json"
+# Segmento append-only (JSON Lines) com os exercícios registrados via POST
+ARQUIVO_HISTORICO_SEGMENTO = "[BASE] Histórico de Prática.jsonl"
+ARQUIVO_FRASES = "[BASE] Frases do Diálogo.json"
+
+
+def carregar_json(caminho: Path):
+    """Carrega e retorna dados de um arquivo JSON."""
+    try:
+        with medir("leitura"), open(caminho, 'r', encoding='utf-8') as f:
+            texto = f.read()
+        with medir("decodificacao"):
+            return json.loads(texto)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Arquivo não encontrado: {caminho}"
+        )
+    except json.JSONDecodeError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao decodificar JSON: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao ler arquivo: {str(e)}"
+        )
+
+
+def carregar_base_de_conhecimento(caminho: Path) -> List[ConhecimentoIdioma]:
+    """Lê e valida o arquivo da base de conhecimento."""
+    dados = carregar_json(caminho)
+    
+    # Validar que não está vazio
+    if not dados or len(dados) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Base de conhecimento não pode estar vazia"
+        )
+    
+    # Validar cada item contra o modelo Pydantic
+    try:
+        with medir("validacao"):
+            conhecimentos = [ConhecimentoIdioma(**item) for item in dados]
+        return conhecimentos
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Erro de validação: {e.errors()}"
+        )
+
+
+def carregar_segmento_historico(caminho: Path) -> List[ExercicioPraticaBase]:
+    """Lê e valida o segmento JSON Lines do histórico, uma linha por exercício."""
+    if not caminho.exists():
+        return []
+    
+    exercicios = []
+    try:
+        # Cada linha é decodificada e validada de uma vez pelo adaptador
+        with medir("validacao"), open(caminho, 'r', encoding='utf-8') as f:
+            for numero, linha in enumerate(f, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    exercicios.append(ADAPTADOR_EXERCICIO.validate_json(linha))
+                except ValidationError as e:
+                    raise HTTPException(
+                        status_code=422,
+                        detail=f"Erro de validação na linha {numero} de {caminho.name}: {e.errors()}"
+                    )
+    except OSError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao ler arquivo: {str(e)}"
+        )
+    return exercicios
+
+
+def carregar_historico_de_pratica(caminho: Path, caminho_segmento: Path) -> HistoricoPratica:
+    """
+    Lê e valida o histórico de prática (opcional).
+    O resultado combina o arquivo base com os exercícios do segmento append-only.
+    """
+    anexados = carregar_segmento_historico(caminho_segmento)
+    
+    # Se não existir, retornar apenas os exercícios anexados (ou histórico vazio)
+    if not caminho.exists():
+        return HistoricoPratica.model_construct(exercicios=anexados)
+    
+    dados = carregar_json(caminho)
+    
+    # Validar que não está vazio (se existir, não pode estar vazio)
+    if not dados:
+        raise HTTPException(
+            status_code=400,
+            detail="Histórico de prática existe mas está vazio"
+        )
+    
+    # Validar contra o modelo Pydantic
+    try:
+        with medir("validacao"):
+            historico = HistoricoPratica(**dados)
+        if anexados:
+            historico = HistoricoPratica.model_construct(exercicios=historico.exercicios + anexados)
+        return historico
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Erro de validação: {e.errors()}"
+        )
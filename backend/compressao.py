@@ -0,0 +1,64 @@
+"""
+Compressão das respostas JSON dos datasets.
+
+As respostas completas de cada versão de um dataset são comprimidas uma única vez
+e guardadas como derivados da entrada do cache, ao lado do JSON; a negociação com
+Accept-Encoding só escolhe qual dos corpos prontos enviar. Brotli é usado se o
+pacote `brotli` estiver instalado; gzip está sempre disponível.
+"""
+import gzip
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+
+# Em ordem de preferência quando o cliente aceita mais de uma com o mesmo peso
+CODIFICACOES = ("br", "gzip") if brotli is not None else ("gzip",)
+# Corpos menores que isto são enviados sem compressão
+TAMANHO_MINIMO_COMPRESSAO = 1024
+NIVEL_GZIP = 6
+QUALIDADE_BROTLI = 5
+
+
+def comprimir(corpo: bytes, codificacao: str) -> bytes:
+    """Comprime o corpo (gzip sem data no cabeçalho, para bytes estáveis por versão)."""
+    if codificacao == "gzip":
+        return gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0)
+    if codificacao == "br" and brotli is not None:
+        return brotli.compress(corpo, quality=QUALIDADE_BROTLI)
+    raise ValueError(f"Codificação não suportada: {codificacao}")
+
+
+def escolher_codificacao(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Codificação disponível de maior peso (q) no cabeçalho Accept-Encoding.
+
+    Returns:
+        "br" ou "gzip", ou None para enviar o corpo sem compressão.
+    """
+    if not accept_encoding:
+        return None
+    pesos: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        nome, _, parametros = item.partition(";")
+        nome = nome.strip().lower()
+        peso = 1.0
+        for parametro in parametros.split(";"):
+            chave, _, valor = parametro.partition("=")
+            if chave.strip().lower() == "q":
+                try:
+                    peso = float(valor)
+                except ValueError:
+                    peso = 0.0
+        if nome:
+            pesos[nome] = peso
+
+    melhor, melhor_peso = None, 0.0
+    for codificacao in CODIFICACOES:
+        peso = pesos.get(codificacao, pesos.get("*", 0.0))
+        if peso > melhor_peso:
+            melhor, melhor_peso = codificacao, peso
+    return melhor
@@ -0,0 +1,83 @@
+"""
+Primitivas de concorrência usadas pelos endpoints de escrita e pelos índices.
+
+Cada dataset tem um escritor próprio: as escritas de um mesmo dataset são executadas
+uma de cada vez, em uma thread dedicada, e o handler assíncrono apenas aguarda o
+resultado no event loop. Leituras não passam pelo escritor e continuam sendo servidas
+a partir da versão em cache enquanto uma escrita lenta (fsync) está em andamento.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from perfilador import perfilar
+
+
+class EscritorDataset:
+    """
+    Fila de escritas de um dataset, executadas em ordem por uma única thread.
+
+    Escritas que aguardam a vez não ocupam threads do pool usado pelos GETs nem
+    bloqueiam o event loop.
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"escrita-{nome}")
+
+    async def executar(self, funcao: Callable[..., Any], *args: Any) -> Any:
+        """
+        Enfileira funcao(*args) e aguarda o resultado (exceções são propagadas).
+
+        A função roda com as variáveis de contexto de quem a enfileirou (ex.: a
+        rota usada nas métricas) e é perfilada se a requisição estiver sendo.
+        """
+        contexto = contextvars.copy_context()
+        return await asyncio.wrap_future(self._executor.submit(contexto.run, perfilar(funcao), *args))
+
+
+class TravaLeituraEscrita:
+    """
+    Trava com vários leitores simultâneos ou um único escritor.
+
+    Um escritor aguardando tem preferência sobre novos leitores, para que
+    consultas contínuas não impeçam a escrita indefinidamente.
+    """
+
+    def __init__(self):
+        self._condicao = threading.Condition()
+        self._leitores = 0
+        self._escritor = False
+        self._escritores_aguardando = 0
+
+    @contextmanager
+    def leitura(self) -> Iterator[None]:
+        with self._condicao:
+            while self._escritor or self._escritores_aguardando:
+                self._condicao.wait()
+            self._leitores += 1
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._leitores -= 1
+                if self._leitores == 0:
+                    self._condicao.notify_all()
+
+    @contextmanager
+    def escrita(self) -> Iterator[None]:
+        with self._condicao:
+            self._escritores_aguardando += 1
+            while self._escritor or self._leitores:
+                self._condicao.wait()
+            self._escritores_aguardando -= 1
+            self._escritor = True
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._escritor = False
+                self._condicao.notify_all()
@@ -0,0 +1,123 @@
+"""
+Estatísticas agregadas do histórico de prática.
+
+Os exercícios são contados em células (idioma, tipo_pratica, dia); os totais por
+idioma, por tipo de prática e por dia são somas dessas células, de modo que a
+resposta custa proporcionalmente ao número de dias com prática, e não ao tamanho
+do histórico. Novos exercícios apenas incrementam as células correspondentes.
+"""
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from concorrencia import TravaLeituraEscrita
+from models import (
+    ContagemPratica,
+    EstatisticasPratica,
+    ExercicioPraticaBase,
+    Idioma,
+    ResultadoCorrecao,
+    TipoPratica
+)
+
+
+Celula = Tuple[Idioma, TipoPratica, date]
+
+
+def acertou(exercicio: ExercicioPraticaBase) -> bool:
+    """
+    Indica se o exercício conta como acerto, com a mesma regra da tela do histórico:
+    todos os campos corretos na tradução, "Sim" na pronúncia e no diálogo.
+    """
+    resultado = exercicio.resultado_exercicio
+    if exercicio.tipo_pratica == TipoPratica.TRADUCAO:
+        return all(resultado.campos_resultados)
+    if exercicio.tipo_pratica == TipoPratica.PRONUNCIA_DE_NUMEROS:
+        return resultado.acertou
+    if exercicio.tipo_pratica == TipoPratica.AUDICAO:
+        return resultado.correto
+    return resultado.correto == ResultadoCorrecao.SIM
+
+
+def dia_utc(data_hora: datetime) -> date:
+    """Dia (UTC) em que o exercício foi feito; data_hora sem fuso é tratada como UTC."""
+    if data_hora.tzinfo is not None:
+        data_hora = data_hora.astimezone(timezone.utc)
+    return data_hora.date()
+
+
+def contagem(total: int, acertos: int) -> ContagemPratica:
+    """Contagem com a taxa de acerto (0 quando não há exercícios)."""
+    return ContagemPratica(total=total, acertos=acertos, taxa_acerto=acertos / total if total else 0.0)
+
+
+class EstatisticasHistorico:
+    """
+    Contadores de exercícios e acertos por (idioma, tipo_pratica, dia).
+
+    Guardado junto à entrada do cache do histórico; implementa adicionar(), então
+    acompanha os exercícios anexados sem ser reconstruído.
+    """
+
+    def __init__(self, exercicios: Iterable[ExercicioPraticaBase] = ()):
+        self._celulas: Dict[Celula, List[int]] = {}
+        self._trava = TravaLeituraEscrita()
+        self.adicionar(exercicios)
+
+    def adicionar(self, exercicios: Iterable[ExercicioPraticaBase]) -> None:
+        """Contabiliza novos exercícios."""
+        with self._trava.escrita():
+            for exercicio in exercicios:
+                celula = (exercicio.idioma, exercicio.tipo_pratica, dia_utc(exercicio.data_hora))
+                self._somar(celula, 1, int(acertou(exercicio)))
+
+    def somar(self, idioma: Idioma, tipo_pratica: TipoPratica, dia: date, total: int, acertos: int) -> None:
+        """Acrescenta contagens já agregadas (ex.: lidas de um banco)."""
+        with self._trava.escrita():
+            self._somar((idioma, tipo_pratica, dia), total, acertos)
+
+    def celulas(self) -> List[Tuple[Idioma, TipoPratica, date, int, int]]:
+        """Contagens de cada célula: (idioma, tipo_pratica, dia, total, acertos)."""
+        with self._trava.leitura():
+            return [(*celula, total, acertos) for celula, (total, acertos) in self._celulas.items()]
+
+    def _somar(self, celula: Celula, total: int, acertos: int) -> None:
+        contadores = self._celulas.setdefault(celula, [0, 0])
+        contadores[0] += total
+        contadores[1] += acertos
+
+    def resumo(
+        self,
+        idioma: Optional[Idioma] = None,
+        tipo_pratica: Optional[TipoPratica] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> EstatisticasPratica:
+        """Totais e taxas de acerto dos exercícios que atendem aos filtros (datas inclusivas)."""
+        total = [0, 0]
+        por_idioma: Dict[Idioma, List[int]] = {}
+        por_tipo: Dict[TipoPratica, List[int]] = {}
+        por_dia: Dict[date, List[int]] = {}
+
+        with self._trava.leitura():
+            celulas = [(celula, tuple(contadores)) for celula, contadores in self._celulas.items()]
+
+        for (idioma_celula, tipo_celula, dia), (exercicios, acertos) in celulas:
+            if idioma is not None and idioma_celula != idioma:
+                continue
+            if tipo_pratica is not None and tipo_celula != tipo_pratica:
+                continue
+            if (data_inicio is not None and dia < data_inicio) or (data_fim is not None and dia > data_fim):
+                continue
+            for grupo, chave in ((por_idioma, idioma_celula), (por_tipo, tipo_celula), (por_dia, dia)):
+                contadores = grupo.setdefault(chave, [0, 0])
+                contadores[0] += exercicios
+                contadores[1] += acertos
+            total[0] += exercicios
+            total[1] += acertos
+
+        return EstatisticasPratica(
+            **contagem(*total).model_dump(),
+            por_idioma={chave: contagem(*valores) for chave, valores in sorted(por_idioma.items())},
+            por_tipo_pratica={chave: contagem(*valores) for chave, valores in sorted(por_tipo.items())},
+            por_dia={chave: contagem(*valores) for chave, valores in sorted(por_dia.items())}
+        )
@@ -0,0 +1,300 @@
+"""
+Notificações de alteração dos datasets, transmitidas por Server-Sent Events (/api/eventos).
+
+O CanalEventos recebe as alterações de qualquer thread (escritores dos datasets e
+observador de arquivos) e as entrega aos assinantes no event loop: cada assinante
+é só uma fila em memória e um asyncio.Event, então clientes ociosos não ocupam
+threads. Os últimos eventos ficam guardados para que um cliente que reconecta com
+Last-Event-ID receba o que perdeu.
+
+O ObservadorArquivos usa uma única thread para detectar alterações feitas nos
+arquivos de PUBLIC_DIR fora do servidor: com watchfiles (inotify, FSEvents,
+ReadDirectoryChangesW) se estiver instalado, ou com os.stat periódico dos arquivos
+observados caso contrário.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set
+
+from cache import assinatura_arquivo
+from models import EventoAlteracao
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - dependência opcional (vem com uvicorn[standard])
+    watchfiles = None
+
+
+# Eventos guardados para reenvio a clientes que reconectam com Last-Event-ID
+TAMANHO_HISTORICO = 256
+# Eventos pendentes por cliente; um cliente que não os consome é desconectado
+LIMITE_PENDENTES = 1024
+# Comentário enviado a clientes ociosos para manter a conexão aberta (segundos)
+INTERVALO_PING = 15.0
+# Espera sugerida ao EventSource antes de reconectar (milissegundos)
+RECONEXAO_MS = 2000
+# Intervalo entre verificações quando watchfiles não está instalado (segundos)
+INTERVALO_VERIFICACAO = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+def formatar_evento(evento: EventoAlteracao) -> bytes:
+    """Evento no formato text/event-stream."""
+    return f"id: {evento.id}\nevent: alteracao\ndata: {evento.model_dump_json()}\n\n".encode("utf-8")
+
+
+class Assinante:
+    """Cliente conectado ao stream; só é acessado pela thread do seu event loop."""
+
+    def __init__(self, laco: asyncio.AbstractEventLoop):
+        self.laco = laco
+        self.pendentes: Deque[EventoAlteracao] = deque()
+        self.sinal = asyncio.Event()
+        self.encerrado = False
+        # Eventos anteriores à conexão não estão mais disponíveis: o cliente deve recarregar tudo
+        self.lacuna = False
+
+    def entregar(self, evento: EventoAlteracao) -> None:
+        if self.encerrado:
+            return
+        if len(self.pendentes) >= LIMITE_PENDENTES:
+            # Cliente lento: encerra o stream; ao reconectar, recebe o que ainda estiver no histórico
+            self.pendentes.clear()
+            self.encerrar()
+            return
+        self.pendentes.append(evento)
+        self.sinal.set()
+
+    def encerrar(self) -> None:
+        self.encerrado = True
+        self.sinal.set()
+
+
+class CanalEventos:
+    """Distribui as alterações dos datasets aos assinantes do stream."""
+
+    def __init__(self, tamanho_historico: int = TAMANHO_HISTORICO, intervalo_ping: float = INTERVALO_PING):
+        self.intervalo_ping = intervalo_ping
+        self._historico: Deque[EventoAlteracao] = deque(maxlen=tamanho_historico)
+        self._proximo_id = 1
+        # Última versão publicada de cada dataset, para não repetir a mesma alteração
+        self._versoes: Dict[str, str] = {}
+        self._assinantes: Dict[asyncio.AbstractEventLoop, Set[Assinante]] = {}
+        self._trava = threading.Lock()
+
+    def publicar(
+        self,
+        dataset: str,
+        versao: str,
+        ids: Optional[List[str]] = None,
+        origem: str = "servidor"
+    ) -> Optional[EventoAlteracao]:
+        """
+        Registra a nova versão de um dataset e a envia a todos os assinantes.
+
+        Pode ser chamado de qualquer thread. Uma versão igual à última publicada
+        para o dataset é ignorada.
+
+        Returns:
+            O evento publicado, ou None se a versão já era conhecida.
+        """
+        with self._trava:
+            if self._versoes.get(dataset) == versao:
+                return None
+            self._versoes[dataset] = versao
+            evento = EventoAlteracao(
+                id=self._proximo_id,
+                dataset=dataset,
+                versao=versao,
+                ids=ids,
+                origem=origem,
+                data_hora=datetime.now(timezone.utc)
+            )
+            self._proximo_id += 1
+            self._historico.append(evento)
+            # Uma chamada por event loop, ainda sob a trava para manter a ordem dos ids
+            for laco in list(self._assinantes):
+                try:
+                    laco.call_soon_threadsafe(self._distribuir, laco, evento)
+                except RuntimeError:
+                    self._assinantes.pop(laco, None)
+        return evento
+
+    def _distribuir(self, laco: asyncio.AbstractEventLoop, evento: EventoAlteracao) -> None:
+        with self._trava:
+            assinantes = list(self._assinantes.get(laco, ()))
+        for assinante in assinantes:
+            assinante.entregar(evento)
+
+    def eventos(self, depois_de: int = 0) -> List[EventoAlteracao]:
+        """Eventos guardados com id maior que `depois_de`."""
+        with self._trava:
+            return [evento for evento in self._historico if evento.id > depois_de]
+
+    def assinar(self, ultimo_id: Optional[str] = None) -> Assinante:
+        """
+        Registra um assinante no event loop atual.
+
+        Args:
+            ultimo_id: Cabeçalho Last-Event-ID do cliente que reconecta; os eventos
+                posteriores a ele são reenviados. Se algum já saiu do histórico (ou
+                o id é de outra execução do servidor), o assinante é marcado com
+                `lacuna`.
+        """
+        assinante = Assinante(asyncio.get_running_loop())
+        with self._trava:
+            if ultimo_id is not None:
+                try:
+                    ultimo = int(ultimo_id)
+                except ValueError:
+                    ultimo = -1
+                primeiro = self._historico[0].id if self._historico else self._proximo_id
+                if not primeiro - 1 <= ultimo < self._proximo_id:
+                    assinante.lacuna = True
+                else:
+                    assinante.pendentes.extend(e for e in self._historico if e.id > ultimo)
+            self._assinantes.setdefault(assinante.laco, set()).add(assinante)
+        return assinante
+
+    def cancelar(self, assinante: Assinante) -> None:
+        with self._trava:
+            assinantes = self._assinantes.get(assinante.laco)
+            if assinantes is not None:
+                assinantes.discard(assinante)
+                if not assinantes:
+                    del self._assinantes[assinante.laco]
+
+    def quantidade_assinantes(self) -> int:
+        with self._trava:
+            return sum(len(assinantes) for assinantes in self._assinantes.values())
+
+    def encerrar(self) -> None:
+        """Encerra os streams abertos (desligamento do servidor)."""
+        with self._trava:
+            for laco, assinantes in self._assinantes.items():
+                for assinante in assinantes:
+                    try:
+                        laco.call_soon_threadsafe(assinante.encerrar)
+                    except RuntimeError:
+                        pass
+
+    async def transmitir(self, ultimo_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Corpo text/event-stream de um cliente, até ele desconectar ou o servidor encerrar."""
+        assinante = self.assinar(ultimo_id)
+        try:
+            yield f"retry: {RECONEXAO_MS}\n\n".encode("utf-8")
+            if assinante.lacuna:
+                yield b"event: reinicio\ndata: {}\n\n"
+            while True:
+                if assinante.pendentes:
+                    corpo = b"".join(formatar_evento(evento) for evento in assinante.pendentes)
+                    assinante.pendentes.clear()
+                    yield corpo
+                    continue
+                if assinante.encerrado:
+                    return
+                assinante.sinal.clear()
+                try:
+                    await asyncio.wait_for(assinante.sinal.wait(), self.intervalo_ping)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+        finally:
+            self.cancelar(assinante)
+
+
+class ObservadorArquivos:
+    """
+    Thread única que detecta alterações externas nos arquivos dos datasets.
+
+    Args:
+        verificar: Chamada com o nome do dataset cujos arquivos mudaram; decide
+            se a alteração é nova (e a publica) ou se foi o próprio servidor.
+        intervalo: Intervalo entre verificações sem watchfiles, em segundos.
+    """
+
+    def __init__(self, verificar: Callable[[str], None], intervalo: float = INTERVALO_VERIFICACAO):
+        self._verificar = verificar
+        self.intervalo = intervalo
+        self._arquivos: Dict[str, str] = {}
+        self._gravando: Dict[str, int] = {}
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self, diretorio: Path, arquivos: Dict[str, str], usar_watchfiles: bool = True) -> None:
+        """
+        Começa a observar `diretorio`.
+
+        Args:
+            arquivos: Nome do arquivo → dataset; os demais arquivos são ignorados.
+            usar_watchfiles: Se falso, usa a verificação periódica mesmo com watchfiles instalado.
+        """
+        self.parar()
+        self._arquivos = dict(arquivos)
+        self._parar.clear()
+        alvo = self._observar if watchfiles is not None and usar_watchfiles else self._verificar_periodicamente
+        self._thread = threading.Thread(target=alvo, args=(Path(diretorio),), name="observador-arquivos", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @contextmanager
+    def gravando(self, caminho: Path) -> Iterator[None]:
+        """Ignora alterações do arquivo enquanto o próprio servidor o grava."""
+        nome = Path(caminho).name
+        with self._trava:
+            self._gravando[nome] = self._gravando.get(nome, 0) + 1
+        try:
+            yield
+        finally:
+            with self._trava:
+                self._gravando[nome] -= 1
+                if not self._gravando[nome]:
+                    del self._gravando[nome]
+
+    def _notificar(self, nomes: Iterable[str]) -> None:
+        with self._trava:
+            datasets = {self._arquivos[nome] for nome in nomes if nome in self._arquivos and nome not in self._gravando}
+        for dataset in sorted(datasets):
+            try:
+                self._verificar(dataset)
+            except Exception:
+                logger.exception("Falha ao verificar alteração externa do dataset %s", dataset)
+
+    def _observar(self, diretorio: Path) -> None:
+        try:
+            for alteracoes in watchfiles.watch(
+                diretorio,
+                watch_filter=lambda _, caminho: Path(caminho).name in self._arquivos,
+                stop_event=self._parar,
+                recursive=False,
+                raise_interrupt=False
+            ):
+                self._notificar(Path(caminho).name for _, caminho in alteracoes)
+        except Exception:
+            if self._parar.is_set():
+                return
+            logger.exception("watchfiles falhou em %s; usando verificação periódica", diretorio)
+            self._verificar_periodicamente(diretorio)
+
+    def _verificar_periodicamente(self, diretorio: Path) -> None:
+        assinaturas = {nome: assinatura_arquivo(diretorio / nome) for nome in self._arquivos}
+        while not self._parar.wait(self.intervalo):
+            alterados = []
+            for nome, anterior in assinaturas.items():
+                atual = assinatura_arquivo(diretorio / nome)
+                if atual != anterior:
+                    assinaturas[nome] = atual
+                    alterados.append(nome)
+            if alterados:
+                self._notificar(alterados)
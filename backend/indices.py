@@ -0,0 +1,262 @@
+"""
+Índices em memória construídos sobre os datasets validados.
+São guardados junto à entrada do cache e reconstruídos quando o arquivo muda.
+"""
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from busca import IndiceBusca
+from concorrencia import TravaLeituraEscrita
+from models import ConhecimentoIdioma, ExercicioPraticaBase, Idioma, TipoPratica
+
+
+# (−microssegundos desde a época, exercicio_id, sequência de inserção)
+ChaveExercicio = Tuple[int, str, int]
+
+_EPOCA = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def microssegundos(data_hora: datetime) -> int:
+    """Converte data_hora em microssegundos desde a época (sem fuso = UTC)."""
+    if data_hora.tzinfo is None:
+        data_hora = data_hora.replace(tzinfo=timezone.utc)
+    delta = data_hora - _EPOCA
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class CursorInvalido(ValueError):
+    """Cursor de paginação malformado."""
+
+
+def codificar_cursor(chave: ChaveExercicio) -> str:
+    """Serializa a chave do último item entregue em um cursor opaco."""
+    texto = f"{chave[0]}|{chave[1]}|{chave[2]}"
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> ChaveExercicio:
+    """Recupera a chave a partir de um cursor gerado por codificar_cursor."""
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        texto = base64.urlsafe_b64decode(cursor + preenchimento).decode()
+        negativo, exercicio_id, sequencia = texto.split("|")
+        return (int(negativo), exercicio_id, int(sequencia))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise CursorInvalido(f"Cursor inválido: {cursor}") from e
+
+
+class IndiceHistorico:
+    """
+    Índice ordenado do histórico de prática, do mais recente para o mais antigo.
+
+    Mantém a lista global de chaves ordenadas e uma lista ordenada por valor de
+    idioma, tipo_pratica e conhecimento_id. Uma consulta percorre apenas a lista
+    mais seletiva a partir do cursor, sem varrer o histórico inteiro.
+
+    O índice é compartilhado entre as versões do cache quando exercícios são
+    anexados; consultas e inserções são protegidas por uma trava de leitura e
+    escrita, mantida apenas durante a atualização em memória.
+    """
+
+    CAMPOS = ("idioma", "tipo_pratica", "conhecimento_id")
+
+    def __init__(self, exercicios: Iterable[ExercicioPraticaBase] = ()):
+        self._chaves: List[ChaveExercicio] = []
+        self._exercicios: Dict[ChaveExercicio, ExercicioPraticaBase] = {}
+        self._listas: Dict[Tuple[str, object], List[ChaveExercicio]] = {}
+        self._ids: Set[UUID] = set()
+        self._sequencia = 0
+        self._trava = TravaLeituraEscrita()
+        self.adicionar(exercicios)
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+    def contem(self, exercicio_id: UUID) -> bool:
+        """Indica se já existe um exercício com o identificador informado."""
+        with self._trava.leitura():
+            return exercicio_id in self._ids
+
+    def adicionar(self, exercicios: Iterable[ExercicioPraticaBase]) -> None:
+        """Insere exercícios no índice mantendo todas as listas ordenadas."""
+        with self._trava.escrita():
+            self._adicionar(exercicios)
+
+    def _adicionar(self, exercicios: Iterable[ExercicioPraticaBase]) -> None:
+        novos = []
+        for exercicio in exercicios:
+            chave = (-microssegundos(exercicio.data_hora), str(exercicio.exercicio_id), self._sequencia)
+            self._sequencia += 1
+            self._exercicios[chave] = exercicio
+            self._ids.add(exercicio.exercicio_id)
+            novos.append((chave, exercicio))
+
+        # Carga inicial: ordenar uma vez é mais barato que inserir item a item
+        em_lote = len(novos) > len(self._chaves)
+        for chave, exercicio in novos:
+            for campo in self.CAMPOS:
+                lista = self._listas.setdefault((campo, getattr(exercicio, campo)), [])
+                if em_lote:
+                    lista.append(chave)
+                else:
+                    insort(lista, chave)
+            if em_lote:
+                self._chaves.append(chave)
+            else:
+                insort(self._chaves, chave)
+
+        if em_lote:
+            self._chaves.sort()
+            for lista in self._listas.values():
+                lista.sort()
+
+    def consultar(
+        self,
+        idioma: Optional[Idioma] = None,
+        tipo_pratica: Optional[TipoPratica] = None,
+        conhecimento_id: Optional[UUID] = None,
+        data_inicio: Optional[datetime] = None,
+        data_fim: Optional[datetime] = None,
+        limite: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[ExercicioPraticaBase], Optional[str]]:
+        """
+        Retorna os exercícios que atendem aos filtros, do mais recente ao mais antigo.
+
+        Returns:
+            (exercícios da página, cursor da próxima página ou None)
+
+        Raises:
+            CursorInvalido: Se o cursor não puder ser decodificado.
+        """
+        with self._trava.leitura():
+            return self._consultar(idioma, tipo_pratica, conhecimento_id, data_inicio, data_fim, limite, cursor)
+
+    def _consultar(
+        self,
+        idioma: Optional[Idioma],
+        tipo_pratica: Optional[TipoPratica],
+        conhecimento_id: Optional[UUID],
+        data_inicio: Optional[datetime],
+        data_fim: Optional[datetime],
+        limite: Optional[int],
+        cursor: Optional[str]
+    ) -> Tuple[List[ExercicioPraticaBase], Optional[str]]:
+        filtros = {
+            campo: valor
+            for campo, valor in zip(self.CAMPOS, (idioma, tipo_pratica, conhecimento_id))
+            if valor is not None
+        }
+
+        # Escolhe a lista mais seletiva entre os filtros informados
+        candidatos = self._chaves
+        for campo, valor in filtros.items():
+            lista = self._listas.get((campo, valor), [])
+            if len(lista) < len(candidatos):
+                candidatos = lista
+
+        inicio = 0
+        if cursor is not None:
+            inicio = bisect_right(candidatos, decodificar_cursor(cursor))
+        if data_fim is not None:
+            inicio = max(inicio, bisect_left(candidatos, (-microssegundos(data_fim),)))
+        limite_chave = None
+        if data_inicio is not None:
+            limite_chave = -microssegundos(data_inicio)
+
+        pagina: List[ExercicioPraticaBase] = []
+        ultima_chave = None
+        for posicao in range(inicio, len(candidatos)):
+            chave = candidatos[posicao]
+            if limite_chave is not None and chave[0] > limite_chave:
+                break
+            exercicio = self._exercicios[chave]
+            if any(getattr(exercicio, campo) != valor for campo, valor in filtros.items()):
+                continue
+            if limite is not None and len(pagina) == limite:
+                return pagina, codificar_cursor(ultima_chave)
+            pagina.append(exercicio)
+            ultima_chave = chave
+
+        return pagina, None
+
+
+class IndiceConhecimento:
+    """
+    Índice conhecimento_id → registro da base de conhecimento, na ordem do arquivo.
+
+    Guarda também o JSON já formatado de cada item, de modo que gravar a base após
+    alterar um item só serializa esse item; os demais fragmentos são reaproveitados.
+
+    O índice da entrada em cache não deve ser alterado: escritas trabalham sobre
+    copiar() e a cópia passa a ser o índice da nova versão. O índice de busca
+    textual, construído na primeira busca, acompanha as cópias e é atualizado
+    nas escritas.
+    """
+
+    def __init__(self, conhecimentos: Iterable[ConhecimentoIdioma] = ()):
+        self._itens: Dict[UUID, ConhecimentoIdioma] = {c.conhecimento_id: c for c in conhecimentos}
+        self._fragmentos: Dict[UUID, str] = {}
+        self._busca: Optional[IndiceBusca] = None
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def copiar(self) -> "IndiceConhecimento":
+        """Cópia independente do índice, reaproveitando os fragmentos já serializados."""
+        copia = IndiceConhecimento()
+        copia._itens = dict(self._itens)
+        copia._fragmentos = dict(self._fragmentos)
+        if self._busca is not None:
+            copia._busca = self._busca.copiar()
+        return copia
+
+    def busca(self) -> IndiceBusca:
+        """Índice de busca textual dos registros, construído na primeira chamada."""
+        if self._busca is None:
+            self._busca = IndiceBusca(self._itens.values())
+        return self._busca
+
+    def __contains__(self, conhecimento_id: UUID) -> bool:
+        return conhecimento_id in self._itens
+
+    def obter(self, conhecimento_id: UUID) -> Optional[ConhecimentoIdioma]:
+        """Retorna o registro com o identificador informado, se existir."""
+        return self._itens.get(conhecimento_id)
+
+    def salvar(self, conhecimento: ConhecimentoIdioma) -> None:
+        """Insere um registro novo no final ou substitui um existente na mesma posição."""
+        self._itens[conhecimento.conhecimento_id] = conhecimento
+        self._fragmentos.pop(conhecimento.conhecimento_id, None)
+        if self._busca is not None:
+            self._busca.salvar(conhecimento)
+
+    def remover(self, conhecimento_id: UUID) -> None:
+        """Remove o registro com o identificador informado."""
+        del self._itens[conhecimento_id]
+        self._fragmentos.pop(conhecimento_id, None)
+        if self._busca is not None:
+            self._busca.remover(conhecimento_id)
+
+    def itens(self) -> List[ConhecimentoIdioma]:
+        """Lista dos registros na ordem do arquivo."""
+        return list(self._itens.values())
+
+    def _fragmento(self, conhecimento: ConhecimentoIdioma) -> str:
+        fragmento = self._fragmentos.get(conhecimento.conhecimento_id)
+        if fragmento is None:
+            texto = json.dumps(conhecimento.model_dump(mode='json'), ensure_ascii=False, indent=2)
+            fragmento = "  " + texto.replace("\n", "\n  ")
+            self._fragmentos[conhecimento.conhecimento_id] = fragmento
+        return fragmento
+
+    def serializar(self) -> str:
+        """JSON da base inteira, idêntico a json.dump(..., ensure_ascii=False, indent=2)."""
+        if not self._itens:
+            return "[]"
+        return "[\n" + ",\n".join(self._fragmento(c) for c in self._itens.values()) + "\n]"
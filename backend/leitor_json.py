@@ -0,0 +1,192 @@
+"""
+Leitura incremental de arrays JSON grandes.
+
+Percorre os elementos de um array (na raiz do arquivo ou em uma chave do objeto raiz)
+lendo o arquivo em blocos, de modo que apenas o bloco atual e o elemento em
+decodificação ficam em memória. Cada elemento é entregue com sua posição em bytes
+no arquivo, usada nas mensagens de erro.
+"""
+import codecs
+import json
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+TAMANHO_BLOCO = 1 << 20
+
+_ESPACOS = " \t\n\r"
+# Literais que podem ser cortados no fim de um bloco sem que o erro aponte o fim
+# do buffer (ex.: "fals" de false); o maior é "-Infinity"
+_FOLGA_LITERAL = len("-Infinity")
+# Caracteres que podem continuar um número (ex.: "23" seguido de ".5" no próximo bloco)
+_CONTINUACAO_NUMERO = "0123456789.eE+-"
+
+
+class ErroJSON(ValueError):
+    """JSON malformado; `posicao` é o deslocamento em bytes no arquivo."""
+
+    def __init__(self, mensagem: str, posicao: int):
+        super().__init__(f"{mensagem} (byte {posicao})")
+        self.mensagem = mensagem
+        self.posicao = posicao
+
+
+class LeitorIncremental:
+    """Analisador JSON que consome o arquivo em blocos sob demanda."""
+
+    def __init__(self, arquivo: BinaryIO, tamanho_bloco: int = TAMANHO_BLOCO):
+        self._arquivo = arquivo
+        self._tamanho_bloco = tamanho_bloco
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decodificador = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._fim = False
+        # Posição em bytes de _buffer[0] e um ponto já convertido de caracteres para bytes
+        self._base = 0
+        self._marca_indice = 0
+        self._marca_bytes = 0
+
+    def _ler_mais(self) -> bool:
+        """Acrescenta um bloco ao buffer; retorna False no fim do arquivo."""
+        if self._fim:
+            return False
+        bloco = self._arquivo.read(self._tamanho_bloco)
+        if not bloco:
+            self._fim = True
+            self._buffer += self._utf8.decode(b"", final=True)
+            return False
+        if self._pos >= self._tamanho_bloco:
+            self._compactar()
+        self._buffer += self._utf8.decode(bloco)
+        return True
+
+    def _compactar(self) -> None:
+        """Descarta a parte já consumida do buffer."""
+        self._base = self.posicao_bytes(self._pos)
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        self._marca_indice = 0
+        self._marca_bytes = 0
+
+    def posicao_bytes(self, indice: Optional[int] = None) -> int:
+        """Converte um índice do buffer (padrão: posição atual) em posição no arquivo."""
+        if indice is None:
+            indice = self._pos
+        if indice >= self._marca_indice:
+            self._marca_bytes += len(self._buffer[self._marca_indice:indice].encode("utf-8"))
+            self._marca_indice = indice
+            return self._base + self._marca_bytes
+        return self._base + self._marca_bytes - len(self._buffer[indice:self._marca_indice].encode("utf-8"))
+
+    def espiar(self) -> Optional[str]:
+        """Pula espaços e retorna o próximo caractere sem consumi-lo (None no fim)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _ESPACOS:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._ler_mais():
+                return None
+
+    def consumir(self, esperados: str) -> str:
+        """Consome o próximo caractere, que deve ser um dos `esperados`."""
+        caractere = self.espiar()
+        if caractere is None or caractere not in esperados:
+            encontrado = "fim do arquivo" if caractere is None else repr(caractere)
+            opcoes = " ou ".join(repr(c) for c in esperados)
+            raise ErroJSON(f"Esperado {opcoes}, encontrado {encontrado}", self.posicao_bytes())
+        self._pos += 1
+        return caractere
+
+    def valor(self) -> Tuple[int, Any]:
+        """Decodifica o próximo valor JSON completo. Retorna (posição em bytes, valor)."""
+        if self.espiar() is None:
+            raise ErroJSON("Esperado um valor, encontrado fim do arquivo", self.posicao_bytes())
+        while True:
+            try:
+                valor, fim = self._decodificador.raw_decode(self._buffer, self._pos)
+                # Um número no fim do buffer pode continuar no próximo bloco
+                numero = isinstance(valor, (int, float)) and not isinstance(valor, bool)
+                if self._fim or not numero or self._numero_terminado(fim):
+                    posicao = self.posicao_bytes()
+                    self._pos = fim
+                    return posicao, valor
+            except json.JSONDecodeError as e:
+                incompleto = (
+                    e.pos >= len(self._buffer) - _FOLGA_LITERAL
+                    or e.msg.startswith("Unterminated string")
+                )
+                if self._fim or not incompleto:
+                    raise ErroJSON(e.msg, self.posicao_bytes(e.pos)) from None
+            self._ler_mais()
+
+    def _numero_terminado(self, fim: int) -> bool:
+        """Indica se há, no buffer, um caractere que encerra o número terminado em `fim`."""
+        while fim < len(self._buffer) and self._buffer[fim] in _CONTINUACAO_NUMERO:
+            fim += 1
+        return fim < len(self._buffer)
+
+    def elementos(self) -> Iterator[Tuple[int, Any]]:
+        """Percorre os elementos do array que começa na posição atual."""
+        self.consumir("[")
+        if self.espiar() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.valor()
+            if self.consumir(",]") == "]":
+                return
+
+    def terminar(self) -> None:
+        """Garante que não há nada além de espaços após o valor raiz."""
+        if self.espiar() is not None:
+            raise ErroJSON("Conteúdo extra após o valor JSON", self.posicao_bytes())
+
+
+def iterar_array(
+    caminho: Path,
+    chave: Optional[str] = None,
+    tamanho_bloco: int = TAMANHO_BLOCO
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Percorre os elementos de um array JSON sem carregar o arquivo inteiro.
+
+    Args:
+        caminho: Arquivo JSON.
+        chave: Se informada, a raiz deve ser um objeto e o array é o valor dessa
+            chave; os demais valores do objeto são decodificados e descartados.
+        tamanho_bloco: Quantidade de bytes lida por vez.
+
+    Yields:
+        (posição em bytes do elemento, elemento decodificado)
+
+    Raises:
+        ErroJSON: Se o arquivo não for JSON válido ou não tiver a estrutura esperada.
+    """
+    with open(caminho, "rb") as arquivo:
+        leitor = LeitorIncremental(arquivo, tamanho_bloco)
+        if chave is None:
+            yield from leitor.elementos()
+        else:
+            leitor.consumir("{")
+            encontrada = False
+            if leitor.espiar() == "}":
+                leitor.consumir("}")
+            else:
+                while True:
+                    posicao, nome = leitor.valor()
+                    if not isinstance(nome, str):
+                        raise ErroJSON("Esperado o nome de uma chave", posicao)
+                    leitor.consumir(":")
+                    if nome == chave and not encontrada:
+                        encontrada = True
+                        if leitor.espiar() != "[":
+                            raise ErroJSON(f"'{chave}' deve ser um array", leitor.posicao_bytes())
+                        yield from leitor.elementos()
+                    else:
+                        leitor.valor()
+                    if leitor.consumir(",}") == "}":
+                        break
+            if not encontrada:
+                raise ErroJSON(f"Chave '{chave}' não encontrada", leitor.posicao_bytes())
+        leitor.terminar()
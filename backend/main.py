@@ -4,35 +4,182 @@ Fornece endpoints para carregar e validar os dados da aplicação.
 """
 import os
 import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from typing import List
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Any, Callable, Container, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+import anyio
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import ValidationError
+from pydantic_core import to_json
 from dotenv import load_dotenv
 
 from models import (
     ConhecimentoIdioma,
     ColecaoPrompts,
+    PromptRenderizado,
+    RenderizacaoPrompt,
+    ExercicioPraticaBase,
+    ExercicioPraticaPorTipo,
+    EstadoProntidao,
+    EstatisticasPratica,
+    EventoAlteracao,
+    FilaRevisao,
     HistoricoPratica,
-    FrasesDialogo
+    PaginaHistoricoPratica,
+    FrasesDialogo,
+    Idioma,
+    TipoConhecimento,
+    TipoPratica
 )
+from aquecimento import Aquecimento
+from armazenamento import ARQUIVO_SQLITE_PADRAO, Armazenamento, ArmazenamentoSQLite, VersaoAlterada
+from carga import (
+    ARQUIVO_CONHECIMENTO,
+    ARQUIVO_FRASES,
+    ARQUIVO_HISTORICO,
+    ARQUIVO_HISTORICO_SEGMENTO,
+    ARQUIVO_PROMPTS,
+    PUBLIC_DIR,
+    carregar_base_de_conhecimento,
+    carregar_historico_de_pratica,
+    carregar_json
+)
+from arquivos import gravar_atomico
+from busca import IndiceBusca
+from cache import CacheDatasets, EntradaCache, assinatura_arquivo, hash_arquivos
+from compressao import TAMANHO_MINIMO_COMPRESSAO, comprimir, escolher_codificacao
+from concorrencia import EscritorDataset
+from estatisticas import EstatisticasHistorico
+from eventos import CanalEventos, ObservadorArquivos
+from indices import CursorInvalido, IndiceConhecimento, IndiceHistorico
+from metricas import MiddlewareMetricas, medir, registro as registro_metricas
+from patch_json import PatchConflitante, PatchInvalido
+from perfilador import MiddlewarePerfilador, RotaPerfilavel
+from prompts import ColecaoInvalida, DocumentoPrompts
+from renderizacao import ParametrosInvalidos, TemplatesCompilados
+from revisao import AgendadorRevisao
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
 # Configuração
 BACKEND_PORT = int(os.getenv("BACKEND_PORT", 4010))
-# PUBLIC_DIR deve apontar para a pasta public na raiz do projeto
-PUBLIC_DIR = Path(__file__).parent.parent / "public"
+# Armazenamento da base de conhecimento e do histórico: "json" (arquivos acima) ou "sqlite"
+ARMAZENAMENTO = os.getenv("ARMAZENAMENTO", "json").lower()
+ARQUIVO_SQLITE = Path(os.getenv("ARQUIVO_SQLITE", ARQUIVO_SQLITE_PADRAO))
+
+# Perfilador de requisições (desligado por padrão): fração amostrada, cabeçalho X-Perfilar e pasta dos perfis
+PERFILADOR_TAXA = float(os.getenv("PERFILADOR_TAXA", 0))
+PERFILADOR_CABECALHO = os.getenv("PERFILADOR_CABECALHO", "false").lower() in ("1", "true", "sim")
+PERFILADOR_DIR = Path(os.getenv("PERFILADOR_DIR", Path(__file__).parent / "perfis"))
+
+# Carga e validação de todos os datasets na inicialização; estrito: um dataset inválido impede a subida
+AQUECIMENTO = os.getenv("AQUECIMENTO", "true").lower() in ("1", "true", "sim")
+AQUECIMENTO_ESTRITO = os.getenv("AQUECIMENTO_ESTRITO", "false").lower() in ("1", "true", "sim")
+
+# Detecção de alterações feitas nos arquivos de PUBLIC_DIR fora do servidor, notificadas em /api/eventos
+OBSERVAR_ARQUIVOS = os.getenv("OBSERVAR_ARQUIVOS", "true").lower() in ("1", "true", "sim")
+
+# Representação em streaming (um registro JSON por linha), pedida com Accept
+NDJSON = "application/x-ndjson"
+TAMANHO_BLOCO_NDJSON = 64 * 1024
+# Tentativas de iniciar o streaming quando o dataset muda entre a leitura do ETag e a dos registros
+TENTATIVAS_NDJSON = 3
+# Endpoints com mais de uma representação variam com o cabeçalho Accept
+VARIA_COM_ACCEPT = {"Vary": "Accept"}
+
+# Cache dos datasets já validados, invalidado por assinatura do arquivo
+cache_datasets = CacheDatasets()
+
+# Escritas de cada dataset, executadas uma de cada vez fora do event loop
+escritor_conhecimento = EscritorDataset("conhecimento")
+escritor_prompts = EscritorDataset("prompts")
+escritor_historico = EscritorDataset("historico")
+escritor_frases = EscritorDataset("frases")
+
+logger = logging.getLogger(__name__)
+
+# Resultado da carga de cada dataset na inicialização, exposto em /health/ready
+aquecimento = Aquecimento()
+
+# Arquivos de PUBLIC_DIR que compõem cada dataset (o principal primeiro)
+ARQUIVOS_DATASETS = {
+    "base_de_conhecimento": (ARQUIVO_CONHECIMENTO,),
+    "historico_de_pratica": (ARQUIVO_HISTORICO, ARQUIVO_HISTORICO_SEGMENTO),
+    "prompts": (ARQUIVO_PROMPTS,),
+    "frases_do_dialogo": (ARQUIVO_FRASES,)
+}
+
+
+def verificar_alteracao_externa(dataset: str) -> None:
+    """
+    Publica em /api/eventos a versão atual dos arquivos de um dataset alterados fora do servidor.
+
+    Se os arquivos ainda correspondem à entrada do cache, a alteração foi uma
+    escrita do próprio servidor, que já a notificou.
+    """
+    caminho, *dependencias = [PUBLIC_DIR / nome for nome in ARQUIVOS_DATASETS[dataset]]
+    entrada = cache_datasets.entrada_atual(caminho)
+    if entrada is not None and entrada.assinaturas == cache_datasets.assinaturas(caminho, dependencias):
+        return
+    versao = f'"{hash_arquivos([caminho, *dependencias]).hexdigest()}"'
+    canal_eventos.publicar(dataset, versao, origem="externa")
+
+
+def arquivos_observados() -> Dict[str, str]:
+    """Arquivo de PUBLIC_DIR → dataset; no SQLite, a base e o histórico não ficam em arquivos."""
+    datasets = ["prompts", "frases_do_dialogo"]
+    if ARMAZENAMENTO == "json":
+        datasets += ["base_de_conhecimento", "historico_de_pratica"]
+    return {nome: dataset for dataset in datasets for nome in ARQUIVOS_DATASETS[dataset]}
+
+
+# Notificações de alteração (GET /api/eventos) e a thread que observa PUBLIC_DIR
+canal_eventos = CanalEventos()
+observador_arquivos = ObservadorArquivos(verificar_alteracao_externa)
+
+
+def notificar_alteracao(dataset: str, entrada: EntradaCache, ids: Optional[Iterable[Any]] = None) -> None:
+    """Publica em /api/eventos a versão que o servidor acabou de gravar (ids: registros alterados)."""
+    canal_eventos.publicar(dataset, entrada.etag, None if ids is None else [str(i) for i in ids])
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    """
+    Carrega e valida todos os datasets antes de aceitar requisições e observa
+    PUBLIC_DIR enquanto o servidor estiver no ar.
+    """
+    tarefas = tarefas_aquecimento() if AQUECIMENTO else {}
+    if not await anyio.to_thread.run_sync(aquecimento.executar, tarefas):
+        for dataset, erro in aquecimento.erros().items():
+            logger.error("Falha ao carregar o dataset %s: %s", dataset, erro)
+        if AQUECIMENTO_ESTRITO:
+            raise RuntimeError(f"Datasets inválidos: {', '.join(aquecimento.erros())}")
+    if OBSERVAR_ARQUIVOS:
+        observador_arquivos.iniciar(PUBLIC_DIR, arquivos_observados())
+    try:
+        yield
+    finally:
+        canal_eventos.encerrar()
+        await anyio.to_thread.run_sync(observador_arquivos.parar)
+
 
 # Criar aplicação FastAPI
 app = FastAPI(
     title="API de Estudo de Idiomas",
     description="API para gerenciar conhecimentos, prompts, histórico e diálogos",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=ciclo_de_vida
 )
+# Handlers síncronos podem ser perfilados na thread do pool em que rodam
+app.router.route_class = RotaPerfilavel
 
 # Configurar CORS
 app.add_middleware(
@@ -41,53 +188,234 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Proximo-Cursor"],
+)
+# Latência por rota e fases internas dos handlers, expostas em /metrics
+app.add_middleware(MiddlewareMetricas)
+app.add_middleware(
+    MiddlewarePerfilador,
+    diretorio=PERFILADOR_DIR,
+    taxa=PERFILADOR_TAXA,
+    permitir_cabecalho=PERFILADOR_CABECALHO
 )
 
 
-def carregar_json(caminho: Path):
-    """Carrega e retorna dados de um arquivo JSON."""
-    try:
-        with open(caminho, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Arquivo não encontrado: {caminho}"
-        )
-    except json.JSONDecodeError as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao decodificar JSON: {str(e)}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao ler arquivo: {str(e)}"
-        )
+def tamanho_arquivos(*caminhos: Path) -> Optional[int]:
+    """Soma dos tamanhos em bytes dos arquivos existentes (None se nenhum existir)."""
+    tamanhos = [a[1] for a in map(assinatura_arquivo, caminhos) if a is not None]
+    return sum(tamanhos) if tamanhos else None
 
 
-def salvar_json(caminho: Path, dados: dict):
-    """Salva dados em um arquivo JSON."""
-    try:
-        # Criar backup antes de salvar
-        if caminho.exists():
-            backup_path = caminho.with_suffix('.json.backup')
-            with open(caminho, 'r', encoding='utf-8') as f:
-                backup_data = f.read()
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(backup_data)
-        
-        # Salvar novos dados
-        with open(caminho, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
+def salvar_texto_json(caminho: Path, texto: str, objeto: Any = None, derivados: Optional[dict] = None):
+    """
+    Salva um texto JSON já serializado de forma atômica.
+    
+    O conteúdo é gravado em um arquivo temporário e trocado pelo original com
+    os.replace; a versão anterior é mantida em .json.backup por hardlink, sem
+    reler nem copiar o arquivo. Se `objeto` (a versão validada do conteúdo) for
+    informado, ele passa a ser a entrada do cache; caso contrário a entrada é
+    invalidada.
+    """
+    # Os mesmos bytes são gravados e usados no hash da versão, sem reler o arquivo
+    conteudo = texto.encode('utf-8')
+    # O observador ignora o arquivo até o cache refletir a nova versão
+    with observador_arquivos.gravando(caminho):
+        try:
+            with medir("gravacao"):
+                gravar_atomico(
+                    caminho,
+                    lambda f: f.buffer.write(conteudo),
+                    backup=caminho.with_suffix('.json.backup')
+                )
+        except Exception as e:
+            cache_datasets.invalidar(caminho)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erro ao salvar arquivo: {str(e)}"
+            )
         
+        if objeto is None:
+            cache_datasets.invalidar(caminho)
+        else:
+            cache_datasets.armazenar(caminho, objeto, conteudo, derivados)
+    return True
+
+
+def salvar_json(caminho: Path, dados: Any, objeto: Any = None):
+    """Salva dados em um arquivo JSON (ver salvar_texto_json)."""
+    with medir("serializacao"):
+        texto = json.dumps(dados, ensure_ascii=False, indent=2)
+    return salvar_texto_json(caminho, texto, objeto)
+
+
+def etag_corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    """Verifica se o cabeçalho If-None-Match corresponde ao ETag (comparação fraca)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
         return True
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao salvar arquivo: {str(e)}"
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    return any(c.removeprefix("W/") == etag for c in candidatos)
+
+
+def nao_modificado_desde(if_modified_since: Optional[str], ultima_modificacao: Optional[float]) -> bool:
+    """Verifica se o recurso não mudou desde a data do cabeçalho If-Modified-Since."""
+    if not if_modified_since or ultima_modificacao is None:
+        return False
+    try:
+        data = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return int(ultima_modificacao) <= data.timestamp()
+
+
+def cabecalhos_condicionais(
+    request: Request,
+    entrada: EntradaCache,
+    etag: str,
+    extras: Optional[Dict[str, str]] = None
+) -> Tuple[Dict[str, str], bool]:
+    """
+    Monta ETag, Last-Modified e Cache-Control de um dataset em cache.
+
+    Returns:
+        (cabeçalhos da resposta, True se o cliente já possui a versão atual)
+    """
+    cabecalhos = {"ETag": etag, "Cache-Control": "no-cache", **(extras or {})}
+    if entrada.ultima_modificacao is not None:
+        cabecalhos["Last-Modified"] = formatdate(entrada.ultima_modificacao, usegmt=True)
+    
+    # If-None-Match tem precedência sobre If-Modified-Since (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        nao_modificado = etag_corresponde(if_none_match, etag)
+    else:
+        nao_modificado = nao_modificado_desde(
+            request.headers.get("if-modified-since"),
+            entrada.ultima_modificacao
         )
+    return cabecalhos, nao_modificado
+
+
+def responder_condicional(
+    request: Request,
+    entrada: EntradaCache,
+    conteudo: Optional[Callable[[Any], Any]] = None,
+    serializar: Callable[[Any], bytes] = to_json,
+    cabecalhos: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Responde com um dataset em cache aplicando ETag e Last-Modified.
+
+    O objeto da entrada já foi validado na carga, então o corpo é devolvido como
+    uma Response pronta, sem passar de novo pelo response_model do endpoint. O JSON
+    do dataset inteiro é serializado uma vez por versão e guardado como derivado
+    da entrada do cache, assim como suas versões gzip/brotli, enviadas conforme
+    Accept-Encoding sem custo de compressão por requisição (o ETag é o mesmo).
+
+    Args:
+        conteudo: Função opcional que deriva o corpo a partir do objeto validado;
+            nesse caso o corpo é serializado a cada requisição.
+        serializar: Converte o objeto da entrada nos bytes JSON guardados em cache.
+        cabecalhos: Cabeçalhos adicionais da resposta.
+
+    Returns:
+        Uma resposta 304 sem corpo se o cliente já possui a versão atual,
+        ou a resposta 200 com o JSON.
+    """
+    if conteudo is None:
+        # O corpo da versão inteira também é guardado comprimido; a representação varia com Accept-Encoding
+        vary = ", ".join(filter(None, [(cabecalhos or {}).get("Vary"), "Accept-Encoding"]))
+        cabecalhos = {**(cabecalhos or {}), "Vary": vary}
+    cabecalhos, nao_modificado = cabecalhos_condicionais(request, entrada, entrada.etag, cabecalhos)
+    if nao_modificado:
+        return Response(status_code=304, headers=cabecalhos)
+    
+    if conteudo is not None:
+        resultado = conteudo(entrada.objeto)
+        with medir("serializacao"):
+            corpo = to_json(resultado)
+        return Response(content=corpo, media_type="application/json", headers=cabecalhos)
+    
+    def serializar_versao(objeto: Any) -> bytes:
+        with medir("serializacao"):
+            return serializar(objeto)
+    
+    def comprimir_versao(codificacao: str) -> bytes:
+        with medir("compressao"):
+            return comprimir(corpo, codificacao)
+    
+    corpo = entrada.derivado("json", serializar_versao)
+    codificacao = escolher_codificacao(request.headers.get("accept-encoding"))
+    if codificacao is not None and len(corpo) >= TAMANHO_MINIMO_COMPRESSAO:
+        corpo = entrada.derivado(f"json.{codificacao}", lambda _: comprimir_versao(codificacao))
+        cabecalhos["Content-Encoding"] = codificacao
+    return Response(content=corpo, media_type="application/json", headers=cabecalhos)
+
 
+def aceita_ndjson(request: Request) -> bool:
+    """Indica se o cliente pediu a representação NDJSON no cabeçalho Accept."""
+    tipos = request.headers.get("accept", "").split(",")
+    return any(tipo.split(";")[0].strip().lower() == NDJSON for tipo in tipos)
+
+
+def linhas_ndjson(registros: Iterable[Any]) -> Iterator[bytes]:
+    """Serializa um registro por linha, entregando blocos de até TAMANHO_BLOCO_NDJSON bytes."""
+    bloco = bytearray()
+    for registro in registros:
+        bloco += to_json(registro)
+        bloco += b"\n"
+        if len(bloco) >= TAMANHO_BLOCO_NDJSON:
+            yield bytes(bloco)
+            bloco.clear()
+    if bloco:
+        yield bytes(bloco)
+
+
+def responder_ndjson(
+    request: Request,
+    entrada: EntradaCache,
+    registros: Callable[[], Iterable[Any]],
+    cabecalhos: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Responde com os registros de um dataset em NDJSON (um registro JSON por linha).
+
+    O corpo é gerado em streaming a partir de registros(), sem montar a resposta
+    inteira em memória. Usa um ETag próprio da representação e as mesmas regras
+    de 304 de responder_condicional.
+    """
+    etag = f'"{entrada.versao}-ndjson"'
+    cabecalhos, nao_modificado = cabecalhos_condicionais(
+        request, entrada, etag, {**VARIA_COM_ACCEPT, **(cabecalhos or {})}
+    )
+    if nao_modificado:
+        return Response(status_code=304, headers=cabecalhos)
+    return StreamingResponse(linhas_ndjson(registros()), media_type=NDJSON, headers=cabecalhos)
+
+
+
+def responder_ndjson_dataset(
+    request: Request,
+    obter_entrada: Callable[[], EntradaCache],
+    iterar: Callable[[EntradaCache], Iterable[Any]]
+) -> Response:
+    """
+    responder_ndjson de um dataset do armazenamento, com o ETag e o corpo da mesma versão.
+
+    Se o dataset mudar entre a leitura da entrada e o início da iteração
+    (VersaoAlterada), recomeça com a versão nova.
+    """
+    for _ in range(TENTATIVAS_NDJSON):
+        entrada = obter_entrada()
+        try:
+            return responder_ndjson(request, entrada, lambda: iterar(entrada))
+        except VersaoAlterada:
+            continue
+    raise HTTPException(
+        status_code=409,
+        detail="Dataset alterado durante a leitura; tente novamente"
+    )
 
 @app.get("/")
 def root():
@@ -99,45 +427,93 @@ def root():
             "base_de_conhecimento": "/api/base_de_conhecimento",
             "prompts": "/api/prompts",
             "historico_de_pratica": "/api/historico_de_pratica",
-            "frases_do_dialogo": "/api/frases_do_dialogo"
+            "frases_do_dialogo": "/api/frases_do_dialogo",
+            "eventos": "/api/eventos"
         }
     }
 
 
-@app.get("/api/base_de_conhecimento", response_model=List[ConhecimentoIdioma])
-def get_base_de_conhecimento():
+def obter_entrada_conhecimento() -> EntradaCache:
+    """Retorna a entrada do cache com a base de conhecimento validada."""
+    caminho = PUBLIC_DIR / ARQUIVO_CONHECIMENTO
+    return cache_datasets.obter_entrada(caminho, lambda: carregar_base_de_conhecimento(caminho))
+
+
+def indice_conhecimento(entrada: EntradaCache) -> IndiceConhecimento:
+    """Índice conhecimento_id → registro, construído uma vez por entrada do cache."""
+    return entrada.derivado("indice", IndiceConhecimento)
+
+
+def persistir_indice_conhecimento(indice: IndiceConhecimento):
+    """Grava a base a partir do índice e o mantém no cache junto com a nova versão."""
+    caminho = PUBLIC_DIR / ARQUIVO_CONHECIMENTO
+    with medir("serializacao"):
+        texto = indice.serializar()
+    salvar_texto_json(caminho, texto, objeto=indice.itens(), derivados={"indice": indice})
+
+
+@app.get(
+    "/api/base_de_conhecimento",
+    response_model=List[ConhecimentoIdioma],
+    responses={200: {"content": {NDJSON: {}}}}
+)
+def get_base_de_conhecimento(request: Request):
     """
     Carrega e valida a base de conhecimento de idiomas.
     
+    Com `Accept: application/x-ndjson`, retorna um conhecimento por linha em streaming.
+    
     Returns:
         Lista de conhecimentos de idiomas validados.
+        Resposta 304 sem corpo se If-None-Match corresponder ao ETag atual.
     
     Raises:
         HTTPException: Se o arquivo não existir, estiver vazio ou inválido.
     """
-    caminho = PUBLIC_DIR / "[BASE] Conhecimento de idiomas.json"
-    dados = carregar_json(caminho)
-    
-    # Validar que não está vazio
-    if not dados or len(dados) == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="Base de conhecimento não pode estar vazia"
+    if aceita_ndjson(request):
+        return responder_ndjson_dataset(
+            request,
+            lambda: armazenamento.entrada_conhecimento(completa=False),
+            armazenamento.iterar_conhecimentos
         )
     
-    # Validar cada item contra o modelo Pydantic
-    try:
-        conhecimentos = [ConhecimentoIdioma(**item) for item in dados]
-        return conhecimentos
-    except ValidationError as e:
-        raise HTTPException(
-            status_code=422,
-            detail=f"Erro de validação: {e.errors()}"
-        )
+    entrada = armazenamento.entrada_conhecimento()
+    return responder_condicional(request, entrada, cabecalhos=VARIA_COM_ACCEPT)
+
+
+@app.get("/api/base_de_conhecimento/busca", response_model=List[ConhecimentoIdioma])
+def buscar_conhecimentos(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Termos buscados (sem distinção de acentos e maiúsculas)"),
+    idioma: Optional[Idioma] = None,
+    tipo_conhecimento: Optional[TipoConhecimento] = None,
+    limite: int = Query(20, ge=1, le=100, description="Número máximo de resultados")
+):
+    """
+    Busca conhecimentos por texto_original, traducao e divisao_silabica.
+    
+    Todos os termos devem ocorrer; "Madchen" encontra "Mädchen". Os resultados vêm
+    do mais ao menos relevante (palavra inteira, início de palavra e trecho, com
+    peso maior em texto_original) a partir de um índice de trigramas mantido nas
+    escritas por item.
+    
+    Returns:
+        Até `limite` conhecimentos.
+        Resposta 304 sem corpo se If-None-Match corresponder ao ETag da base.
+    
+    Raises:
+        HTTPException: Se o arquivo não existir, estiver vazio ou inválido.
+    """
+    entrada = armazenamento.entrada_conhecimento(completa=False)
+    
+    def buscar(conhecimentos: Optional[List[ConhecimentoIdioma]]) -> List[ConhecimentoIdioma]:
+        return armazenamento.busca_conhecimentos().buscar(q, limite, idioma, tipo_conhecimento)
+    
+    return responder_condicional(request, entrada, buscar)
 
 
 @app.put("/api/base_de_conhecimento", response_model=List[ConhecimentoIdioma])
-def update_base_de_conhecimento(conhecimentos: List[ConhecimentoIdioma]):
+async def update_base_de_conhecimento(conhecimentos: List[ConhecimentoIdioma]):
     """
     Atualiza a base de conhecimento de idiomas.
     
@@ -150,8 +526,6 @@ def update_base_de_conhecimento(conhecimentos: List[ConhecimentoIdioma]):
     Raises:
         HTTPException: Se houver erro ao salvar o arquivo.
     """
-    caminho = PUBLIC_DIR / "[BASE] Conhecimento de idiomas.json"
-    
     # Validar que não está vazio
     if not conhecimentos or len(conhecimentos) == 0:
         raise HTTPException(
@@ -167,11 +541,15 @@ def update_base_de_conhecimento(conhecimentos: List[ConhecimentoIdioma]):
             detail="IDs de conhecimentos devem ser únicos"
         )
     
+    def gravar() -> Response:
+        armazenamento.substituir_conhecimentos(conhecimentos)
+        notificar_alteracao("base_de_conhecimento", armazenamento.entrada_conhecimento(completa=False))
+        # A base pode ter vários MB: serializar a resposta fora do event loop
+        return Response(content=to_json(conhecimentos), media_type="application/json")
+    
     # Converter para dict e salvar
     try:
-        dados = [c.model_dump(mode='json') for c in conhecimentos]
-        salvar_json(caminho, dados)
-        return conhecimentos
+        return await escritor_conhecimento.executar(gravar)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -179,18 +557,138 @@ def update_base_de_conhecimento(conhecimentos: List[ConhecimentoIdioma]):
         )
 
 
-@app.get("/api/prompts", response_model=ColecaoPrompts)
-def get_prompts():
+@app.post(
+    "/api/base_de_conhecimento/{conhecimento_id}",
+    response_model=ConhecimentoIdioma,
+    status_code=201
+)
+async def criar_conhecimento(conhecimento_id: UUID, conhecimento: ConhecimentoIdioma):
     """
-    Carrega e valida a coleção de prompts.
+    Adiciona um conhecimento ao final da base.
+    
+    Apenas o novo item é validado; a unicidade do ID é verificada no índice.
+    
+    Args:
+        conhecimento_id: Identificador do novo conhecimento.
+        conhecimento: Conhecimento validado (o ID deve coincidir com o da URL).
     
     Returns:
-        Coleção de prompts validada.
+        O conhecimento criado.
     
     Raises:
-        HTTPException: Se o arquivo não existir, estiver vazio ou inválido.
+        HTTPException: Se o ID divergir da URL, já existir ou houver erro ao salvar.
+    """
+    if conhecimento.conhecimento_id != conhecimento_id:
+        raise HTTPException(
+            status_code=400,
+            detail="conhecimento_id do corpo deve ser igual ao da URL"
+        )
+    
+    def gravar():
+        if armazenamento.obter_conhecimento(conhecimento_id) is not None:
+            raise HTTPException(
+                status_code=400,
+                detail="IDs de conhecimentos devem ser únicos"
+            )
+        armazenamento.salvar_conhecimento(conhecimento)
+        notificar_alteracao("base_de_conhecimento", armazenamento.entrada_conhecimento(completa=False), [conhecimento_id])
+    
+    await escritor_conhecimento.executar(gravar)
+    return conhecimento
+
+
+@app.patch("/api/base_de_conhecimento/{conhecimento_id}", response_model=ConhecimentoIdioma)
+async def atualizar_conhecimento(conhecimento_id: UUID, alteracoes: Dict[str, Any] = Body(...)):
+    """
+    Altera campos de um conhecimento existente.
+    
+    Os campos informados são mesclados ao registro atual e apenas o registro
+    resultante é validado.
+    
+    Args:
+        conhecimento_id: Identificador do conhecimento.
+        alteracoes: Campos a alterar (conhecimento_id não pode ser alterado).
+    
+    Returns:
+        O conhecimento atualizado.
+    
+    Raises:
+        HTTPException: Se o conhecimento não existir, o resultado for inválido
+            ou houver erro ao salvar.
+    """
+    if "conhecimento_id" in alteracoes:
+        try:
+            id_corpo = UUID(str(alteracoes["conhecimento_id"]))
+        except ValueError:
+            raise HTTPException(
+                status_code=422,
+                detail=f"conhecimento_id inválido: {alteracoes['conhecimento_id']}"
+            )
+        if id_corpo != conhecimento_id:
+            raise HTTPException(
+                status_code=400,
+                detail="conhecimento_id não pode ser alterado"
+            )
+    
+    def gravar() -> ConhecimentoIdioma:
+        atual = armazenamento.obter_conhecimento(conhecimento_id)
+        if atual is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Conhecimento não encontrado: {conhecimento_id}"
+            )
+        
+        # Validar apenas o registro alterado
+        try:
+            conhecimento = ConhecimentoIdioma(**{**atual.model_dump(), **alteracoes})
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Erro de validação: {e.errors()}"
+            )
+        
+        armazenamento.salvar_conhecimento(conhecimento)
+        notificar_alteracao("base_de_conhecimento", armazenamento.entrada_conhecimento(completa=False), [conhecimento_id])
+        return conhecimento
+    
+    return await escritor_conhecimento.executar(gravar)
+
+
+@app.delete("/api/base_de_conhecimento/{conhecimento_id}", status_code=204)
+async def remover_conhecimento(conhecimento_id: UUID):
+    """
+    Remove um conhecimento da base.
+    
+    Args:
+        conhecimento_id: Identificador do conhecimento.
+    
+    Raises:
+        HTTPException: Se o conhecimento não existir, for o último da base
+            ou houver erro ao salvar.
     """
-    caminho = PUBLIC_DIR / "[BASE] Prompts.json"
+    def gravar():
+        if armazenamento.obter_conhecimento(conhecimento_id) is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Conhecimento não encontrado: {conhecimento_id}"
+            )
+        
+        # A base não pode ficar vazia
+        if armazenamento.contar_conhecimentos() == 1:
+            raise HTTPException(
+                status_code=400,
+                detail="Base de conhecimento não pode estar vazia"
+            )
+        
+        armazenamento.remover_conhecimento(conhecimento_id)
+        notificar_alteracao("base_de_conhecimento", armazenamento.entrada_conhecimento(completa=False), [conhecimento_id])
+    
+    await escritor_conhecimento.executar(gravar)
+    return Response(status_code=204)
+
+
+def carregar_prompts(caminho: Path) -> ColecaoPrompts:
+    """Lê e valida o arquivo da coleção de prompts."""
     dados = carregar_json(caminho)
     
     # Validar que não está vazio
@@ -202,7 +700,8 @@ def get_prompts():
     
     # Validar contra o modelo Pydantic
     try:
-        colecao = ColecaoPrompts(**dados)
+        with medir("validacao"):
+            colecao = ColecaoPrompts(**dados)
         return colecao
     except ValidationError as e:
         raise HTTPException(
@@ -211,8 +710,39 @@ def get_prompts():
         )
 
 
+def obter_entrada_prompts() -> EntradaCache:
+    """Retorna a entrada do cache com a coleção de prompts validada."""
+    caminho = PUBLIC_DIR / ARQUIVO_PROMPTS
+    return cache_datasets.obter_entrada(caminho, lambda: carregar_prompts(caminho))
+
+
+def documento_prompts(entrada: EntradaCache) -> DocumentoPrompts:
+    """Coleção de prompts editável por JSON Patch, construída uma vez por entrada do cache."""
+    return entrada.derivado("documento", DocumentoPrompts)
+
+
+def templates_prompts(entrada: EntradaCache) -> TemplatesCompilados:
+    """Templates compilados da coleção de prompts, uma vez por entrada do cache."""
+    return entrada.derivado("templates", TemplatesCompilados)
+
+
+@app.get("/api/prompts", response_model=ColecaoPrompts)
+def get_prompts(request: Request):
+    """
+    Carrega e valida a coleção de prompts.
+    
+    Returns:
+        Coleção de prompts validada.
+        Resposta 304 sem corpo se If-None-Match corresponder ao ETag atual.
+    
+    Raises:
+        HTTPException: Se o arquivo não existir, estiver vazio ou inválido.
+    """
+    return responder_condicional(request, obter_entrada_prompts())
+
+
 @app.put("/api/prompts", response_model=ColecaoPrompts)
-def update_prompts(colecao: ColecaoPrompts):
+async def update_prompts(colecao: ColecaoPrompts):
     """
     Atualiza a coleção de prompts.
     
@@ -225,7 +755,7 @@ def update_prompts(colecao: ColecaoPrompts):
     Raises:
         HTTPException: Se houver erro ao salvar o arquivo.
     """
-    caminho = PUBLIC_DIR / "[BASE] Prompts.json"
+    caminho = PUBLIC_DIR / ARQUIVO_PROMPTS
     
     # Validar que não está vazio
     if not colecao.prompts or len(colecao.prompts) == 0:
@@ -242,10 +772,13 @@ def update_prompts(colecao: ColecaoPrompts):
             detail="IDs de prompts devem ser únicos"
         )
     
+    def gravar():
+        salvar_json(caminho, colecao.model_dump(mode='json'), colecao)
+        notificar_alteracao("prompts", obter_entrada_prompts())
+    
     # Converter para dict e salvar
     try:
-        dados = colecao.model_dump(mode='json')
-        salvar_json(caminho, dados)
+        await escritor_prompts.executar(gravar)
         return colecao
     except Exception as e:
         raise HTTPException(
@@ -254,56 +787,456 @@ def update_prompts(colecao: ColecaoPrompts):
         )
 
 
-@app.get("/api/historico_de_pratica", response_model=HistoricoPratica)
-def get_historico_de_pratica():
+@app.patch("/api/prompts", response_model=ColecaoPrompts)
+async def patch_prompts(request: Request, operacoes: List[Dict[str, Any]] = Body(...)):
     """
-    Carrega e valida o histórico de prática.
-    Se o arquivo não existir, retorna um histórico vazio.
+    Altera a coleção de prompts com um JSON Patch (RFC 6902).
+    
+    Aceita as operações add, remove, replace, move, copy e test. Só os prompts
+    tocados pelo patch são validados de novo; a unicidade de prompt_id é
+    conferida de forma incremental e só os prompts alterados são serializados.
+    
+    Args:
+        operacoes: Lista de operações do patch.
     
     Returns:
-        Histórico de prática validado.
+        A nova versão da coleção, com o ETag correspondente.
     
     Raises:
-        HTTPException: Se o arquivo existir mas estiver inválido.
+        HTTPException: 400 se o patch for malformado ou a coleção ficar vazia ou
+            com IDs repetidos, 409 se um caminho não existir ou uma operação test
+            falhar, 412 se If-Match não corresponder ao ETag atual e 422 se um
+            prompt alterado for inválido.
     """
-    caminho = PUBLIC_DIR / "[BASE] Histórico de Prática.json"
+    caminho = PUBLIC_DIR / ARQUIVO_PROMPTS
+    if_match = request.headers.get("if-match")
     
-    # Se não existir, retornar histórico vazio
-    if not caminho.exists():
-        return HistoricoPratica(exercicios=[])
+    def gravar() -> EntradaCache:
+        entrada = obter_entrada_prompts()
+        if if_match is not None and not etag_corresponde(if_match, entrada.etag):
+            raise HTTPException(
+                status_code=412,
+                detail="A coleção de prompts foi alterada: If-Match não corresponde ao ETag atual"
+            )
+        
+        try:
+            documento = documento_prompts(entrada).aplicar(operacoes)
+        except PatchConflitante as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except (PatchInvalido, ColecaoInvalida) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Erro de validação: {e.errors()}"
+            )
+        
+        with medir("serializacao"):
+            texto = documento.serializar()
+        salvar_texto_json(caminho, texto, documento.colecao(), {"documento": documento})
+        entrada = obter_entrada_prompts()
+        notificar_alteracao("prompts", entrada, documento.alterados)
+        return entrada
     
-    dados = carregar_json(caminho)
+    entrada = await escritor_prompts.executar(gravar)
+    # Mesmo corpo compacto do GET (guardado na entrada), para que o ETag identifique os mesmos bytes
+    with medir("serializacao"):
+        corpo = entrada.derivado("json", to_json)
+    return Response(content=corpo, media_type="application/json", headers={"ETag": entrada.etag})
+
+
+@app.post("/api/prompts/{prompt_id}/render", response_model=PromptRenderizado)
+def renderizar_prompt(prompt_id: str, renderizacao: RenderizacaoPrompt):
+    """
+    Renderiza um prompt com cada conjunto de parâmetros do lote.
     
-    # Validar que não está vazio (se existir, não pode estar vazio)
-    if not dados:
+    Os marcadores (marcador_de_paramentros da coleção) são substituídos pelos
+    valores; números são convertidos com str(). O template é compilado uma vez
+    por versão da coleção, então o custo de cada conjunto é só juntar os trechos.
+    
+    Args:
+        prompt_id: Identificador do prompt.
+        renderizacao: Lote de conjuntos de parâmetros (até 10000).
+    
+    Returns:
+        Os textos renderizados na ordem do lote, com o ETag da versão da coleção usada.
+    
+    Raises:
+        HTTPException: 404 se o prompt não existir, 409 se os marcadores do
+            template não corresponderem aos parametros declarados e 422 se um
+            conjunto não tiver exatamente os parâmetros do prompt.
+    """
+    entrada = obter_entrada_prompts()
+    template = templates_prompts(entrada).obter(prompt_id)
+    if template is None:
         raise HTTPException(
-            status_code=400,
-            detail="Histórico de prática existe mas está vazio"
+            status_code=404,
+            detail=f"Prompt não encontrado: {prompt_id}"
+        )
+    if template.erros:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Template do prompt {prompt_id} inválido: {'; '.join(template.erros)}"
         )
     
-    # Validar contra o modelo Pydantic
     try:
-        historico = HistoricoPratica(**dados)
-        return historico
-    except ValidationError as e:
+        resultados = template.renderizar_lote(renderizacao.parametros)
+    except ParametrosInvalidos as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    return Response(
+        content=to_json({"prompt_id": prompt_id, "resultados": resultados}),
+        media_type="application/json",
+        headers={"ETag": entrada.etag}
+    )
+
+
+def obter_entrada_historico() -> EntradaCache:
+    """Retorna a entrada do cache com a visão combinada do histórico."""
+    caminho = PUBLIC_DIR / ARQUIVO_HISTORICO
+    segmento = PUBLIC_DIR / ARQUIVO_HISTORICO_SEGMENTO
+    return cache_datasets.obter_entrada(
+        caminho,
+        lambda: carregar_historico_de_pratica(caminho, segmento),
+        dependencias=[segmento]
+    )
+
+
+def indice_historico(entrada: EntradaCache) -> IndiceHistorico:
+    """Índice ordenado do histórico, construído uma vez por entrada do cache."""
+    return entrada.derivado("indice", lambda h: IndiceHistorico(h.exercicios))
+
+
+def estatisticas_historico(entrada: EntradaCache) -> EstatisticasHistorico:
+    """Contadores do histórico, construídos uma vez por entrada e atualizados ao anexar."""
+    return entrada.derivado("estatisticas", lambda h: EstatisticasHistorico(h.exercicios))
+
+
+def agendador_revisao(entrada: EntradaCache) -> AgendadorRevisao:
+    """Fila de revisão do histórico, construída uma vez por entrada e atualizada ao anexar."""
+    return entrada.derivado("revisao", lambda h: AgendadorRevisao(h.exercicios))
+
+
+class ArmazenamentoJSON(Armazenamento):
+    """
+    Armazenamento padrão sobre os arquivos [BASE] de PUBLIC_DIR.
+
+    Usa o cache de datasets e os índices em memória; o histórico recebe novos
+    exercícios pelo segmento append-only em JSON Lines.
+    """
+    
+    def entrada_conhecimento(self, completa: bool = True) -> EntradaCache:
+        return obter_entrada_conhecimento()
+    
+    def iterar_conhecimentos(self, entrada: EntradaCache) -> Iterator[ConhecimentoIdioma]:
+        return iter(entrada.objeto)
+    
+    def obter_conhecimento(self, conhecimento_id: UUID) -> Optional[ConhecimentoIdioma]:
+        return indice_conhecimento(obter_entrada_conhecimento()).obter(conhecimento_id)
+    
+    def ids_conhecimentos(self) -> Container[UUID]:
+        return indice_conhecimento(obter_entrada_conhecimento())
+    
+    def busca_conhecimentos(self) -> IndiceBusca:
+        return indice_conhecimento(obter_entrada_conhecimento()).busca()
+    
+    def contar_conhecimentos(self) -> int:
+        return len(indice_conhecimento(obter_entrada_conhecimento()))
+    
+    def substituir_conhecimentos(self, conhecimentos: List[ConhecimentoIdioma]) -> None:
+        dados = [c.model_dump(mode='json') for c in conhecimentos]
+        salvar_json(PUBLIC_DIR / ARQUIVO_CONHECIMENTO, dados, objeto=conhecimentos)
+    
+    def salvar_conhecimento(self, conhecimento: ConhecimentoIdioma) -> None:
+        # Leitores continuam usando o índice da versão atual até a gravação terminar
+        indice = indice_conhecimento(obter_entrada_conhecimento()).copiar()
+        indice.salvar(conhecimento)
+        persistir_indice_conhecimento(indice)
+    
+    def remover_conhecimento(self, conhecimento_id: UUID) -> None:
+        indice = indice_conhecimento(obter_entrada_conhecimento()).copiar()
+        indice.remover(conhecimento_id)
+        persistir_indice_conhecimento(indice)
+    
+    def entrada_historico(self, completa: bool = True) -> EntradaCache:
+        # As consultas usam o índice em memória, que depende do histórico carregado
+        return obter_entrada_historico()
+    
+    def iterar_historico(self, entrada: EntradaCache) -> Iterator[ExercicioPraticaBase]:
+        return iter(entrada.objeto.exercicios)
+    
+    def consultar_historico(self, entrada: EntradaCache, **consulta):
+        return indice_historico(entrada).consultar(**consulta)
+    
+    def contem_exercicio(self, exercicio_id: UUID) -> bool:
+        return indice_historico(obter_entrada_historico()).contem(exercicio_id)
+    
+    def estatisticas_historico(self, entrada: EntradaCache) -> EstatisticasHistorico:
+        return estatisticas_historico(entrada)
+    
+    def agendador_revisao(self, entrada: EntradaCache) -> AgendadorRevisao:
+        return agendador_revisao(entrada)
+    
+    def tamanhos(self) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+        conhecimento = cache_datasets.entrada_atual(PUBLIC_DIR / ARQUIVO_CONHECIMENTO)
+        historico = cache_datasets.entrada_atual(PUBLIC_DIR / ARQUIVO_HISTORICO)
+        return {
+            "base_de_conhecimento": (
+                len(conhecimento.objeto) if conhecimento is not None else None,
+                tamanho_arquivos(PUBLIC_DIR / ARQUIVO_CONHECIMENTO)
+            ),
+            "historico_de_pratica": (
+                len(historico.objeto.exercicios) if historico is not None else None,
+                tamanho_arquivos(PUBLIC_DIR / ARQUIVO_HISTORICO, PUBLIC_DIR / ARQUIVO_HISTORICO_SEGMENTO)
+            )
+        }
+    
+    def anexar_exercicios(self, exercicios: Sequence[ExercicioPraticaBase]) -> None:
+        caminho = PUBLIC_DIR / ARQUIVO_HISTORICO
+        segmento = PUBLIC_DIR / ARQUIVO_HISTORICO_SEGMENTO
+        novos = list(exercicios)
+        
+        # Acrescentar ao segmento e atualizar o cache sem reler o histórico
+        linhas = "".join(e.model_dump_json() + "\n" for e in novos).encode('utf-8')
+        with observador_arquivos.gravando(segmento):
+            anteriores = cache_datasets.assinaturas(caminho, [segmento])
+            try:
+                with open(segmento, 'ab') as f:
+                    f.write(linhas)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Erro ao salvar exercícios: {str(e)}"
+                )
+            
+            cache_datasets.anexar(
+                caminho,
+                [segmento],
+                anteriores,
+                linhas,
+                lambda h: HistoricoPratica.model_construct(exercicios=h.exercicios + novos),
+                novos
+            )
+
+
+def criar_armazenamento() -> Armazenamento:
+    """Cria o armazenamento configurado em ARMAZENAMENTO no .env."""
+    if ARMAZENAMENTO == "json":
+        return ArmazenamentoJSON()
+    if ARMAZENAMENTO == "sqlite":
+        return ArmazenamentoSQLite(ARQUIVO_SQLITE)
+    raise ValueError(f"ARMAZENAMENTO inválido: {ARMAZENAMENTO} (use 'json' ou 'sqlite')")
+
+
+armazenamento = criar_armazenamento()
+
+
+def serializar_historico(historico: HistoricoPratica) -> bytes:
+    """JSON do histórico inteiro, no formato de uma página sem cursor."""
+    return to_json(PaginaHistoricoPratica.model_construct(exercicios=historico.exercicios))
+
+
+@app.get(
+    "/api/historico_de_pratica",
+    response_model=PaginaHistoricoPratica,
+    responses={200: {"content": {NDJSON: {}}}}
+)
+def get_historico_de_pratica(
+    request: Request,
+    idioma: Optional[Idioma] = None,
+    tipo_pratica: Optional[TipoPratica] = None,
+    conhecimento_id: Optional[UUID] = None,
+    data_inicio: Optional[datetime] = Query(None, description="Limite inferior (inclusivo) de data_hora"),
+    data_fim: Optional[datetime] = Query(None, description="Limite superior (inclusivo) de data_hora"),
+    limite: Optional[int] = Query(None, ge=1, le=1000, description="Tamanho máximo da página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado em proximo_cursor")
+):
+    """
+    Carrega e valida o histórico de prática.
+    Se o arquivo não existir, retorna um histórico vazio.
+    
+    Sem parâmetros, retorna o histórico completo na ordem do arquivo. Com filtros
+    ou paginação, retorna os exercícios do mais recente ao mais antigo a partir
+    do índice ordenado do histórico.
+    
+    Com `Accept: application/x-ndjson`, retorna um exercício por linha em streaming;
+    o cursor da próxima página, se houver, vem no cabeçalho X-Proximo-Cursor.
+    
+    Returns:
+        Histórico de prática validado (ou a página solicitada).
+        Resposta 304 sem corpo se If-None-Match corresponder ao ETag atual.
+    
+    Raises:
+        HTTPException: Se o arquivo existir mas estiver inválido ou o cursor for inválido.
+    """
+    consulta = {
+        "idioma": idioma,
+        "tipo_pratica": tipo_pratica,
+        "conhecimento_id": conhecimento_id,
+        "data_inicio": data_inicio,
+        "data_fim": data_fim,
+        "limite": limite,
+        "cursor": cursor
+    }
+    ndjson = aceita_ndjson(request)
+    
+    if all(valor is None for valor in consulta.values()):
+        if ndjson:
+            return responder_ndjson_dataset(
+                request,
+                lambda: armazenamento.entrada_historico(completa=False),
+                armazenamento.iterar_historico
+            )
+        
+        entrada = armazenamento.entrada_historico()
+        return responder_condicional(
+            request,
+            entrada,
+            serializar=serializar_historico,
+            cabecalhos=VARIA_COM_ACCEPT
+        )
+    
+    entrada = armazenamento.entrada_historico(completa=False)
+    
+    def consultar():
+        try:
+            return armazenamento.consultar_historico(entrada, **consulta)
+        except CursorInvalido as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if ndjson:
+        exercicios, proximo_cursor = consultar()
+        cabecalhos = {"X-Proximo-Cursor": proximo_cursor} if proximo_cursor else None
+        return responder_ndjson(request, entrada, lambda: exercicios, cabecalhos)
+    
+    def paginar(historico: HistoricoPratica) -> PaginaHistoricoPratica:
+        exercicios, proximo_cursor = consultar()
+        # Os exercícios já foram validados na carga; não validar a página de novo
+        return PaginaHistoricoPratica.model_construct(exercicios=exercicios, proximo_cursor=proximo_cursor)
+    
+    return responder_condicional(request, entrada, paginar, cabecalhos=VARIA_COM_ACCEPT)
+
+
+@app.post("/api/historico_de_pratica", response_model=HistoricoPratica, status_code=201)
+async def registrar_exercicios(exercicios: Union[List[ExercicioPraticaPorTipo], ExercicioPraticaPorTipo]):
+    """
+    Registra um exercício (ou um lote) no histórico de prática.
+    
+    Os exercícios são acrescentados ao armazenamento configurado, com custo
+    proporcional ao número de novos registros e não ao tamanho do histórico
+    (no armazenamento em JSON, ao segmento append-only em JSON Lines).
+    
+    Args:
+        exercicios: Um exercício ou uma lista de exercícios validados.
+    
+    Returns:
+        Histórico contendo apenas os exercícios registrados.
+    
+    Raises:
+        HTTPException: Se o lote estiver vazio, houver IDs repetidos ou erro ao salvar.
+    """
+    novos = exercicios if isinstance(exercicios, list) else [exercicios]
+    
+    # Validar que não está vazio
+    if not novos:
         raise HTTPException(
-            status_code=422,
-            detail=f"Erro de validação: {e.errors()}"
+            status_code=400,
+            detail="Lote de exercícios não pode estar vazio"
         )
+    
+    def gravar():
+        # Validar IDs únicos no lote e no histórico existente
+        exercicio_ids = [e.exercicio_id for e in novos]
+        if len(exercicio_ids) != len(set(exercicio_ids)) or any(armazenamento.contem_exercicio(i) for i in exercicio_ids):
+            raise HTTPException(
+                status_code=400,
+                detail="IDs de exercícios devem ser únicos"
+            )
+        
+        armazenamento.anexar_exercicios(novos)
+        notificar_alteracao("historico_de_pratica", armazenamento.entrada_historico(completa=False), exercicio_ids)
+    
+    await escritor_historico.executar(gravar)
+    # Os exercícios já foram validados na leitura do corpo
+    return HistoricoPratica.model_construct(exercicios=novos)
 
 
-@app.get("/api/frases_do_dialogo", response_model=FrasesDialogo)
-def get_frases_do_dialogo():
+@app.get("/api/historico_de_pratica/estatisticas", response_model=EstatisticasPratica)
+def get_estatisticas_historico(
+    request: Request,
+    idioma: Optional[Idioma] = None,
+    tipo_pratica: Optional[TipoPratica] = None,
+    data_inicio: Optional[date] = Query(None, description="Primeiro dia (UTC, inclusivo)"),
+    data_fim: Optional[date] = Query(None, description="Último dia (UTC, inclusivo)")
+):
     """
-    Carrega e valida as frases do diálogo.
+    Totais de exercícios e taxa de acerto do histórico de prática, por idioma,
+    por tipo de prática e por dia (UTC).
+    
+    Os contadores são mantidos à medida que exercícios são registrados; a resposta
+    não percorre o histórico. Um exercício conta como acerto com a mesma regra da
+    tela do histórico (na tradução, todos os campos corretos).
     
     Returns:
-        Frases do diálogo validadas.
+        Estatísticas dos exercícios que atendem aos filtros.
+        Resposta 304 sem corpo se If-None-Match corresponder ao ETag do histórico.
     
     Raises:
-        HTTPException: Se o arquivo não existir, estiver vazio ou inválido.
+        HTTPException: Se o histórico existir mas estiver inválido.
+    """
+    if data_inicio is not None and data_fim is not None and data_inicio > data_fim:
+        raise HTTPException(status_code=400, detail="data_inicio deve ser anterior ou igual a data_fim")
+    
+    entrada = armazenamento.entrada_historico(completa=False)
+    
+    def resumir(historico: Optional[HistoricoPratica]) -> EstatisticasPratica:
+        estatisticas = armazenamento.estatisticas_historico(entrada)
+        return estatisticas.resumo(idioma, tipo_pratica, data_inicio, data_fim)
+    
+    return responder_condicional(request, entrada, resumir)
+
+
+@app.get("/api/revisao", response_model=FilaRevisao)
+def get_revisao(
+    limite: int = Query(20, ge=1, le=1000, description="Número máximo de conhecimentos"),
+    idioma: Optional[Idioma] = None,
+    data_hora: Optional[datetime] = Query(None, description="Momento de referência (padrão: agora, UTC)")
+):
+    """
+    Próximos conhecimentos com revisão vencida, do mais atrasado ao mais recente.
+    
+    O vencimento de cada conhecimento é calculado (SM-2) a partir das notas dos seus
+    exercícios no histórico: fração de campos_resultados corretos, correto ou acertou.
+    A fila é mantida à medida que exercícios são registrados; a consulta percorre
+    apenas os primeiros itens. Conhecimentos removidos da base são omitidos (pelos
+    identificadores mantidos em memória por versão da base) e os nunca praticados
+    não entram na fila.
+    
+    Sem ETag nem 304: a fila depende do momento da consulta (`data_hora`, por
+    padrão agora) além das versões do histórico e da base, então a mesma versão
+    não identifica uma única resposta.
+    
+    Returns:
+        Fila com até `limite` conhecimentos vencidos em `data_hora`.
+    
+    Raises:
+        HTTPException: Se o histórico existir mas estiver inválido.
     """
-    caminho = PUBLIC_DIR / "[BASE] Frases do Diálogo.json"
+    entrada = armazenamento.entrada_historico(completa=False)
+    ids = armazenamento.ids_conhecimentos()
+    itens = armazenamento.agendador_revisao(entrada).vencidos(
+        data_hora or datetime.now(timezone.utc),
+        limite,
+        idioma,
+        aceitar=ids.__contains__
+    )
+    return FilaRevisao.model_construct(itens=itens)
+
+
+def carregar_frases_do_dialogo(caminho: Path) -> FrasesDialogo:
+    """Lê e valida o arquivo das frases do diálogo."""
     dados = carregar_json(caminho)
     
     # Validar que não está vazio
@@ -315,7 +1248,8 @@ def get_frases_do_dialogo():
     
     # Validar contra o modelo Pydantic
     try:
-        frases = FrasesDialogo(**dados)
+        with medir("validacao"):
+            frases = FrasesDialogo(**dados)
         return frases
     except ValidationError as e:
         raise HTTPException(
@@ -324,8 +1258,29 @@ def get_frases_do_dialogo():
         )
 
 
+def obter_entrada_frases() -> EntradaCache:
+    """Retorna a entrada do cache com as frases do diálogo validadas."""
+    caminho = PUBLIC_DIR / ARQUIVO_FRASES
+    return cache_datasets.obter_entrada(caminho, lambda: carregar_frases_do_dialogo(caminho))
+
+
+@app.get("/api/frases_do_dialogo", response_model=FrasesDialogo)
+def get_frases_do_dialogo(request: Request):
+    """
+    Carrega e valida as frases do diálogo.
+    
+    Returns:
+        Frases do diálogo validadas.
+        Resposta 304 sem corpo se If-None-Match corresponder ao ETag atual.
+    
+    Raises:
+        HTTPException: Se o arquivo não existir, estiver vazio ou inválido.
+    """
+    return responder_condicional(request, obter_entrada_frases())
+
+
 @app.put("/api/frases_do_dialogo", response_model=FrasesDialogo)
-def update_frases_do_dialogo(frases: FrasesDialogo):
+async def update_frases_do_dialogo(frases: FrasesDialogo):
     """
     Atualiza as frases do diálogo.
     
@@ -338,7 +1293,7 @@ def update_frases_do_dialogo(frases: FrasesDialogo):
     Raises:
         HTTPException: Se houver erro ao salvar o arquivo.
     """
-    caminho = PUBLIC_DIR / "[BASE] Frases do Diálogo.json"
+    caminho = PUBLIC_DIR / ARQUIVO_FRASES
     
     # Validar que campos obrigatórios não estão vazios
     if not frases.saudacao or not frases.saudacao.strip():
@@ -366,10 +1321,13 @@ def update_frases_do_dialogo(frases: FrasesDialogo):
             detail="Frases intermediárias não podem estar vazias"
         )
     
+    def gravar():
+        salvar_json(caminho, frases.model_dump(mode='json'), frases)
+        notificar_alteracao("frases_do_dialogo", obter_entrada_frases())
+    
     # Converter para dict e salvar
     try:
-        dados = frases.model_dump(mode='json')
-        salvar_json(caminho, dados)
+        await escritor_frases.executar(gravar)
         return frases
     except Exception as e:
         raise HTTPException(
@@ -378,6 +1336,141 @@ def update_frases_do_dialogo(frases: FrasesDialogo):
         )
 
 
+@app.get(
+    "/api/eventos",
+    response_class=StreamingResponse,
+    responses={200: {"model": EventoAlteracao, "content": {"text/event-stream": {}}}}
+)
+async def get_eventos(request: Request):
+    """
+    Stream (Server-Sent Events) de notificações de alteração dos datasets.
+    
+    Cada evento `alteracao` traz o dataset, o ETag da nova versão e, quando
+    conhecidos, os IDs dos registros alterados; o cliente decide se precisa
+    buscar o dataset de novo. São notificadas as escritas feitas pela API e as
+    alterações nos arquivos de PUBLIC_DIR feitas fora do servidor.
+    
+    Com o cabeçalho Last-Event-ID (enviado pelo EventSource ao reconectar), os
+    eventos perdidos são reenviados; se não estiverem mais disponíveis, o stream
+    começa com um evento `reinicio`. Conexões ociosas recebem um comentário a
+    cada 15 segundos.
+    """
+    return StreamingResponse(
+        canal_eventos.transmitir(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def amostras_datasets(indice: int) -> List[Tuple[Dict[str, str], float]]:
+    """Registros (indice=0) ou bytes (indice=1) de cada dataset, sem carregar nenhum deles."""
+    tamanhos = armazenamento.tamanhos()
+    for nome, arquivo, registros in (
+        ("prompts", ARQUIVO_PROMPTS, lambda colecao: len(colecao.prompts)),
+        ("frases_do_dialogo", ARQUIVO_FRASES, lambda frases: len(frases.intermediarias) + 2)
+    ):
+        entrada = cache_datasets.entrada_atual(PUBLIC_DIR / arquivo)
+        tamanhos[nome] = (
+            registros(entrada.objeto) if entrada is not None else None,
+            tamanho_arquivos(PUBLIC_DIR / arquivo)
+        )
+    return [
+        ({"dataset": nome}, valores[indice])
+        for nome, valores in tamanhos.items() if valores[indice] is not None
+    ]
+
+
+registro_metricas.coletar(
+    "dataset_registros",
+    "gauge",
+    "Registros de cada dataset na versão em memória (ausente se ainda não foi carregado).",
+    lambda: amostras_datasets(0)
+)
+registro_metricas.coletar(
+    "dataset_bytes",
+    "gauge",
+    "Tamanho em bytes dos arquivos JSON de cada dataset.",
+    lambda: amostras_datasets(1)
+)
+registro_metricas.coletar(
+    "cache_datasets_consultas_total",
+    "counter",
+    "Consultas ao cache de datasets, por resultado.",
+    lambda: [
+        ({"resultado": resultado}, cache_datasets.estatisticas()[chave])
+        for resultado, chave in (("acerto", "acertos"), ("falha", "falhas"))
+    ]
+)
+registro_metricas.coletar(
+    "eventos_assinantes",
+    "gauge",
+    "Clientes conectados ao stream GET /api/eventos.",
+    lambda: [({}, canal_eventos.quantidade_assinantes())]
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metricas():
+    """
+    Métricas no formato de texto do Prometheus.
+    
+    Inclui histogramas de latência por rota, das fases internas dos handlers
+    (leitura, decodificacao, validacao, serializacao, compressao e gravacao),
+    registros e bytes de cada dataset e o uso do cache de datasets.
+    """
+    return Response(
+        content=registro_metricas.exportar(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def tarefas_aquecimento() -> Dict[str, Callable[[], Any]]:
+    """
+    Carga de cada dataset no aquecimento: valida, guarda no cache e constrói os
+    índices e o JSON que as primeiras requisições usariam.
+    """
+    def conhecimento():
+        entrada = armazenamento.entrada_conhecimento()
+        entrada.derivado("json", to_json)
+        armazenamento.busca_conhecimentos()
+    
+    def historico():
+        entrada = armazenamento.entrada_historico()
+        entrada.derivado("json", serializar_historico)
+        armazenamento.consultar_historico(entrada, limite=1)
+        armazenamento.estatisticas_historico(entrada)
+        armazenamento.agendador_revisao(entrada)
+    
+    def prompts():
+        entrada = obter_entrada_prompts()
+        entrada.derivado("json", to_json)
+        documento_prompts(entrada)
+        templates_prompts(entrada)
+    
+    def frases_do_dialogo():
+        obter_entrada_frases().derivado("json", to_json)
+    
+    return {
+        "base_de_conhecimento": conhecimento,
+        "historico_de_pratica": historico,
+        "prompts": prompts,
+        "frases_do_dialogo": frases_do_dialogo
+    }
+
+
+@app.get("/health/ready", response_model=EstadoProntidao, responses={503: {"model": EstadoProntidao}})
+def get_prontidao():
+    """
+    Prontidão do servidor e tempo de carga de cada dataset no aquecimento.
+    
+    Returns:
+        200 se todos os datasets foram carregados e validados na inicialização;
+        503 (com o erro de cada dataset) caso contrário.
+    """
+    estado = aquecimento.prontidao()
+    return JSONResponse(status_code=200 if estado.pronto else 503, content=estado.model_dump(mode="json"))
+
+
 if __name__ == "__main__":
     import uvicorn
     
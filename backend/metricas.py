@@ -0,0 +1,239 @@
+"""
+Métricas da API no formato de texto do Prometheus (exposto em /metrics).
+
+Contadores e histogramas ficam em memória, com uma trava por métrica: registrar
+uma observação custa um bisect e alguns incrementos, então a instrumentação pode
+ficar sempre ligada. Valores que só fazem sentido no momento da coleta (tamanho
+dos datasets, cache) são calculados por coletores registrados em Registro.coletar.
+
+As fases internas dos handlers (leitura, decodificação, validação, serialização,
+gravação) são medidas com medir(fase) e rotuladas com a rota da requisição em
+andamento, definida pelo MiddlewareMetricas.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Limites (segundos) dos buckets dos histogramas de duração
+LIMITES_DURACAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROTA_DESCONHECIDA = "desconhecida"
+
+# Amostra de uma métrica calculada na coleta: (rótulos, valor)
+Amostra = Tuple[Dict[str, str], float]
+
+# Escopo ASGI da requisição em andamento (a rota é preenchida pelo roteador)
+_escopo_atual: ContextVar[Optional[dict]] = ContextVar("escopo_atual", default=None)
+
+
+def _valor(numero: float) -> str:
+    if numero == float("inf"):
+        return "+Inf"
+    if float(numero).is_integer():
+        return str(int(numero))
+    return repr(float(numero))
+
+
+def _rotulos(rotulos: Dict[str, str]) -> str:
+    if not rotulos:
+        return ""
+    pares = []
+    for nome, valor in rotulos.items():
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pares.append(f'{nome}="{valor}"')
+    return "{" + ",".join(pares) + "}"
+
+
+class Contador:
+    """Contador monotônico com rótulos."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._trava = threading.Lock()
+
+    def incrementar(self, *valores: str, quantidade: float = 1) -> None:
+        with self._trava:
+            self._valores[valores] = self._valores.get(valores, 0) + quantidade
+
+    def valor(self, *valores: str) -> float:
+        with self._trava:
+            return self._valores.get(valores, 0)
+
+    def exportar(self) -> List[str]:
+        with self._trava:
+            valores = sorted(self._valores.items())
+        return [
+            f"{self.nome}{_rotulos(dict(zip(self.rotulos, chave)))} {_valor(valor)}"
+            for chave, valor in valores
+        ]
+
+
+class Histograma:
+    """Histograma com buckets fixos, soma e contagem por combinação de rótulos."""
+
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Sequence[str] = (),
+        limites: Sequence[float] = LIMITES_DURACAO
+    ):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.limites = tuple(limites)
+        # Rótulos → [contagem de cada bucket (não acumulada) + excedentes, soma]
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._trava = threading.Lock()
+
+    def observar(self, valor: float, *valores: str) -> None:
+        bucket = bisect_left(self.limites, valor)
+        with self._trava:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = ([0] * (len(self.limites) + 1), [0.0])
+            serie[0][bucket] += 1
+            serie[1][0] += valor
+
+    def contagem(self, *valores: str) -> int:
+        with self._trava:
+            serie = self._series.get(valores)
+            return sum(serie[0]) if serie else 0
+
+    def exportar(self) -> List[str]:
+        with self._trava:
+            series = sorted((chave, list(contagens), soma[0]) for chave, (contagens, soma) in self._series.items())
+        linhas = []
+        for chave, contagens, soma in series:
+            rotulos = dict(zip(self.rotulos, chave))
+            acumulado = 0
+            for limite, quantidade in zip((*self.limites, float("inf")), contagens):
+                acumulado += quantidade
+                linhas.append(f"{self.nome}_bucket{_rotulos({**rotulos, 'le': _valor(limite)})} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_rotulos(rotulos)} {_valor(soma)}")
+            linhas.append(f"{self.nome}_count{_rotulos(rotulos)} {acumulado}")
+        return linhas
+
+
+class Registro:
+    """Conjunto de métricas exportadas juntas."""
+
+    def __init__(self):
+        self._metricas: List[object] = []
+        # (nome, tipo, ajuda, função que retorna as amostras no momento da coleta)
+        self._coletores: List[Tuple[str, str, str, Callable[[], List[Amostra]]]] = []
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        metrica = Contador(nome, ajuda, rotulos)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histograma(self, nome: str, ajuda: str, rotulos: Sequence[str] = (), limites: Sequence[float] = LIMITES_DURACAO) -> Histograma:
+        metrica = Histograma(nome, ajuda, rotulos, limites)
+        self._metricas.append(metrica)
+        return metrica
+
+    def coletar(self, nome: str, tipo: str, ajuda: str, amostras: Callable[[], List[Amostra]]) -> None:
+        """Registra uma métrica (gauge ou counter) calculada a cada exportação."""
+        self._coletores.append((nome, tipo, ajuda, amostras))
+
+    def exportar(self) -> str:
+        """Todas as métricas no formato de texto 0.0.4 do Prometheus."""
+        linhas = []
+        for metrica in self._metricas:
+            linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(metrica.exportar())
+        for nome, tipo, ajuda, amostras in self._coletores:
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            linhas.extend(f"{nome}{_rotulos(rotulos)} {_valor(valor)}" for rotulos, valor in amostras())
+        return "\n".join(linhas) + "\n"
+
+
+registro = Registro()
+
+DURACAO_REQUISICAO = registro.histograma(
+    "api_requisicao_duracao_segundos",
+    "Duração das requisições HTTP por método e rota (em streaming, até o primeiro bloco do corpo).",
+    ("metodo", "rota")
+)
+REQUISICOES = registro.contador(
+    "api_requisicoes_total",
+    "Requisições HTTP concluídas por método, rota e status.",
+    ("metodo", "rota", "status")
+)
+DURACAO_FASE = registro.histograma(
+    "api_fase_duracao_segundos",
+    "Duração das fases internas dos handlers (leitura, decodificacao, validacao, serializacao, compressao, gravacao).",
+    ("fase", "rota")
+)
+
+
+def rota_atual() -> str:
+    """Modelo de caminho da rota da requisição em andamento (ex.: /api/prompts)."""
+    escopo = _escopo_atual.get()
+    rota = escopo.get("route") if escopo is not None else None
+    return getattr(rota, "path", ROTA_DESCONHECIDA)
+
+
+@contextmanager
+def medir(fase: str) -> Iterator[None]:
+    """Mede a duração do bloco como uma fase da requisição em andamento."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        DURACAO_FASE.observar(time.perf_counter() - inicio, fase, rota_atual())
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que mede cada requisição HTTP por método e rota.
+
+    A rota é o modelo de caminho da rota do FastAPI (sem os parâmetros), então
+    a cardinalidade dos rótulos é limitada ao número de endpoints. Respostas em
+    streaming (corpo em várias mensagens, como NDJSON e /api/eventos) entram no
+    histograma com o tempo até o primeiro bloco do corpo, e não com a duração da
+    conexão, que no SSE pode ser de minutos.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+        # Instante do primeiro bloco de um corpo em streaming
+        primeiro_bloco: List[float] = []
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status[0] = mensagem["status"]
+            elif mensagem["type"] == "http.response.body" and not primeiro_bloco and mensagem.get("more_body"):
+                primeiro_bloco.append(time.perf_counter())
+            await send(mensagem)
+
+        token = _escopo_atual.set(scope)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = (primeiro_bloco[0] if primeiro_bloco else time.perf_counter()) - inicio
+            rota = getattr(scope.get("route"), "path", ROTA_DESCONHECIDA)
+            DURACAO_REQUISICAO.observar(duracao, scope["method"], rota)
+            REQUISICOES.incrementar(scope["method"], rota, str(status[0]))
+            _escopo_atual.reset(token)
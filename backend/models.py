@@ -2,10 +2,10 @@
 Modelos Pydantic2 para os schemas JSON do sistema de estudo de idiomas.
 Baseado nos schemas JSON da pasta /public com [SCHEMA] no nome.
 """
-from datetime import datetime
-from typing import List, Optional, Literal, Any, Dict, Union
+from datetime import date, datetime
+from typing import Annotated, List, Optional, Literal, Any, Dict, Union
 from uuid import UUID
-from pydantic import BaseModel, Field, field_validator, model_validator, HttpUrl
+from pydantic import BaseModel, Field, field_validator, model_validator, HttpUrl, TypeAdapter
 from enum import Enum
 
 
@@ -145,6 +145,22 @@ class ColecaoPrompts(BaseModel):
     )
 
 
+class RenderizacaoPrompt(BaseModel):
+    """Lote de conjuntos de parâmetros para renderizar um prompt."""
+    parametros: List[Dict[str, Union[str, int, float]]] = Field(
+        ...,
+        min_length=1,
+        max_length=10000,
+        description="Um conjunto por renderização, com exatamente os parâmetros declarados no prompt."
+    )
+
+
+class PromptRenderizado(BaseModel):
+    """Textos do prompt renderizado, na ordem dos conjuntos de parâmetros."""
+    prompt_id: str
+    resultados: List[str]
+
+
 # ============================================================================
 # Modelos para: [BASE][SCHEMA] Histórico de Prática.json
 # ============================================================================
@@ -266,12 +282,8 @@ class ResultadoPronunciaNumeros(BaseModel):
     acertou: bool = Field(..., description="Se o usuário acertou a pronúncia")
 
 
-class ExercicioPratica(BaseModel):
-    """
-    Representa um exercício de prática realizado pelo usuário.
-    Schema: Valida uma lista de exercícios de prática de idiomas.
-    A estrutura de resultado_exercicio varia conforme o tipo_pratica (oneOf no schema).
-    """
+class ExercicioPraticaBase(BaseModel):
+    """Campos comuns a todo exercício de prática, independentes do tipo_pratica."""
     data_hora: datetime = Field(
         ...,
         description="Data e hora em que o exercício foi realizado, em formato ISO 8601."
@@ -288,20 +300,18 @@ class ExercicioPratica(BaseModel):
         ...,
         description="O idioma que está sendo praticado."
     )
-    tipo_pratica: TipoPratica = Field(
-        ...,
-        description="O tipo de exercício de prática realizado."
-    )
-    resultado_exercicio: Union[
-        ResultadoTraducao,
-        ResultadoAudicao,
-        ResultadoPronuncia,
-        ResultadoDialogo,
-        ResultadoPronunciaNumeros
-    ] = Field(
-        ...,
-        description="Um objeto contendo os resultados detalhados do exercício, cuja estrutura varia com o 'tipo_pratica'."
-    )
+
+
+# ----------------------------------------------------------------------------
+# Exercícios por tipo de prática (união discriminada por tipo_pratica)
+# O pydantic-core escolhe o modelo pelo valor de tipo_pratica e valida o registro
+# uma única vez, sem testar os cinco resultados possíveis.
+# ----------------------------------------------------------------------------
+
+class ExercicioTraducao(ExercicioPraticaBase):
+    """Exercício de tradução."""
+    tipo_pratica: Literal[TipoPratica.TRADUCAO]
+    resultado_exercicio: ResultadoTraducao
 
     model_config = {
         "json_schema_extra": {
@@ -322,16 +332,128 @@ class ExercicioPratica(BaseModel):
     }
 
 
+class ExercicioAudicao(ExercicioPraticaBase):
+    """Exercício de audição."""
+    tipo_pratica: Literal[TipoPratica.AUDICAO]
+    resultado_exercicio: ResultadoAudicao
+
+
+class ExercicioPronuncia(ExercicioPraticaBase):
+    """Exercício de pronúncia."""
+    tipo_pratica: Literal[TipoPratica.PRONUNCIA]
+    resultado_exercicio: ResultadoPronuncia
+
+
+class ExercicioDialogo(ExercicioPraticaBase):
+    """Exercício de diálogo."""
+    tipo_pratica: Literal[TipoPratica.DIALOGO]
+    resultado_exercicio: ResultadoDialogo
+
+
+class ExercicioPronunciaNumeros(ExercicioPraticaBase):
+    """Exercício de pronúncia de números."""
+    tipo_pratica: Literal[TipoPratica.PRONUNCIA_DE_NUMEROS]
+    resultado_exercicio: ResultadoPronunciaNumeros
+
+
+ExercicioPraticaPorTipo = Annotated[
+    Union[
+        ExercicioTraducao,
+        ExercicioAudicao,
+        ExercicioPronuncia,
+        ExercicioDialogo,
+        ExercicioPronunciaNumeros
+    ],
+    Field(discriminator="tipo_pratica")
+]
+
+# Validador reutilizável de um único exercício (ex.: linhas do segmento JSON Lines)
+ADAPTADOR_EXERCICIO: TypeAdapter[ExercicioPraticaPorTipo] = TypeAdapter(ExercicioPraticaPorTipo)
+
+# Nome usado pelo schema (um exercício de prática de qualquer tipo)
+ExercicioPratica = ExercicioPraticaPorTipo
+
+
 class HistoricoPratica(BaseModel):
     """
     Schema de Exercícios de Idiomas - Valida uma lista de exercícios de prática de idiomas.
     """
-    exercicios: List[ExercicioPratica] = Field(
+    exercicios: List[ExercicioPraticaPorTipo] = Field(
         ...,
         description="Uma lista de exercícios realizados."
     )
 
 
+class PaginaHistoricoPratica(HistoricoPratica):
+    """
+    Página do histórico de prática retornada pela API, do mais recente ao mais antigo
+    quando há filtros ou paginação.
+    """
+    proximo_cursor: Optional[str] = Field(
+        None,
+        description="Cursor opaco para a próxima página, ou null se não houver mais itens."
+    )
+
+
+class ContagemPratica(BaseModel):
+    """Quantidade de exercícios e de acertos de um recorte do histórico."""
+    total: int = Field(..., ge=0, description="Número de exercícios.")
+    acertos: int = Field(..., ge=0, description="Número de exercícios corretos.")
+    taxa_acerto: float = Field(..., ge=0, le=1, description="acertos / total, ou 0 se não houver exercícios.")
+
+
+class EstatisticasPratica(ContagemPratica):
+    """
+    Estatísticas do histórico de prática retornadas pela API.
+    Um exercício conta como acerto com todos os campos corretos (tradução), correto
+    (audição), "Sim" (pronúncia e diálogo) ou acertou (pronúncia de números).
+    """
+    por_idioma: Dict[Idioma, ContagemPratica] = Field(..., description="Totais por idioma.")
+    por_tipo_pratica: Dict[TipoPratica, ContagemPratica] = Field(..., description="Totais por tipo de prática.")
+    por_dia: Dict[date, ContagemPratica] = Field(..., description="Totais por dia (UTC) de data_hora.")
+
+
+class ItemRevisao(BaseModel):
+    """Conhecimento na fila de revisão espaçada, com o estado calculado do histórico."""
+    conhecimento_id: UUID = Field(..., description="Conhecimento a revisar.")
+    idioma: Idioma = Field(..., description="Idioma da prática mais recente do conhecimento.")
+    vencimento: datetime = Field(..., description="Momento (UTC) a partir do qual a revisão é devida.")
+    ultima_pratica: datetime = Field(..., description="data_hora do exercício mais recente do conhecimento.")
+    intervalo_dias: float = Field(..., ge=0, description="Intervalo atual entre revisões, em dias.")
+    repeticoes: int = Field(..., ge=0, description="Práticas aprovadas consecutivas.")
+    facilidade: float = Field(..., ge=1.3, description="Fator de crescimento do intervalo (SM-2).")
+    exercicios: int = Field(..., ge=1, description="Número de exercícios do conhecimento no histórico.")
+
+
+class FilaRevisao(BaseModel):
+    """Conhecimentos com revisão vencida, do mais atrasado ao mais recente."""
+    itens: List[ItemRevisao]
+
+
+class CargaDataset(BaseModel):
+    """Resultado da carga de um dataset no aquecimento do servidor."""
+    pronto: bool = Field(..., description="Se o dataset foi carregado e validado sem erros.")
+    duracao_ms: Optional[float] = Field(None, ge=0, description="Tempo de carga, validação e índices, em milissegundos.")
+    erro: Optional[str] = Field(None, description="Mensagem de erro, se a carga falhou.")
+
+
+class EstadoProntidao(BaseModel):
+    """Prontidão do servidor: todos os datasets carregados no aquecimento."""
+    pronto: bool = Field(..., description="Se o aquecimento terminou e todos os datasets estão prontos.")
+    duracao_ms: Optional[float] = Field(None, ge=0, description="Duração total do aquecimento, em milissegundos.")
+    datasets: Dict[str, CargaDataset] = Field(..., description="Carga de cada dataset.")
+
+
+class EventoAlteracao(BaseModel):
+    """Notificação de que um dataset mudou, enviada pelo stream GET /api/eventos."""
+    id: int = Field(..., ge=1, description="Número sequencial do evento (Last-Event-ID ao reconectar).")
+    dataset: str = Field(..., description="Dataset alterado (ex.: base_de_conhecimento, prompts).")
+    versao: str = Field(..., description="ETag da nova versão, o mesmo devolvido pelo GET do dataset.")
+    ids: Optional[List[str]] = Field(None, description="IDs dos registros alterados; null se o dataset inteiro pode ter mudado.")
+    origem: Literal["servidor", "externa"] = Field(..., description="Escrita pela API ou alteração do arquivo fora do servidor.")
+    data_hora: datetime = Field(..., description="Momento (UTC) em que a alteração foi detectada.")
+
+
 # ============================================================================
 # Modelos para: [BASE][SCHEMA] Frases do diálogo.json
 # ============================================================================
@@ -0,0 +1,180 @@
+"""
+Aplicação de JSON Patch (RFC 6902) sobre documentos JSON em memória.
+
+O documento original não é alterado: apenas os objetos e listas no caminho de
+cada operação são copiados (rasos), e o restante é compartilhado com o original.
+Assim quem chama pode identificar, por identidade, quais partes mudaram.
+"""
+import copy
+from typing import Any, Dict, List, Set
+
+
+OPERACOES = ("add", "remove", "replace", "move", "copy", "test")
+
+
+class PatchInvalido(ValueError):
+    """Patch malformado (operação desconhecida, membro ausente, ponteiro inválido)."""
+
+
+class PatchConflitante(PatchInvalido):
+    """Patch bem formado que não se aplica ao documento (caminho inexistente, test falhou)."""
+
+
+def interpretar_ponteiro(ponteiro: Any) -> List[str]:
+    """Divide um JSON Pointer (RFC 6901) em tokens, desfazendo ~1 e ~0."""
+    if not isinstance(ponteiro, str) or (ponteiro and not ponteiro.startswith("/")):
+        raise PatchInvalido(f"JSON Pointer inválido: {ponteiro!r}")
+    if not ponteiro:
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in ponteiro[1:].split("/")]
+
+
+def _indice(lista: list, token: str, ponteiro: str, inserir: bool = False) -> int:
+    """Índice de lista do token; com inserir, aceita "-" e o tamanho da lista (final)."""
+    if inserir and token == "-":
+        return len(lista)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchInvalido(f"Índice de lista inválido em {ponteiro}: {token!r}")
+    indice = int(token)
+    if indice > len(lista) or (indice == len(lista) and not inserir):
+        raise PatchConflitante(f"Índice fora da lista em {ponteiro}: {indice}")
+    return indice
+
+
+def _iguais(a: Any, b: Any) -> bool:
+    """Igualdade JSON: números pelo valor, mas booleanos não são números."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_iguais(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_iguais(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+class _Documento:
+    """Documento em edição, copiando cada recipiente alterado uma única vez."""
+
+    def __init__(self, raiz: Any):
+        # A raiz fica em uma lista para que o ponteiro "" também possa ser substituído
+        self.suporte = [raiz]
+        self._copiados: Set[int] = {id(self.suporte)}
+
+    def _proprio(self, pai: Any, chave: Any) -> Any:
+        """Recipiente pai[chave], copiado se ainda for compartilhado com o original."""
+        filho = pai[chave]
+        if isinstance(filho, (dict, list)) and id(filho) not in self._copiados:
+            filho = copy.copy(filho)
+            self._copiados.add(id(filho))
+            pai[chave] = filho
+        return filho
+
+    def ler(self, ponteiro: str) -> Any:
+        valor = self.suporte[0]
+        for token in interpretar_ponteiro(ponteiro):
+            if isinstance(valor, dict):
+                if token not in valor:
+                    raise PatchConflitante(f"Caminho inexistente: {ponteiro}")
+                valor = valor[token]
+            elif isinstance(valor, list):
+                valor = valor[_indice(valor, token, ponteiro)]
+            else:
+                raise PatchConflitante(f"Caminho inexistente: {ponteiro}")
+        return valor
+
+    def recipiente(self, ponteiro: str):
+        """(recipiente próprio do último token, último token); (suporte, 0) para a raiz."""
+        tokens = interpretar_ponteiro(ponteiro)
+        if not tokens:
+            return self.suporte, 0
+        atual = self._proprio(self.suporte, 0)
+        for token in tokens[:-1]:
+            if isinstance(atual, dict):
+                if token not in atual:
+                    raise PatchConflitante(f"Caminho inexistente: {ponteiro}")
+                atual = self._proprio(atual, token)
+            elif isinstance(atual, list):
+                atual = self._proprio(atual, _indice(atual, token, ponteiro))
+            else:
+                raise PatchConflitante(f"Caminho inexistente: {ponteiro}")
+        if not isinstance(atual, (dict, list)):
+            raise PatchConflitante(f"Caminho inexistente: {ponteiro}")
+        return atual, tokens[-1]
+
+    def adicionar(self, ponteiro: str, valor: Any) -> None:
+        recipiente, token = self.recipiente(ponteiro)
+        if recipiente is self.suporte or isinstance(recipiente, dict):
+            recipiente[token] = valor
+        else:
+            recipiente.insert(_indice(recipiente, token, ponteiro, inserir=True), valor)
+
+    def remover(self, ponteiro: str) -> Any:
+        recipiente, token = self.recipiente(ponteiro)
+        if recipiente is self.suporte:
+            raise PatchInvalido("Não é possível remover a raiz do documento")
+        if isinstance(recipiente, dict):
+            if token not in recipiente:
+                raise PatchConflitante(f"Caminho inexistente: {ponteiro}")
+            return recipiente.pop(token)
+        return recipiente.pop(_indice(recipiente, token, ponteiro))
+
+    def substituir(self, ponteiro: str, valor: Any) -> None:
+        recipiente, token = self.recipiente(ponteiro)
+        if isinstance(recipiente, dict) and recipiente is not self.suporte:
+            if token not in recipiente:
+                raise PatchConflitante(f"Caminho inexistente: {ponteiro}")
+            recipiente[token] = valor
+        elif recipiente is self.suporte:
+            recipiente[0] = valor
+        else:
+            recipiente[_indice(recipiente, token, ponteiro)] = valor
+
+
+def aplicar_patch(documento: Any, operacoes: List[Dict[str, Any]]) -> Any:
+    """
+    Aplica as operações em ordem e retorna o novo documento.
+
+    Objetos e listas que não estão no caminho de nenhuma operação são os mesmos
+    objetos do documento original (identidade preservada).
+
+    Raises:
+        PatchInvalido: Se o patch for malformado.
+        PatchConflitante: Se um caminho não existir ou uma operação test falhar.
+    """
+    if not isinstance(operacoes, list):
+        raise PatchInvalido("O patch deve ser uma lista de operações")
+
+    edicao = _Documento(documento)
+    for numero, operacao in enumerate(operacoes):
+        if not isinstance(operacao, dict) or operacao.get("op") not in OPERACOES:
+            raise PatchInvalido(f"Operação {numero}: 'op' deve ser um de {', '.join(OPERACOES)}")
+        op = operacao["op"]
+        obrigatorios = ["path"] + (["value"] if op in ("add", "replace", "test") else []) \
+            + (["from"] if op in ("move", "copy") else [])
+        ausentes = [membro for membro in obrigatorios if membro not in operacao]
+        if ausentes:
+            raise PatchInvalido(f"Operação {numero} ({op}): membro ausente: {', '.join(ausentes)}")
+
+        caminho = operacao["path"]
+        try:
+            if op == "add":
+                edicao.adicionar(caminho, copy.deepcopy(operacao["value"]))
+            elif op == "remove":
+                edicao.remover(caminho)
+            elif op == "replace":
+                edicao.substituir(caminho, copy.deepcopy(operacao["value"]))
+            elif op == "move":
+                origem = operacao["from"]
+                if caminho != origem and caminho.startswith(origem + "/"):
+                    raise PatchInvalido(f"Não é possível mover {origem} para dentro de si mesmo")
+                edicao.ler(origem)
+                if caminho != origem:
+                    edicao.adicionar(caminho, edicao.remover(origem))
+            elif op == "copy":
+                edicao.adicionar(caminho, copy.deepcopy(edicao.ler(operacao["from"])))
+            elif not _iguais(edicao.ler(caminho), operacao["value"]):
+                raise PatchConflitante(f"test falhou em {caminho}")
+        except PatchInvalido as e:
+            raise type(e)(f"Operação {numero} ({op}): {e}") from None
+
+    return edicao.suporte[0]
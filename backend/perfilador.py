@@ -0,0 +1,244 @@
+"""
+Perfilador opcional de requisições, para diagnosticar endpoints lentos offline.
+
+Uma requisição selecionada (por amostragem ou pelo cabeçalho X-Perfilar) é medida
+com cProfile nos trechos que executam o trabalho do handler: a validação do corpo
+na thread do event loop e a thread do pool que executa os handlers síncronos
+(RotaPerfilavel), e a thread do escritor do dataset (EscritorDataset usa perfilar()). As medições são somadas em um único arquivo .pstats, que pode ser
+aberto com pstats, snakeviz ou gprof2dot. Em paralelo, uma thread amostra as
+pilhas dessas threads e da thread do event loop e grava um arquivo .collapsed
+("a;b;c contagem" por linha), o formato de entrada de flamegraph.pl e speedscope.
+
+Só um cProfile fica ativo por vez no processo (a partir do Python 3.12 um segundo
+enable() levanta ValueError): trechos aninhados, ou com outra ferramenta de perfil
+já ativa, ficam só nas amostras de pilha. Só uma requisição é perfilada por vez; as
+demais seguem sem perfil.
+"""
+import asyncio
+import cProfile
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Set
+
+import anyio
+from fastapi.routing import APIRoute
+
+
+CABECALHO = "x-perfilar"
+# Intervalo entre amostras de pilha (segundos)
+INTERVALO_AMOSTRAS = 0.001
+
+_sessao_atual: ContextVar[Optional["SessaoPerfil"]] = ContextVar("sessao_perfil", default=None)
+# Uma requisição perfilada por vez
+_em_uso = threading.Lock()
+# Um cProfile ativo por vez no processo
+_perfil_ativo = threading.Lock()
+
+
+def _quadro(frame) -> str:
+    codigo = frame.f_code
+    return f"{codigo.co_name} ({Path(codigo.co_filename).name}:{codigo.co_firstlineno})"
+
+
+class SessaoPerfil:
+    """Perfis (um por trecho de thread) e amostras de pilha de uma requisição."""
+
+    def __init__(self):
+        self._perfis: List[cProfile.Profile] = []
+        self._threads: Set[int] = set()
+        self._amostras: Counter = Counter()
+        self._trava = threading.Lock()
+        self._ativa = threading.Event()
+        self._amostrador: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        self._ativa.set()
+        self._amostrador = threading.Thread(target=self._amostrar, name="perfilador", daemon=True)
+        self._amostrador.start()
+
+    def encerrar(self) -> None:
+        self._ativa.clear()
+        if self._amostrador is not None:
+            self._amostrador.join()
+
+    def executar(self, funcao: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Executa funcao na thread atual com amostragem de pilha e, se nenhum outro
+        perfil estiver ativo, com cProfile.
+        """
+        ident = threading.get_ident()
+        self.acompanhar(ident)
+        perfil = self._ativar_perfil()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            if perfil is not None:
+                perfil.disable()
+                _perfil_ativo.release()
+            with self._trava:
+                self._threads.discard(ident)
+                if perfil is not None:
+                    self._perfis.append(perfil)
+
+    @staticmethod
+    def _ativar_perfil() -> Optional[cProfile.Profile]:
+        if not _perfil_ativo.acquire(blocking=False):
+            return None
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outra ferramenta de perfil ativa (ex.: depurador, cobertura)
+            _perfil_ativo.release()
+            return None
+        return perfil
+
+    def acompanhar(self, ident: int) -> None:
+        """Inclui a thread `ident` na amostragem de pilhas."""
+        with self._trava:
+            self._threads.add(ident)
+
+    def liberar(self, ident: int) -> None:
+        with self._trava:
+            self._threads.discard(ident)
+
+    def _amostrar(self) -> None:
+        proprio = threading.get_ident()
+        while self._ativa.is_set():
+            time.sleep(INTERVALO_AMOSTRAS)
+            with self._trava:
+                threads = set(self._threads)
+            for ident, frame in sys._current_frames().items():
+                if ident not in threads or ident == proprio:
+                    continue
+                pilha = []
+                while frame is not None:
+                    pilha.append(_quadro(frame))
+                    frame = frame.f_back
+                self._amostras[";".join(reversed(pilha))] += 1
+
+    def salvar(self, base: Path) -> None:
+        """
+        Grava base.pstats (perfis somados) e base.collapsed (pilhas amostradas).
+
+        Sem nenhum trecho medido com cProfile (handler assíncrono que não usa
+        outras threads, ou outra ferramenta de perfil ativa), só o .collapsed é gravado.
+        """
+        with self._trava:
+            perfis = list(self._perfis)
+        if perfis:
+            estatisticas = pstats.Stats(perfis[0])
+            for perfil in perfis[1:]:
+                estatisticas.add(perfil)
+            estatisticas.dump_stats(base.with_suffix(".pstats"))
+        with open(base.with_suffix(".collapsed"), "w", encoding="utf-8") as f:
+            for pilha, contagem in sorted(self._amostras.items()):
+                f.write(f"{pilha} {contagem}\n")
+
+
+def perfilar(funcao: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Envolve funcao para ser perfilada quando chamada durante uma requisição perfilada.
+
+    A sessão é procurada no momento da chamada, nas variáveis de contexto; fora de
+    uma requisição perfilada o custo é uma consulta a ContextVar.
+    """
+    @wraps(funcao)
+    def envolvida(*args: Any, **kwargs: Any) -> Any:
+        sessao = _sessao_atual.get()
+        if sessao is None:
+            return funcao(*args, **kwargs)
+        return sessao.executar(funcao, *args, **kwargs)
+    return envolvida
+
+
+class RotaPerfilavel(APIRoute):
+    """
+    Rota cujo handler síncrono (executado no pool de threads) pode ser perfilado.
+
+    A validação do corpo pelo Pydantic, que o FastAPI faz na thread do event loop
+    antes de chamar o handler (síncrono ou não), também é perfilada: é uma chamada
+    síncrona, então o cProfile não mede outras tarefas do event loop.
+    """
+
+    def get_route_handler(self):
+        chamada = self.dependant.call
+        if chamada is not None and not asyncio.iscoroutinefunction(chamada):
+            self.dependant.call = perfilar(chamada)
+        for campo in self.dependant.body_params:
+            campo.validate = perfilar(campo.validate)
+        return super().get_route_handler()
+
+
+def _nome_arquivo(metodo: str, caminho: str) -> str:
+    instante = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    trecho = re.sub(r"[^A-Za-z0-9_.-]+", "_", caminho.strip("/")) or "raiz"
+    return f"{instante}-{metodo}-{trecho[:80]}-{uuid.uuid4().hex[:8]}"
+
+
+class MiddlewarePerfilador:
+    """
+    Middleware ASGI que perfila uma fração das requisições.
+
+    Args:
+        diretorio: Pasta onde os perfis são gravados (criada se não existir).
+        taxa: Fração das requisições perfiladas (0 desliga a amostragem).
+        permitir_cabecalho: Se verdadeiro, "X-Perfilar: 1" perfila a requisição
+            independentemente da taxa.
+
+    O nome dos arquivos gravados é devolvido no cabeçalho X-Perfil.
+    """
+
+    def __init__(self, app, diretorio: Path, taxa: float = 0.0, permitir_cabecalho: bool = False):
+        self.app = app
+        self.diretorio = Path(diretorio)
+        self.taxa = taxa
+        self.permitir_cabecalho = permitir_cabecalho
+
+    def _selecionar(self, scope) -> bool:
+        if self.permitir_cabecalho:
+            for nome, valor in scope["headers"]:
+                if nome == CABECALHO.encode() and valor.strip() not in (b"", b"0"):
+                    return True
+        return self.taxa > 0 and random.random() < self.taxa
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selecionar(scope) or not _em_uso.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        nome = _nome_arquivo(scope["method"], scope["path"])
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                mensagem = {**mensagem, "headers": [*mensagem.get("headers", []), (b"x-perfil", nome.encode())]}
+            await send(mensagem)
+
+        sessao = SessaoPerfil()
+        token = _sessao_atual.set(sessao)
+        # Na thread do event loop, o cProfile só mede a validação do corpo; o resto é amostrado
+        ident = threading.get_ident()
+        sessao.acompanhar(ident)
+        sessao.iniciar()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            sessao.liberar(ident)
+            _sessao_atual.reset(token)
+            try:
+                await anyio.to_thread.run_sync(sessao.encerrar)
+                os.makedirs(self.diretorio, exist_ok=True)
+                await anyio.to_thread.run_sync(sessao.salvar, self.diretorio / nome)
+            finally:
+                _em_uso.release()
@@ -0,0 +1,141 @@
+"""
+Coleção de prompts como documento JSON editável por JSON Patch.
+
+O documento guarda, para cada prompt, o objeto validado, sua forma JSON e o
+fragmento já serializado. Um patch é aplicado sobre a forma JSON com cópia de
+caminho (patch_json), então os prompts que o patch não tocou continuam sendo os
+mesmos objetos: só os alterados são validados de novo e serializados, e a
+unicidade de prompt_id é conferida com um contador atualizado pela diferença.
+"""
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from models import ColecaoPrompts, Prompt
+from patch_json import aplicar_patch
+
+
+class ColecaoInvalida(ValueError):
+    """Coleção que passa na validação dos modelos, mas não nas regras da API."""
+
+
+def _fragmento(dados: Dict[str, Any], recuo: str) -> str:
+    texto = json.dumps(dados, ensure_ascii=False, indent=2)
+    return recuo + texto.replace("\n", "\n" + recuo)
+
+
+class DocumentoPrompts:
+    """
+    Versão imutável da coleção de prompts; aplicar() retorna uma nova versão.
+
+    Guardado como derivado da entrada do cache dos prompts e, após um patch,
+    armazenado junto com a nova entrada.
+    """
+
+    def __init__(self, colecao: ColecaoPrompts):
+        self._cabecalho = colecao.model_copy(update={"prompts": []})
+        self._campos = self._cabecalho.model_dump(mode='json', exclude={'prompts'})
+        self._prompts: List[Prompt] = list(colecao.prompts)
+        self._dados: List[Dict[str, Any]] = [p.model_dump(mode='json') for p in self._prompts]
+        # Fragmentos serializados sob demanda, na mesma posição dos prompts
+        self._fragmentos: List[Optional[str]] = [None] * len(self._prompts)
+        self._contagem = Counter(p.prompt_id for p in self._prompts)
+        # prompt_id dos prompts criados, alterados ou removidos pelo patch que gerou esta versão
+        self.alterados: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._prompts)
+
+    def colecao(self) -> ColecaoPrompts:
+        """Coleção validada correspondente a esta versão."""
+        return self._cabecalho.model_copy(update={"prompts": list(self._prompts)})
+
+    def documento(self) -> Dict[str, Any]:
+        """Forma JSON da coleção; as listas e objetos são compartilhados e não devem ser alterados."""
+        return {**self._campos, "prompts": self._dados}
+
+    def aplicar(self, operacoes: List[Dict[str, Any]]) -> "DocumentoPrompts":
+        """
+        Aplica um JSON Patch (RFC 6902) e retorna a nova versão da coleção.
+
+        Raises:
+            PatchInvalido: Se o patch for malformado.
+            PatchConflitante: Se o patch não se aplicar ao documento.
+            ValidationError: Se um prompt alterado ou os campos da coleção forem inválidos.
+            ColecaoInvalida: Se a coleção ficar vazia ou com prompt_id repetido.
+        """
+        documento = aplicar_patch(self.documento(), operacoes)
+
+        # Campos da coleção: validados de novo só se o patch os alterou
+        if not isinstance(documento, dict) or not isinstance(documento.get("prompts"), list):
+            ColecaoPrompts.model_validate(documento)
+        campos = {chave: valor for chave, valor in documento.items() if chave != "prompts"}
+        if campos == self._campos:
+            cabecalho = self._cabecalho
+        else:
+            cabecalho = ColecaoPrompts.model_validate({**campos, "prompts": []})
+            campos = cabecalho.model_dump(mode='json', exclude={'prompts'})
+
+        if not documento["prompts"]:
+            raise ColecaoInvalida("Coleção de prompts não pode estar vazia")
+
+        # Prompts intocados são os mesmos objetos de antes do patch
+        posicoes = {id(dados): posicao for posicao, dados in enumerate(self._dados)}
+        reaproveitados = set()
+        prompts, dados_novos, fragmentos = [], [], []
+        # Variação da contagem de cada prompt_id: +1 por prompt novo ou alterado, −1 por removido ou alterado
+        diferenca: Dict[str, int] = {}
+        for dados in documento["prompts"]:
+            posicao = posicoes.get(id(dados))
+            if posicao is not None and posicao not in reaproveitados:
+                reaproveitados.add(posicao)
+                prompts.append(self._prompts[posicao])
+                dados_novos.append(self._dados[posicao])
+                fragmentos.append(self._fragmentos[posicao])
+                continue
+            prompt = Prompt.model_validate(dados)
+            prompts.append(prompt)
+            dados_novos.append(prompt.model_dump(mode='json'))
+            fragmentos.append(None)
+            diferenca[prompt.prompt_id] = diferenca.get(prompt.prompt_id, 0) + 1
+        alterados = list(diferenca)
+        if len(reaproveitados) < len(self._prompts):
+            for posicao, prompt in enumerate(self._prompts):
+                if posicao not in reaproveitados:
+                    diferenca[prompt.prompt_id] = diferenca.get(prompt.prompt_id, 0) - 1
+
+        contagem = self._contagem
+        if any(diferenca.values()):
+            contagem = contagem.copy()
+            contagem.update(diferenca)
+            contagem = +contagem
+        if any(contagem[prompt_id] > 1 for prompt_id in alterados):
+            raise ColecaoInvalida("IDs de prompts devem ser únicos")
+
+        versao = object.__new__(DocumentoPrompts)
+        versao._cabecalho = cabecalho
+        versao._campos = campos
+        versao._prompts = prompts
+        versao._dados = dados_novos
+        versao._fragmentos = fragmentos
+        versao._contagem = contagem
+        versao.alterados = sorted(diferenca)
+        return versao
+
+    def serializar(self) -> str:
+        """
+        JSON da coleção, idêntico a json.dumps(colecao.model_dump(mode='json'), indent=2).
+
+        Só os prompts ainda não serializados nesta versão ou em versões anteriores
+        são convertidos; os demais reaproveitam o fragmento guardado.
+        """
+        for posicao, fragmento in enumerate(self._fragmentos):
+            if fragmento is None:
+                self._fragmentos[posicao] = _fragmento(self._dados[posicao], "    ")
+        linhas = [
+            f"  {json.dumps(chave, ensure_ascii=False)}: {_fragmento(valor, '  ')[2:]}"
+            for chave, valor in self._campos.items()
+        ]
+        prompts = "[\n" + ",\n".join(self._fragmentos) + "\n  ]" if self._fragmentos else "[]"
+        linhas.append(f'  "prompts": {prompts}')
+        return "{\n" + ",\n".join(linhas) + "\n}"
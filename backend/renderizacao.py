@@ -0,0 +1,150 @@
+"""
+Renderização dos templates de prompts com o marcador_de_paramentros da coleção.
+
+Cada template é compilado uma vez por versão da coleção em um plano: os trechos
+literais e, entre eles, os nomes dos parâmetros. Renderizar é só intercalar os
+valores com os trechos e juntar tudo com str.join, sem procurar marcadores de
+novo; um lote de conjuntos de parâmetros reaproveita a mesma lista de partes.
+"""
+import re
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Pattern, Sequence, Tuple
+
+from models import ColecaoPrompts, Prompt
+
+
+# Parte do marcador_de_paramentros substituída pelo nome do parâmetro (ex.: "{{param}}")
+NOME_NO_MARCADOR = "param"
+
+
+class ParametrosInvalidos(ValueError):
+    """Conjunto de parâmetros que não corresponde aos parâmetros do template."""
+
+    def __init__(self, indice: int, mensagem: str):
+        super().__init__(f"Conjunto de parâmetros {indice}: {mensagem}")
+        self.indice = indice
+
+
+@lru_cache(maxsize=16)
+def expressao_marcador(marcador: str) -> Pattern:
+    """
+    Expressão que encontra os parâmetros no formato do marcador (o nome no grupo 1).
+
+    Raises:
+        ValueError: Se o marcador não contiver "param" exatamente uma vez.
+    """
+    if marcador.count(NOME_NO_MARCADOR) != 1:
+        raise ValueError(f"marcador_de_paramentros deve conter '{NOME_NO_MARCADOR}' uma vez: {marcador!r}")
+    abertura, fechamento = marcador.split(NOME_NO_MARCADOR)
+    return re.compile(re.escape(abertura) + r"\s*(\w+)\s*" + re.escape(fechamento))
+
+
+def _lista(nomes: Sequence[str]) -> str:
+    return ", ".join(repr(nome) for nome in nomes)
+
+
+class TemplateCompilado:
+    """
+    Plano de renderização de um prompt.
+
+    `erros` lista as divergências entre os marcadores do template e os
+    parametros declarados; um template com erros não é renderizado.
+    """
+
+    __slots__ = ("prompt_id", "literais", "nomes", "parametros", "erros", "_valores")
+
+    def __init__(self, prompt: Prompt, expressao: Optional[Pattern], erro_marcador: Optional[str] = None):
+        self.prompt_id = prompt.prompt_id
+        self.parametros = frozenset(prompt.parametros)
+        self.erros: List[str] = []
+        if expressao is None:
+            self.literais: Tuple[str, ...] = (prompt.template,)
+            self.nomes: Tuple[str, ...] = ()
+            self.erros.append(erro_marcador or "marcador_de_paramentros inválido")
+            self._valores: Callable[[Mapping[str, Any]], Tuple[Any, ...]] = lambda valores: ()
+            return
+
+        # re.split com um grupo alterna literal, nome, literal, ..., literal
+        partes = expressao.split(prompt.template)
+        self.literais = tuple(partes[0::2])
+        self.nomes = tuple(partes[1::2])
+
+        usados = set(self.nomes)
+        nao_declarados = sorted(usados - self.parametros)
+        if nao_declarados:
+            self.erros.append(f"Parâmetros usados no template e não declarados: {_lista(nao_declarados)}")
+        nao_usados = sorted(self.parametros - usados)
+        if nao_usados:
+            self.erros.append(f"Parâmetros declarados e não usados no template: {_lista(nao_usados)}")
+
+        # itemgetter com um único nome retorna o valor, não uma tupla
+        if len(self.nomes) == 1:
+            nome = self.nomes[0]
+            self._valores = lambda valores: (valores[nome],)
+        elif self.nomes:
+            self._valores = itemgetter(*self.nomes)
+        else:
+            self._valores = lambda valores: ()
+
+    def _conferir(self, indice: int, valores: Mapping[str, Any]) -> None:
+        faltando = sorted(self.parametros - valores.keys())
+        if faltando:
+            raise ParametrosInvalidos(indice, f"faltam {_lista(faltando)}")
+        raise ParametrosInvalidos(indice, f"parâmetros desconhecidos {_lista(sorted(valores.keys() - self.parametros))}")
+
+    def renderizar_lote(self, lote: Sequence[Mapping[str, Any]]) -> List[str]:
+        """
+        Renderiza o template com cada conjunto de parâmetros (valores não textuais via str()).
+
+        Raises:
+            ParametrosInvalidos: Se um conjunto não tiver exatamente os parâmetros do prompt.
+        """
+        literais = self.literais
+        if len(literais) == 1:
+            for indice, valores in enumerate(lote):
+                if valores.keys() != self.parametros:
+                    self._conferir(indice, valores)
+            return [literais[0]] * len(lote)
+
+        quantidade = len(self.parametros)
+        valores_de = self._valores
+        partes: List[Any] = [None] * (2 * len(literais) - 1)
+        partes[0::2] = literais
+        resultados = []
+        for indice, valores in enumerate(lote):
+            if len(valores) != quantidade:
+                self._conferir(indice, valores)
+            try:
+                partes[1::2] = map(str, valores_de(valores))
+            except KeyError:
+                self._conferir(indice, valores)
+            resultados.append("".join(partes))
+        return resultados
+
+    def renderizar(self, valores: Mapping[str, Any]) -> str:
+        """Renderiza o template com um único conjunto de parâmetros."""
+        return self.renderizar_lote([valores])[0]
+
+
+class TemplatesCompilados:
+    """Templates de uma versão da coleção de prompts, compilados na construção."""
+
+    def __init__(self, colecao: ColecaoPrompts):
+        try:
+            expressao, erro = expressao_marcador(colecao.marcador_de_paramentros), None
+        except ValueError as e:
+            expressao, erro = None, str(e)
+        self._templates: Dict[str, TemplateCompilado] = {
+            prompt.prompt_id: TemplateCompilado(prompt, expressao, erro) for prompt in colecao.prompts
+        }
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def obter(self, prompt_id: str) -> Optional[TemplateCompilado]:
+        return self._templates.get(prompt_id)
+
+    def erros(self) -> Dict[str, List[str]]:
+        """Divergências de cada prompt cujo template não pode ser renderizado."""
+        return {prompt_id: t.erros for prompt_id, t in self._templates.items() if t.erros}
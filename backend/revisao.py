@@ -0,0 +1,207 @@
+"""
+Agendamento de revisões espaçadas a partir do histórico de prática.
+
+Cada conhecimento praticado tem um estado no estilo SM-2 (repetições, intervalo e
+facilidade), recalculado a partir da nota de cada exercício. Os vencimentos ficam
+em heaps (um geral e um por idioma), mantidos à medida que exercícios chegam;
+listar os k itens vencidos percorre apenas o topo do heap.
+"""
+import heapq
+from bisect import insort
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from concorrencia import TravaLeituraEscrita
+from indices import microssegundos
+from models import (
+    ExercicioPraticaBase,
+    Idioma,
+    ItemRevisao,
+    ResultadoCorrecao,
+    TipoPratica
+)
+
+
+MICROSSEGUNDOS_POR_DIA = 86_400_000_000
+FACILIDADE_INICIAL = 2.5
+FACILIDADE_MINIMA = 1.3
+# Nota mínima (0 a 100) para o exercício contar como lembrado
+NOTA_APROVACAO = 60
+
+_EPOCA = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NOTA_CORRECAO = {ResultadoCorrecao.SIM: 100, ResultadoCorrecao.PARCIAL: 50, ResultadoCorrecao.NAO: 0}
+
+# (vencimento em microssegundos, conhecimento_id, geração do estado)
+EntradaHeap = Tuple[int, UUID, int]
+
+
+def nota(exercicio: ExercicioPraticaBase) -> int:
+    """
+    Nota de 0 a 100 do exercício: fração de campos corretos na tradução,
+    correto/acertou na audição e na pronúncia de números, e Sim/Parcial/Não
+    na pronúncia e no diálogo.
+    """
+    resultado = exercicio.resultado_exercicio
+    if exercicio.tipo_pratica == TipoPratica.TRADUCAO:
+        campos = resultado.campos_resultados
+        return round(100 * sum(campos) / len(campos)) if campos else 0
+    if exercicio.tipo_pratica == TipoPratica.PRONUNCIA_DE_NUMEROS:
+        return 100 if resultado.acertou else 0
+    if exercicio.tipo_pratica == TipoPratica.AUDICAO:
+        return 100 if resultado.correto else 0
+    return _NOTA_CORRECAO[resultado.correto]
+
+
+def data_hora(instante: int) -> datetime:
+    """Converte microssegundos desde a época em datetime UTC."""
+    return _EPOCA + timedelta(microseconds=instante)
+
+
+class EstadoRevisao:
+    """Estado de revisão de um conhecimento, recalculado a partir das suas práticas."""
+
+    __slots__ = ("conhecimento_id", "idioma", "praticas", "repeticoes", "intervalo", "facilidade", "vencimento", "geracao")
+
+    def __init__(self, conhecimento_id: UUID, idioma: Idioma):
+        self.conhecimento_id = conhecimento_id
+        self.idioma = idioma
+        # (microssegundos, nota) em ordem cronológica
+        self.praticas: List[Tuple[int, int]] = []
+        self.geracao = 0
+        self._reiniciar()
+
+    def _reiniciar(self) -> None:
+        self.repeticoes = 0
+        self.intervalo = 0.0
+        self.facilidade = FACILIDADE_INICIAL
+        self.vencimento = 0
+
+    def aplicar(self, instante: int, valor: int) -> None:
+        """Atualiza o estado com uma prática posterior às já aplicadas (SM-2)."""
+        if valor >= NOTA_APROVACAO:
+            self.repeticoes += 1
+            if self.repeticoes == 1:
+                self.intervalo = 1.0
+            elif self.repeticoes == 2:
+                self.intervalo = 6.0
+            else:
+                self.intervalo *= self.facilidade
+        else:
+            self.repeticoes = 0
+            self.intervalo = 1.0
+        erro = 5 - valor / 20
+        self.facilidade = max(FACILIDADE_MINIMA, self.facilidade + 0.1 - erro * (0.08 + erro * 0.02))
+        self.vencimento = instante + round(self.intervalo * MICROSSEGUNDOS_POR_DIA)
+
+    def adicionar(self, instante: int, valor: int) -> None:
+        """Registra uma prática; fora de ordem, o estado é recalculado desde o início."""
+        if not self.praticas or instante >= self.praticas[-1][0]:
+            self.praticas.append((instante, valor))
+            self.aplicar(instante, valor)
+            return
+        insort(self.praticas, (instante, valor))
+        self._reiniciar()
+        for pratica in self.praticas:
+            self.aplicar(*pratica)
+
+    def item(self) -> ItemRevisao:
+        """Representação do estado retornada pela API."""
+        return ItemRevisao(
+            conhecimento_id=self.conhecimento_id,
+            idioma=self.idioma,
+            vencimento=data_hora(self.vencimento),
+            ultima_pratica=data_hora(self.praticas[-1][0]),
+            intervalo_dias=self.intervalo,
+            repeticoes=self.repeticoes,
+            facilidade=round(self.facilidade, 4),
+            exercicios=len(self.praticas)
+        )
+
+
+class AgendadorRevisao:
+    """
+    Fila de revisão dos conhecimentos praticados, ordenada por vencimento.
+
+    Guardado junto à entrada do cache do histórico; implementa adicionar(), então
+    acompanha os exercícios anexados sem ser reconstruído. Entradas antigas de um
+    item ficam no heap e são descartadas na leitura (a geração não confere); o
+    heap é reconstruído quando elas passam a ser maioria.
+    """
+
+    def __init__(self, exercicios: Iterable[ExercicioPraticaBase] = ()):
+        self._estados: Dict[UUID, EstadoRevisao] = {}
+        self._heaps: Dict[Optional[Idioma], List[EntradaHeap]] = {None: []}
+        self._trava = TravaLeituraEscrita()
+        self.adicionar(exercicios)
+
+    def __len__(self) -> int:
+        return len(self._estados)
+
+    def adicionar(self, exercicios: Iterable[ExercicioPraticaBase]) -> None:
+        """Aplica novos exercícios aos estados e reagenda os conhecimentos afetados."""
+        with self._trava.escrita():
+            praticas = sorted(
+                (microssegundos(e.data_hora), nota(e), e.conhecimento_id, e.idioma)
+                for e in exercicios
+            )
+            alterados = {}
+            for instante, valor, conhecimento_id, idioma in praticas:
+                estado = self._estados.get(conhecimento_id)
+                if estado is None:
+                    estado = self._estados[conhecimento_id] = EstadoRevisao(conhecimento_id, idioma)
+                estado.idioma = idioma
+                estado.adicionar(instante, valor)
+                alterados[conhecimento_id] = estado
+
+            for estado in alterados.values():
+                estado.geracao += 1
+                entrada = (estado.vencimento, estado.conhecimento_id, estado.geracao)
+                heapq.heappush(self._heaps[None], entrada)
+                heapq.heappush(self._heaps.setdefault(estado.idioma, []), entrada)
+
+            for chave, heap in self._heaps.items():
+                if len(heap) > 2 * len(self._estados) + 64:
+                    self._heaps[chave] = self._compactar(heap)
+
+    def _valida(self, entrada: EntradaHeap) -> Optional[EstadoRevisao]:
+        estado = self._estados[entrada[1]]
+        return estado if estado.geracao == entrada[2] else None
+
+    def _compactar(self, heap: List[EntradaHeap]) -> List[EntradaHeap]:
+        validas = [entrada for entrada in heap if self._valida(entrada) is not None]
+        heapq.heapify(validas)
+        return validas
+
+    def vencidos(
+        self,
+        ate: datetime,
+        limite: int,
+        idioma: Optional[Idioma] = None,
+        aceitar: Callable[[UUID], bool] = lambda conhecimento_id: True
+    ) -> List[ItemRevisao]:
+        """
+        Até `limite` conhecimentos com vencimento até `ate`, do mais atrasado ao mais recente.
+
+        Percorre o heap em ordem sem removê-lo: cada nó visitado acrescenta os filhos
+        a uma fronteira, então o custo depende de `limite` e não do número de itens.
+
+        Args:
+            aceitar: Filtro adicional (ex.: o conhecimento ainda existe na base).
+        """
+        limite_us = microssegundos(ate)
+        itens: List[ItemRevisao] = []
+        with self._trava.leitura():
+            heap = self._heaps.get(idioma, [])
+            fronteira = [(heap[0], 0)] if heap else []
+            while fronteira and len(itens) < limite:
+                entrada, posicao = heapq.heappop(fronteira)
+                if entrada[0] > limite_us:
+                    break
+                estado = self._valida(entrada)
+                if estado is not None and aceitar(estado.conhecimento_id):
+                    itens.append(estado.item())
+                for filho in (2 * posicao + 1, 2 * posicao + 2):
+                    if filho < len(heap):
+                        heapq.heappush(fronteira, (heap[filho], filho))
+        return itens
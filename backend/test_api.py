@@ -2,19 +2,26 @@
 Casos de teste para os endpoints do servidor FastAPI.
 Execute com: pytest backend/test_api.py -v
 """
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from pathlib import Path
 import json
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from uuid import uuid4
+from uuid import UUID, uuid4
 
+import eventos
+import main
 from main import app
 from models import (
     ConhecimentoIdioma,
     ColecaoPrompts,
     HistoricoPratica,
+    PaginaHistoricoPratica,
     FrasesDialogo,
     Idioma,
     TipoConhecimento
@@ -455,6 +462,2426 @@ class TestPerformance:
             assert response.status_code == 200
 
 
+@pytest.fixture
+def public_temporario(tmp_path, monkeypatch):
+    """Aponta o servidor para uma cópia isolada da pasta public."""
+    for arquivo in main.PUBLIC_DIR.glob("*.json"):
+        shutil.copy(arquivo, tmp_path / arquivo.name)
+    monkeypatch.setattr(main, "PUBLIC_DIR", tmp_path)
+    return tmp_path
+
+
+def hash_arquivo(caminho: Path) -> str:
+    """Versão (hash do conteúdo) que o cache atribui ao arquivo lido do disco."""
+    from cache import hash_arquivos
+    
+    return hash_arquivos([caminho]).hexdigest()
+
+class TestCacheDatasets:
+    """Testes para o cache em memória dos datasets."""
+    
+    def test_leituras_repetidas_usam_cache(self, public_temporario):
+        """A segunda leitura deve ser servida pelo cache."""
+        client.get("/api/prompts")
+        antes = main.cache_datasets.estatisticas()
+        
+        response = client.get("/api/prompts")
+        depois = main.cache_datasets.estatisticas()
+        
+        assert response.status_code == 200
+        assert depois["acertos"] == antes["acertos"] + 1
+        assert depois["falhas"] == antes["falhas"]
+    
+    def test_modificacao_externa_invalida_cache(self, public_temporario):
+        """Alterar o arquivo fora do servidor deve invalidar a entrada."""
+        client.get("/api/frases_do_dialogo")
+        
+        caminho = public_temporario / main.ARQUIVO_FRASES
+        dados = json.loads(caminho.read_text(encoding="utf-8"))
+        dados["saudacao"] = "Guten Morgen, alterado externamente"
+        caminho.write_text(json.dumps(dados, ensure_ascii=False), encoding="utf-8")
+        
+        response = client.get("/api/frases_do_dialogo")
+        assert response.json()["saudacao"] == "Guten Morgen, alterado externamente"
+    
+    def test_put_invalida_cache(self, public_temporario):
+        """Uma escrita pelo servidor deve ser visível na leitura seguinte."""
+        frases = client.get("/api/frases_do_dialogo").json()
+        frases["despedida"] = "Auf Wiedersehen"
+        
+        response = client.put("/api/frases_do_dialogo", json=frases)
+        assert response.status_code == 200
+        
+        response = client.get("/api/frases_do_dialogo")
+        assert response.json()["despedida"] == "Auf Wiedersehen"
+    
+    def test_erro_de_validacao_nao_e_armazenado(self, public_temporario):
+        """Arquivos inválidos não devem ficar no cache."""
+        caminho = public_temporario / main.ARQUIVO_FRASES
+        original = caminho.read_text(encoding="utf-8")
+        caminho.write_text("{}", encoding="utf-8")
+        assert client.get("/api/frases_do_dialogo").status_code == 400
+        
+        caminho.write_text(original, encoding="utf-8")
+        assert client.get("/api/frases_do_dialogo").status_code == 200
+
+
+class TestRequisicoesCondicionais:
+    """Testes para ETag, Last-Modified e respostas 304."""
+    
+    ENDPOINTS = [
+        "/api/base_de_conhecimento",
+        "/api/prompts",
+        "/api/historico_de_pratica",
+        "/api/frases_do_dialogo"
+    ]
+    
+    @pytest.mark.parametrize("endpoint", ENDPOINTS)
+    def test_retorna_etag_e_last_modified(self, endpoint):
+        """Respostas dos datasets devem trazer ETag forte e Last-Modified."""
+        response = client.get(endpoint)
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"')
+        assert "last-modified" in response.headers
+    
+    @pytest.mark.parametrize("endpoint", ENDPOINTS)
+    def test_if_none_match_retorna_304(self, endpoint):
+        """ETag correspondente deve retornar 304 sem corpo."""
+        etag = client.get(endpoint).headers["etag"]
+        
+        response = client.get(endpoint, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    
+    def test_if_none_match_divergente_retorna_200(self):
+        """ETag antigo deve receber o conteúdo completo."""
+        response = client.get("/api/prompts", headers={"If-None-Match": '"antigo"'})
+        assert response.status_code == 200
+        assert "prompts" in response.json()
+    
+    def test_if_none_match_lista_e_fraco(self):
+        """Listas de ETags e o prefixo W/ devem ser aceitos."""
+        etag = client.get("/api/prompts").headers["etag"]
+        
+        response = client.get("/api/prompts", headers={"If-None-Match": f'"outro", W/{etag}'})
+        assert response.status_code == 304
+    
+    def test_if_modified_since_retorna_304(self):
+        """Data igual a Last-Modified deve retornar 304."""
+        ultima = client.get("/api/prompts").headers["last-modified"]
+        
+        response = client.get("/api/prompts", headers={"If-Modified-Since": ultima})
+        assert response.status_code == 304
+    
+    def test_etag_muda_apos_put(self, public_temporario):
+        """Uma escrita deve gerar um novo ETag."""
+        response = client.get("/api/frases_do_dialogo")
+        etag = response.headers["etag"]
+        frases = response.json()
+        frases["saudacao"] = "Servus"
+        client.put("/api/frases_do_dialogo", json=frases)
+        
+        response = client.get("/api/frases_do_dialogo", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["saudacao"] == "Servus"
+
+
+class TestRespostaPreSerializada:
+    """Testes para o JSON pré-serializado dos datasets em cache."""
+    
+    def test_bytes_reutilizados_entre_requisicoes(self, public_temporario):
+        """O JSON do dataset deve ser serializado uma vez por versão."""
+        primeira = client.get("/api/base_de_conhecimento")
+        segunda = client.get("/api/base_de_conhecimento")
+        
+        entrada = main.obter_entrada_conhecimento()
+        assert primeira.content == segunda.content == entrada.derivado("json", None)
+        assert primeira.headers["content-type"] == "application/json"
+    
+    def test_corpo_igual_ao_modelo(self):
+        """O corpo pré-serializado deve corresponder ao response_model."""
+        data = client.get("/api/historico_de_pratica").json()
+        assert data == PaginaHistoricoPratica(**data).model_dump(mode="json")
+        assert data["proximo_cursor"] is None
+    
+    def test_bytes_descartados_apos_escrita_de_item(self, public_temporario):
+        """Alterar um item deve gerar um novo JSON para a base inteira."""
+        conhecimento = client.get("/api/base_de_conhecimento").json()[0]
+        response = client.patch(
+            f"/api/base_de_conhecimento/{conhecimento['conhecimento_id']}",
+            json={"traducao": "nova tradução"}
+        )
+        assert response.status_code == 200
+        
+        data = client.get("/api/base_de_conhecimento").json()
+        assert data[0]["traducao"] == "nova tradução"
+    
+    def test_bytes_descartados_apos_registro_de_exercicio(self, public_temporario):
+        """Exercícios registrados devem aparecer no histórico completo."""
+        total = len(client.get("/api/historico_de_pratica").json()["exercicios"])
+        exercicio = gerar_exercicio(1)
+        assert client.post("/api/historico_de_pratica", json=exercicio).status_code == 201
+        
+        exercicios = client.get("/api/historico_de_pratica").json()["exercicios"]
+        assert len(exercicios) == total + 1
+        assert exercicios[-1]["exercicio_id"] == exercicio["exercicio_id"]
+
+def gerar_exercicio(indice: int, idioma: str = "alemao", conhecimento_id=None) -> dict:
+    """Gera um exercício de diálogo válido com data_hora crescente por índice."""
+    return {
+        "data_hora": f"2025-01-01T00:{indice // 60:02d}:{indice % 60:02d}Z",
+        "exercicio_id": str(uuid4()),
+        "conhecimento_id": str(conhecimento_id or uuid4()),
+        "idioma": idioma,
+        "tipo_pratica": "dialogo",
+        "resultado_exercicio": {"correto": "Sim"}
+    }
+
+
+class TestFiltrosHistorico:
+    """Testes para filtros, ordenação e paginação de /api/historico_de_pratica."""
+    
+    @pytest.fixture
+    def historico_sintetico(self, public_temporario):
+        """Grava um histórico com 25 exercícios alternando idiomas."""
+        self.conhecimento_id = uuid4()
+        exercicios = [
+            gerar_exercicio(
+                i,
+                idioma="alemao" if i % 2 == 0 else "ingles",
+                conhecimento_id=self.conhecimento_id if i % 5 == 0 else None
+            )
+            for i in range(25)
+        ]
+        caminho = public_temporario / main.ARQUIVO_HISTORICO
+        caminho.write_text(json.dumps({"exercicios": exercicios}), encoding="utf-8")
+        return exercicios
+    
+    def test_sem_parametros_retorna_ordem_do_arquivo(self, historico_sintetico):
+        """Sem filtros o histórico completo é retornado como antes."""
+        data = client.get("/api/historico_de_pratica").json()
+        ids = [e["exercicio_id"] for e in data["exercicios"]]
+        assert ids == [e["exercicio_id"] for e in historico_sintetico]
+        assert data["proximo_cursor"] is None
+    
+    def test_filtro_idioma_mais_recente_primeiro(self, historico_sintetico):
+        """Filtro por idioma retorna apenas o idioma pedido, do mais recente ao mais antigo."""
+        data = client.get("/api/historico_de_pratica", params={"idioma": "ingles"}).json()
+        datas = [e["data_hora"] for e in data["exercicios"]]
+        assert len(datas) == 12
+        assert all(e["idioma"] == "ingles" for e in data["exercicios"])
+        assert datas == sorted(datas, reverse=True)
+    
+    def test_filtro_conhecimento_id(self, historico_sintetico):
+        """Filtro por conhecimento_id retorna apenas os exercícios do conhecimento."""
+        data = client.get(
+            "/api/historico_de_pratica",
+            params={"conhecimento_id": str(self.conhecimento_id)}
+        ).json()
+        assert len(data["exercicios"]) == 5
+    
+    def test_filtro_intervalo_de_datas(self, historico_sintetico):
+        """data_inicio e data_fim são inclusivos."""
+        data = client.get("/api/historico_de_pratica", params={
+            "data_inicio": "2025-01-01T00:00:10Z",
+            "data_fim": "2025-01-01T00:00:14Z"
+        }).json()
+        datas = [e["data_hora"] for e in data["exercicios"]]
+        assert len(datas) == 5
+        assert datas[0].startswith("2025-01-01T00:00:14")
+        assert datas[-1].startswith("2025-01-01T00:00:10")
+    
+    def test_paginacao_por_cursor(self, historico_sintetico):
+        """Percorrer as páginas deve retornar todos os itens sem repetição."""
+        ids = []
+        params = {"limite": 10, "tipo_pratica": "dialogo"}
+        while True:
+            data = client.get("/api/historico_de_pratica", params=params).json()
+            assert len(data["exercicios"]) <= 10
+            ids.extend(e["exercicio_id"] for e in data["exercicios"])
+            if data["proximo_cursor"] is None:
+                break
+            params["cursor"] = data["proximo_cursor"]
+        
+        esperados = [e["exercicio_id"] for e in reversed(historico_sintetico)]
+        assert ids == esperados
+    
+    def test_cursor_invalido_retorna_400(self, historico_sintetico):
+        """Cursor malformado deve retornar 400."""
+        response = client.get("/api/historico_de_pratica", params={"cursor": "invalido"})
+        assert response.status_code == 400
+    
+    def test_limite_fora_do_intervalo_retorna_422(self):
+        """limite deve estar entre 1 e 1000."""
+        response = client.get("/api/historico_de_pratica", params={"limite": 0})
+        assert response.status_code == 422
+
+
+class TestRegistroExercicios:
+    """Testes para POST /api/historico_de_pratica (segmento append-only)."""
+    
+    def test_registra_um_exercicio(self, public_temporario):
+        """Um único exercício deve ser aceito e aparecer no GET."""
+        exercicio = gerar_exercicio(1)
+        
+        response = client.post("/api/historico_de_pratica", json=exercicio)
+        assert response.status_code == 201
+        assert response.json()["exercicios"][0]["exercicio_id"] == exercicio["exercicio_id"]
+        
+        ids = [e["exercicio_id"] for e in client.get("/api/historico_de_pratica").json()["exercicios"]]
+        assert ids[-1] == exercicio["exercicio_id"]
+    
+    def test_registra_lote_em_jsonl(self, public_temporario):
+        """Um lote deve ser gravado como uma linha por exercício sem alterar o arquivo base."""
+        base = public_temporario / main.ARQUIVO_HISTORICO
+        conteudo_base = base.read_bytes()
+        lote = [gerar_exercicio(i) for i in range(3)]
+        
+        response = client.post("/api/historico_de_pratica", json=lote)
+        assert response.status_code == 201
+        
+        linhas = (public_temporario / main.ARQUIVO_HISTORICO_SEGMENTO).read_text(encoding="utf-8").splitlines()
+        assert [json.loads(l)["exercicio_id"] for l in linhas] == [e["exercicio_id"] for e in lote]
+        assert base.read_bytes() == conteudo_base
+    
+    def test_historico_inexistente(self, public_temporario):
+        """Deve funcionar mesmo sem o arquivo base do histórico."""
+        (public_temporario / main.ARQUIVO_HISTORICO).unlink()
+        exercicio = gerar_exercicio(2)
+        
+        assert client.post("/api/historico_de_pratica", json=exercicio).status_code == 201
+        data = client.get("/api/historico_de_pratica").json()
+        assert [e["exercicio_id"] for e in data["exercicios"]] == [exercicio["exercicio_id"]]
+    
+    def test_id_duplicado_retorna_400(self, public_temporario):
+        """IDs já existentes ou repetidos no lote devem ser rejeitados."""
+        existente = client.get("/api/historico_de_pratica").json()["exercicios"][0]
+        
+        response = client.post("/api/historico_de_pratica", json=existente)
+        assert response.status_code == 400
+        
+        exercicio = gerar_exercicio(3)
+        response = client.post("/api/historico_de_pratica", json=[exercicio, exercicio])
+        assert response.status_code == 400
+    
+    def test_exercicio_invalido_retorna_422(self, public_temporario):
+        """Exercícios fora do schema devem ser rejeitados."""
+        exercicio = gerar_exercicio(4)
+        exercicio["idioma"] = "frances"
+        response = client.post("/api/historico_de_pratica", json=exercicio)
+        assert response.status_code == 422
+    
+    def test_cache_atualizado_sem_recarregar(self, public_temporario):
+        """Após o POST, o GET deve ser servido pelo cache com o mesmo ETag de uma releitura."""
+        client.get("/api/historico_de_pratica", params={"idioma": "alemao"})
+        client.post("/api/historico_de_pratica", json=gerar_exercicio(5))
+        falhas = main.cache_datasets.estatisticas()["falhas"]
+        
+        response = client.get("/api/historico_de_pratica", params={"idioma": "alemao"})
+        assert main.cache_datasets.estatisticas()["falhas"] == falhas
+        assert len(response.json()["exercicios"]) == 4
+        
+        main.cache_datasets.limpar()
+        assert client.get("/api/historico_de_pratica").headers["etag"] == response.headers["etag"]
+    
+    def test_linha_invalida_no_segmento_retorna_422(self, public_temporario):
+        """Um segmento corrompido deve ser reportado com o número da linha."""
+        (public_temporario / main.ARQUIVO_HISTORICO_SEGMENTO).write_text("{}\n", encoding="utf-8")
+        response = client.get("/api/historico_de_pratica")
+        assert response.status_code == 422
+        assert "linha 1" in response.json()["detail"]
+
+
+class TestEscritaAtomica:
+    """Testes para a escrita atômica com backup em salvar_json."""
+    
+    def test_put_preserva_versao_anterior_no_backup(self, public_temporario):
+        """O backup deve conter exatamente o arquivo anterior ao PUT."""
+        caminho = public_temporario / main.ARQUIVO_FRASES
+        anterior = caminho.read_bytes()
+        frases = json.loads(anterior)
+        frases["saudacao"] = "Moin"
+        
+        assert client.put("/api/frases_do_dialogo", json=frases).status_code == 200
+        
+        backup = caminho.with_suffix(".json.backup")
+        assert backup.read_bytes() == anterior
+        assert json.loads(caminho.read_text(encoding="utf-8"))["saudacao"] == "Moin"
+    
+    def test_versao_calculada_sem_reler_o_arquivo(self, public_temporario, monkeypatch):
+        """Após uma escrita, o hash da versão vem dos bytes gravados e é igual ao do arquivo."""
+        import cache
+        
+        frases = client.get("/api/frases_do_dialogo").json()
+        
+        def proibido(caminhos):
+            raise AssertionError("o arquivo gravado não deve ser relido")
+        
+        with monkeypatch.context() as m:
+            m.setattr(cache, "hash_arquivos", proibido)
+            resposta = client.put("/api/frases_do_dialogo", json={**frases, "saudacao": "Grüß Gott"})
+        assert resposta.status_code == 200
+        
+        caminho = public_temporario / main.ARQUIVO_FRASES
+        etag = client.get("/api/frases_do_dialogo").headers["etag"]
+        assert etag == f'"{hash_arquivo(caminho)}"'
+    
+    def test_falha_na_escrita_mantem_original(self, public_temporario):
+        """Um erro durante a escrita não deve corromper o arquivo nem deixar temporários."""
+        from arquivos import gravar_atomico
+        
+        caminho = public_temporario / main.ARQUIVO_FRASES
+        anterior = caminho.read_bytes()
+        
+        def escrever_com_falha(f):
+            f.write('{"saudacao": "incompleto"')
+            raise IOError("disco cheio")
+        
+        with pytest.raises(IOError):
+            gravar_atomico(caminho, escrever_com_falha, backup=caminho.with_suffix(".json.backup"))
+        
+        assert caminho.read_bytes() == anterior
+        assert not list(public_temporario.glob("*.tmp"))
+    
+    def test_arquivo_novo_sem_backup(self, tmp_path):
+        """Gravar um arquivo inexistente não deve criar backup."""
+        from arquivos import gravar_atomico
+        
+        caminho = tmp_path / "novo.json"
+        gravar_atomico(caminho, lambda f: f.write("{}"), backup=caminho.with_suffix(".json.backup"))
+        
+        assert caminho.read_text() == "{}"
+        assert not caminho.with_suffix(".json.backup").exists()
+
+
+def gerar_conhecimento(texto: str = "der Hund") -> dict:
+    """Gera um conhecimento válido com ID novo."""
+    return {
+        "conhecimento_id": str(uuid4()),
+        "data_hora": "2025-11-20T10:00:00Z",
+        "idioma": "alemao",
+        "tipo_conhecimento": "palavra",
+        "texto_original": texto,
+        "transcricao_ipa": None,
+        "traducao": "o cachorro",
+        "divisao_silabica": None
+    }
+
+
+class TestItensBaseDeConhecimento:
+    """Testes para POST/PATCH/DELETE /api/base_de_conhecimento/{conhecimento_id}."""
+    
+    def ler_arquivo(self, pasta: Path) -> list:
+        return json.loads((pasta / main.ARQUIVO_CONHECIMENTO).read_text(encoding="utf-8"))
+    
+    def test_criar_conhecimento(self, public_temporario):
+        """POST deve acrescentar o item ao final da base."""
+        novo = gerar_conhecimento()
+        
+        response = client.post(f"/api/base_de_conhecimento/{novo['conhecimento_id']}", json=novo)
+        assert response.status_code == 201
+        
+        arquivo = self.ler_arquivo(public_temporario)
+        assert arquivo[-1]["conhecimento_id"] == novo["conhecimento_id"]
+        assert client.get("/api/base_de_conhecimento").json()[-1]["texto_original"] == "der Hund"
+    
+    def test_criar_id_existente_retorna_400(self, public_temporario):
+        """POST com ID já existente deve ser rejeitado."""
+        existente = client.get("/api/base_de_conhecimento").json()[0]
+        response = client.post(f"/api/base_de_conhecimento/{existente['conhecimento_id']}", json=existente)
+        assert response.status_code == 400
+    
+    def test_criar_id_divergente_retorna_400(self, public_temporario):
+        """O ID do corpo deve ser igual ao da URL."""
+        novo = gerar_conhecimento()
+        response = client.post(f"/api/base_de_conhecimento/{uuid4()}", json=novo)
+        assert response.status_code == 400
+    
+    def test_atualizar_campo(self, public_temporario):
+        """PATCH deve alterar apenas os campos informados, mantendo a posição."""
+        antes = self.ler_arquivo(public_temporario)
+        alvo = antes[1]
+        
+        response = client.patch(
+            f"/api/base_de_conhecimento/{alvo['conhecimento_id']}",
+            json={"traducao": "tradução revisada"}
+        )
+        assert response.status_code == 200
+        assert response.json()["traducao"] == "tradução revisada"
+        
+        depois = self.ler_arquivo(public_temporario)
+        assert depois[1]["traducao"] == "tradução revisada"
+        assert depois[1]["texto_original"] == alvo["texto_original"]
+        assert [c["conhecimento_id"] for c in depois] == [c["conhecimento_id"] for c in antes]
+    
+    def test_atualizar_invalido_retorna_422(self, public_temporario):
+        """PATCH que torna o registro inválido deve ser rejeitado sem gravar."""
+        antes = (public_temporario / main.ARQUIVO_CONHECIMENTO).read_bytes()
+        alvo = json.loads(antes)[0]
+        
+        response = client.patch(
+            f"/api/base_de_conhecimento/{alvo['conhecimento_id']}",
+            json={"idioma": "frances"}
+        )
+        assert response.status_code == 422
+        assert (public_temporario / main.ARQUIVO_CONHECIMENTO).read_bytes() == antes
+    
+    def test_atualizar_id_em_outro_formato(self, public_temporario):
+        """O mesmo UUID em maiúsculas ou sem hífens é aceito; outro UUID ou um valor inválido, não."""
+        alvo = client.get("/api/base_de_conhecimento").json()[0]
+        uuid = UUID(alvo["conhecimento_id"])
+        url = f"/api/base_de_conhecimento/{uuid}"
+        
+        for formato in (str(uuid).upper(), uuid.hex):
+            response = client.patch(url, json={"conhecimento_id": formato, "traducao": "x"})
+            assert response.status_code == 200
+            assert response.json()["conhecimento_id"] == str(uuid)
+        
+        assert client.patch(url, json={"conhecimento_id": str(uuid4())}).status_code == 400
+        assert client.patch(url, json={"conhecimento_id": "nao-e-uuid"}).status_code == 422
+    
+    def test_atualizar_inexistente_retorna_404(self, public_temporario):
+        """PATCH em ID inexistente deve retornar 404."""
+        response = client.patch(f"/api/base_de_conhecimento/{uuid4()}", json={"traducao": "x"})
+        assert response.status_code == 404
+    
+    def test_remover_conhecimento(self, public_temporario):
+        """DELETE deve remover o item do arquivo e do GET."""
+        alvo = self.ler_arquivo(public_temporario)[0]["conhecimento_id"]
+        
+        response = client.delete(f"/api/base_de_conhecimento/{alvo}")
+        assert response.status_code == 204
+        
+        assert alvo not in [c["conhecimento_id"] for c in self.ler_arquivo(public_temporario)]
+        assert alvo not in [c["conhecimento_id"] for c in client.get("/api/base_de_conhecimento").json()]
+        assert client.delete(f"/api/base_de_conhecimento/{alvo}").status_code == 404
+    
+    def test_arquivo_igual_ao_put(self, public_temporario):
+        """O arquivo gravado por item deve ter o mesmo formato do PUT completo."""
+        alvo = self.ler_arquivo(public_temporario)[0]["conhecimento_id"]
+        client.patch(f"/api/base_de_conhecimento/{alvo}", json={"traducao": "olá"})
+        gravado = (public_temporario / main.ARQUIVO_CONHECIMENTO).read_text(encoding="utf-8")
+        
+        client.put("/api/base_de_conhecimento", json=client.get("/api/base_de_conhecimento").json())
+        assert (public_temporario / main.ARQUIVO_CONHECIMENTO).read_text(encoding="utf-8") == gravado
+    
+    def test_escritas_por_item_nao_recarregam_arquivo(self, public_temporario):
+        """Após a primeira leitura, as edições por item usam apenas o índice em cache."""
+        client.get("/api/base_de_conhecimento")
+        falhas = main.cache_datasets.estatisticas()["falhas"]
+        
+        for _ in range(3):
+            novo = gerar_conhecimento()
+            client.post(f"/api/base_de_conhecimento/{novo['conhecimento_id']}", json=novo)
+        client.get("/api/base_de_conhecimento")
+        
+        assert main.cache_datasets.estatisticas()["falhas"] == falhas
+
+
+class TestDiscriminadorTipoPratica:
+    """Testes para a validação de resultado_exercicio guiada por tipo_pratica."""
+    
+    def test_resultado_de_outro_tipo_e_rejeitado(self):
+        """Um resultado de diálogo não pode ser aceito em um exercício de audição."""
+        from pydantic import TypeAdapter, ValidationError
+        from models import ExercicioPratica
+        
+        exercicio = gerar_exercicio(1)
+        exercicio["tipo_pratica"] = "audicao"
+        
+        with pytest.raises(ValidationError):
+            HistoricoPratica(exercicios=[exercicio])
+        with pytest.raises(ValidationError):
+            TypeAdapter(ExercicioPratica).validate_python(exercicio)
+    
+    def test_modelo_escolhido_pelo_tipo(self):
+        """Cada exercício do histórico deve ser validado pelo modelo do seu tipo."""
+        from typing import Literal
+        from models import ExercicioDialogo
+        
+        data = client.get("/api/historico_de_pratica").json()
+        historico = HistoricoPratica(**data)
+        
+        assert isinstance(HistoricoPratica(exercicios=[gerar_exercicio(1)]).exercicios[0], ExercicioDialogo)
+        for exercicio in historico.exercicios:
+            campos = type(exercicio).model_fields
+            assert campos["tipo_pratica"].annotation == Literal[exercicio.tipo_pratica]
+            assert isinstance(exercicio.resultado_exercicio, campos["resultado_exercicio"].annotation)
+    
+    def test_post_com_resultado_incompativel_retorna_422(self, public_temporario):
+        """O POST também deve validar o resultado pelo tipo_pratica."""
+        exercicio = gerar_exercicio(1)
+        exercicio["tipo_pratica"] = "pronuncia"
+        response = client.post("/api/historico_de_pratica", json=exercicio)
+        assert response.status_code == 422
+
+
+class TestRespostasNDJSON:
+    """Testes para a representação NDJSON em streaming (Accept: application/x-ndjson)."""
+    
+    NDJSON = {"Accept": "application/x-ndjson"}
+    
+    @staticmethod
+    def ler_linhas(response) -> list:
+        return [json.loads(linha) for linha in response.text.splitlines()]
+    
+    def test_base_de_conhecimento_um_registro_por_linha(self):
+        """Cada linha deve ser um conhecimento, na mesma ordem do JSON."""
+        response = client.get("/api/base_de_conhecimento", headers=self.NDJSON)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["vary"] == "Accept"
+        assert self.ler_linhas(response) == client.get("/api/base_de_conhecimento").json()
+    
+    def test_historico_completo(self, public_temporario):
+        """O histórico inclui os exercícios do segmento, um por linha."""
+        exercicio = gerar_exercicio(1)
+        client.post("/api/historico_de_pratica", json=exercicio)
+        
+        response = client.get("/api/historico_de_pratica", headers=self.NDJSON)
+        linhas = self.ler_linhas(response)
+        assert linhas == client.get("/api/historico_de_pratica").json()["exercicios"]
+        assert linhas[-1]["exercicio_id"] == exercicio["exercicio_id"]
+    
+    def test_paginacao_pelo_cabecalho(self, public_temporario):
+        """O cursor da próxima página vem em X-Proximo-Cursor."""
+        client.post("/api/historico_de_pratica", json=[gerar_exercicio(i) for i in range(7)])
+        esperado = [e["exercicio_id"] for e in client.get(
+            "/api/historico_de_pratica", params={"limite": 1000, "tipo_pratica": "dialogo"}
+        ).json()["exercicios"]]
+        
+        ids = []
+        params = {"limite": 3, "tipo_pratica": "dialogo"}
+        while True:
+            response = client.get("/api/historico_de_pratica", params=params, headers=self.NDJSON)
+            linhas = self.ler_linhas(response)
+            assert len(linhas) <= 3
+            ids.extend(e["exercicio_id"] for e in linhas)
+            if "x-proximo-cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["x-proximo-cursor"]
+        assert ids == esperado
+    
+    def test_etag_proprio_e_304(self):
+        """A representação NDJSON tem ETag próprio e também responde 304."""
+        etag_json = client.get("/api/base_de_conhecimento").headers["etag"]
+        etag = client.get("/api/base_de_conhecimento", headers=self.NDJSON).headers["etag"]
+        assert etag != etag_json
+        
+        response = client.get("/api/base_de_conhecimento", headers={**self.NDJSON, "If-None-Match": etag})
+        assert response.status_code == 304
+        response = client.get("/api/base_de_conhecimento", headers={**self.NDJSON, "If-None-Match": etag_json})
+        assert response.status_code == 200
+    
+    def test_cursor_invalido_retorna_400(self):
+        """Erros detectados antes do streaming mantêm o status HTTP."""
+        response = client.get("/api/historico_de_pratica", params={"cursor": "invalido"}, headers=self.NDJSON)
+        assert response.status_code == 400
+    
+    def test_corpo_entregue_em_blocos(self, monkeypatch):
+        """O corpo é gerado aos poucos, sem montar a resposta inteira."""
+        monkeypatch.setattr(main, "TAMANHO_BLOCO_NDJSON", 256)
+        conhecimentos = main.obter_entrada_conhecimento().objeto
+        
+        blocos = list(main.linhas_ndjson(conhecimentos))
+        assert len(blocos) > 1
+        assert b"".join(blocos).count(b"\n") == len(conhecimentos)
+
+
+class TestArmazenamentoSQLite:
+    """Testes para o armazenamento SQLite da base de conhecimento e do histórico."""
+    
+    @pytest.fixture
+    def sqlite(self, public_temporario, monkeypatch):
+        """Importa a pasta public temporária para um banco e o usa como armazenamento."""
+        from armazenamento import ArmazenamentoSQLite, importar_arquivos
+        
+        # Histórico com exercícios no arquivo base e no segmento
+        exercicios = [gerar_exercicio(i, idioma="alemao" if i % 2 == 0 else "ingles") for i in range(25)]
+        caminho = public_temporario / main.ARQUIVO_HISTORICO
+        caminho.write_text(json.dumps({"exercicios": exercicios[:20]}), encoding="utf-8")
+        assert client.post("/api/historico_de_pratica", json=exercicios[20:]).status_code == 201
+        
+        self.respostas_json = {
+            endpoint: client.get(endpoint).content
+            for endpoint in ("/api/base_de_conhecimento", "/api/historico_de_pratica")
+        }
+        self.paginas_json = self.percorrer({"limite": 4, "idioma": "alemao"})
+        
+        banco = public_temporario / "teste.sqlite3"
+        assert importar_arquivos(banco, public_temporario) == (
+            len(json.loads(self.respostas_json["/api/base_de_conhecimento"])),
+            25
+        )
+        monkeypatch.setattr(main, "armazenamento", ArmazenamentoSQLite(banco))
+        return banco
+    
+    @staticmethod
+    def percorrer(params: dict) -> list:
+        """Percorre todas as páginas e retorna os IDs na ordem recebida."""
+        ids = []
+        while True:
+            data = client.get("/api/historico_de_pratica", params=params).json()
+            ids.extend(e["exercicio_id"] for e in data["exercicios"])
+            if data["proximo_cursor"] is None:
+                return ids
+            params = {**params, "cursor": data["proximo_cursor"]}
+    
+    def test_importacao_preserva_respostas(self, sqlite):
+        """Os GETs completos devem ser idênticos aos do armazenamento em JSON."""
+        for endpoint, conteudo in self.respostas_json.items():
+            response = client.get(endpoint)
+            assert response.status_code == 200
+            assert response.content == conteudo
+    
+    def test_paginacao_igual_ao_indice_em_memoria(self, sqlite):
+        """Filtros e cursor devem produzir a mesma sequência do armazenamento em JSON."""
+        ids = self.percorrer({"limite": 4, "idioma": "alemao"})
+        assert len(ids) == 13
+        assert ids == self.paginas_json
+    
+    def test_filtro_intervalo_de_datas(self, sqlite):
+        """data_inicio e data_fim são inclusivos."""
+        data = client.get("/api/historico_de_pratica", params={
+            "data_inicio": "2025-01-01T00:00:10Z",
+            "data_fim": "2025-01-01T00:00:14Z"
+        }).json()
+        datas = [e["data_hora"] for e in data["exercicios"]]
+        assert len(datas) == 5
+        assert datas[0].startswith("2025-01-01T00:00:14")
+    
+    def test_cursor_invalido_retorna_400(self, sqlite):
+        """Cursor malformado deve ser rejeitado."""
+        response = client.get("/api/historico_de_pratica", params={"cursor": "invalido"})
+        assert response.status_code == 400
+    
+    def test_registro_de_exercicios(self, sqlite):
+        """POST grava no banco e rejeita IDs repetidos."""
+        exercicio = gerar_exercicio(59)
+        assert client.post("/api/historico_de_pratica", json=exercicio).status_code == 201
+        assert client.post("/api/historico_de_pratica", json=exercicio).status_code == 400
+        
+        data = client.get("/api/historico_de_pratica", params={"limite": 1}).json()
+        assert data["exercicios"][0]["exercicio_id"] == exercicio["exercicio_id"]
+        assert client.get("/api/historico_de_pratica").json()["exercicios"][-1] == data["exercicios"][0]
+    
+    def test_itens_da_base_de_conhecimento(self, sqlite):
+        """POST, PATCH e DELETE alteram apenas o registro e preservam a ordem."""
+        originais = client.get("/api/base_de_conhecimento").json()
+        etag = client.get("/api/base_de_conhecimento").headers["etag"]
+        
+        novo = gerar_conhecimento("das Haus")
+        response = client.post(f"/api/base_de_conhecimento/{novo['conhecimento_id']}", json=novo)
+        assert response.status_code == 201
+        response = client.patch(
+            f"/api/base_de_conhecimento/{originais[0]['conhecimento_id']}",
+            json={"traducao": "nova tradução"}
+        )
+        assert response.status_code == 200
+        assert client.delete(f"/api/base_de_conhecimento/{originais[1]['conhecimento_id']}").status_code == 204
+        assert client.delete(f"/api/base_de_conhecimento/{originais[1]['conhecimento_id']}").status_code == 404
+        
+        response = client.get("/api/base_de_conhecimento", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        data = response.json()
+        assert [c["conhecimento_id"] for c in data] == (
+            [originais[0]["conhecimento_id"]]
+            + [c["conhecimento_id"] for c in originais[2:]]
+            + [novo["conhecimento_id"]]
+        )
+        assert data[0]["traducao"] == "nova tradução"
+    
+    def test_etag_e_304(self, sqlite):
+        """A versão do banco deve servir de ETag e mudar após uma escrita."""
+        etag = client.get("/api/base_de_conhecimento").headers["etag"]
+        response = client.get("/api/base_de_conhecimento", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        
+        conhecimentos = client.get("/api/base_de_conhecimento").json()
+        assert client.put("/api/base_de_conhecimento", json=conhecimentos[:1]).status_code == 200
+        response = client.get("/api/base_de_conhecimento", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+    
+    def test_implementacao_incompleta_falha_ao_criar(self):
+        """Um armazenamento que não implementa toda a interface não pode ser instanciado."""
+        from armazenamento import Armazenamento, ArmazenamentoSQLite
+        
+        class Incompleto(Armazenamento):
+            entrada_conhecimento = ArmazenamentoSQLite.entrada_conhecimento
+        
+        with pytest.raises(TypeError, match="abstract"):
+            Incompleto()
+        assert not main.ArmazenamentoJSON.__abstractmethods__
+    
+    def test_importacao_nao_carrega_o_servidor(self):
+        """O módulo de armazenamento (e a importação por linha de comando) não depende de main.py."""
+        import subprocess
+        import sys
+        
+        codigo = "import sys, armazenamento; sys.exit('main' in sys.modules)"
+        resultado = subprocess.run([sys.executable, "-c", codigo], cwd=Path(__file__).parent)
+        assert resultado.returncode == 0
+    
+    def test_dados_persistem_em_nova_instancia(self, sqlite):
+        """Um novo processo deve ler do banco o que foi gravado."""
+        from armazenamento import ArmazenamentoSQLite
+        
+        novo = gerar_conhecimento("der Baum")
+        client.post(f"/api/base_de_conhecimento/{novo['conhecimento_id']}", json=novo)
+        
+        reaberto = ArmazenamentoSQLite(sqlite)
+        assert reaberto.obter_conhecimento(UUID(novo["conhecimento_id"])) is not None
+        assert len(reaberto.entrada_historico().objeto.exercicios) == 25
+    
+    def test_ndjson_lido_do_banco(self, sqlite):
+        """Com o cache vazio, o NDJSON é lido do banco em streaming, linha a linha."""
+        from armazenamento import ArmazenamentoSQLite
+        
+        esperado = client.get("/api/historico_de_pratica").json()["exercicios"]
+        frio = ArmazenamentoSQLite(sqlite)
+        entrada = frio.entrada_historico(completa=False)
+        assert entrada.objeto is None
+        
+        registros = frio.iterar_historico(entrada)
+        assert next(registros).model_dump(mode="json") == esperado[0]
+        assert [e.model_dump(mode="json") for e in registros] == esperado[1:]
+    
+    def test_ndjson_etag_da_versao_transmitida(self, sqlite, monkeypatch):
+        """Uma escrita entre a leitura do ETag e a dos registros não gera corpo de outra versão."""
+        from armazenamento import ArmazenamentoSQLite, VersaoAlterada
+        from models import ADAPTADOR_EXERCICIO
+        
+        frio = ArmazenamentoSQLite(sqlite)
+        monkeypatch.setattr(main, "armazenamento", frio)
+        original = frio.entrada_historico
+        chamadas = []
+        
+        def entrada_e_escrita(completa=True):
+            entrada = original(completa)
+            chamadas.append(completa)
+            if chamadas == [False]:
+                frio.anexar_exercicios([ADAPTADOR_EXERCICIO.validate_python(gerar_exercicio(99))])
+            return entrada
+        
+        monkeypatch.setattr(frio, "entrada_historico", entrada_e_escrita)
+        cabecalhos = {"Accept": "application/x-ndjson"}
+        response = client.get("/api/historico_de_pratica", headers=cabecalhos)
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == 26
+        assert chamadas == [False, False]
+        
+        monkeypatch.setattr(frio, "entrada_historico", original)
+        atual = client.get("/api/historico_de_pratica", headers=cabecalhos)
+        assert response.headers["etag"] == atual.headers["etag"]
+        assert response.content == atual.content
+        
+        antiga = ArmazenamentoSQLite(sqlite).entrada_historico(completa=False)
+        frio.anexar_exercicios([ADAPTADOR_EXERCICIO.validate_python(gerar_exercicio(100))])
+        with pytest.raises(VersaoAlterada):
+            frio.iterar_historico(antiga)
+    
+    def test_commit_com_falha_nao_altera_memoria(self, sqlite, monkeypatch):
+        """Se o COMMIT falhar, a lista em memória e a fila de revisão continuam iguais ao banco."""
+        import sqlite3
+        
+        class ConexaoFalhaCommit:
+            def __init__(self, conexao):
+                self._conexao = conexao
+            
+            def execute(self, sql, *args):
+                if sql == "COMMIT":
+                    raise sqlite3.OperationalError("disk I/O error")
+                return self._conexao.execute(sql, *args)
+            
+            def __getattr__(self, nome):
+                return getattr(self._conexao, nome)
+        
+        armazenamento = main.armazenamento
+        conhecimento_id = client.get("/api/base_de_conhecimento").json()[0]["conhecimento_id"]
+        exercicio = exercicio_revisao(conhecimento_id, 1)
+        revisao = client.get("/api/revisao", params={"limite": 1000}).json()
+        historico = client.get("/api/historico_de_pratica").content
+        entrada = armazenamento.entrada_historico()
+        
+        conexao = armazenamento._conexao
+        monkeypatch.setattr(armazenamento, "_conexao", lambda: ConexaoFalhaCommit(conexao()))
+        assert client.post("/api/historico_de_pratica", json=exercicio).status_code == 500
+        monkeypatch.setattr(armazenamento, "_conexao", conexao)
+        
+        assert armazenamento.entrada_historico() is entrada
+        assert client.get("/api/historico_de_pratica").content == historico
+        assert client.get("/api/revisao", params={"limite": 1000}).json() == revisao
+        
+        # A transação foi desfeita: a mesma escrita funciona em seguida
+        assert client.post("/api/historico_de_pratica", json=exercicio).status_code == 201
+        assert client.get("/api/revisao", params={"limite": 1000}).json() != revisao
+    
+    def test_armazenamento_invalido(self, monkeypatch):
+        """Um valor desconhecido em ARMAZENAMENTO deve ser rejeitado."""
+        monkeypatch.setattr(main, "ARMAZENAMENTO", "xml")
+        with pytest.raises(ValueError):
+            main.criar_armazenamento()
+
+
+class TestConcorrenciaEscritas:
+    """Testes de estresse com escritas e leituras concorrentes no mesmo event loop."""
+    
+    THREADS = 8
+    RODADAS = 10
+    
+    def test_puts_concorrentes_de_prompts(self, public_temporario):
+        """PUTs simultâneos devem deixar o arquivo, o cache e o ETag consistentes."""
+        
+        with TestClient(app) as cliente:
+            colecao = cliente.get("/api/prompts").json()
+            enviadas = {}
+            
+            def escrever(indice: int):
+                status = []
+                for rodada in range(self.RODADAS):
+                    descricao = f"versão {indice}-{rodada}"
+                    enviadas[descricao] = True
+                    status.append(cliente.put("/api/prompts", json={**colecao, "descricao": descricao}).status_code)
+                    leitura = cliente.get("/api/prompts")
+                    status.append(leitura.status_code)
+                    assert leitura.json()["descricao"].startswith("versão")
+                return status
+            
+            with ThreadPoolExecutor(self.THREADS) as executor:
+                resultados = list(executor.map(escrever, range(self.THREADS)))
+            assert all(status == 200 for lista in resultados for status in lista)
+            
+            caminho = public_temporario / main.ARQUIVO_PROMPTS
+            no_arquivo = json.loads(caminho.read_text(encoding="utf-8"))
+            response = cliente.get("/api/prompts")
+            assert no_arquivo["descricao"] in enviadas
+            assert response.json() == no_arquivo
+            assert response.headers["etag"] == f'"{hash_arquivo(caminho)}"'
+    
+    def test_patches_concorrentes_nao_perdem_atualizacoes(self, public_temporario):
+        """Alterações simultâneas em itens diferentes devem ser todas preservadas."""
+        with TestClient(app) as cliente:
+            ids = [c["conhecimento_id"] for c in cliente.get("/api/base_de_conhecimento").json()][:self.THREADS]
+            
+            def alterar(conhecimento_id: str):
+                for rodada in range(self.RODADAS):
+                    response = cliente.patch(
+                        f"/api/base_de_conhecimento/{conhecimento_id}",
+                        json={"traducao": f"{conhecimento_id} {rodada}"}
+                    )
+                    assert response.status_code == 200
+            
+            with ThreadPoolExecutor(self.THREADS) as executor:
+                list(executor.map(alterar, ids))
+            
+            esperado = {i: f"{i} {self.RODADAS - 1}" for i in ids}
+            caminho = public_temporario / main.ARQUIVO_CONHECIMENTO
+            for dados in (json.loads(caminho.read_text(encoding="utf-8")), cliente.get("/api/base_de_conhecimento").json()):
+                traducoes = {c["conhecimento_id"]: c["traducao"] for c in dados if c["conhecimento_id"] in esperado}
+                assert traducoes == esperado
+    
+    def test_posts_concorrentes_do_mesmo_exercicio(self, public_temporario):
+        """Apenas um de vários registros simultâneos do mesmo ID deve ser aceito."""
+        exercicio = gerar_exercicio(1)
+        with TestClient(app) as cliente:
+            with ThreadPoolExecutor(self.THREADS) as executor:
+                status = list(executor.map(
+                    lambda _: cliente.post("/api/historico_de_pratica", json=exercicio).status_code,
+                    range(self.THREADS)
+                ))
+        assert sorted(status) == [201] + [400] * (self.THREADS - 1)
+    
+    def test_lotes_concorrentes_de_exercicios(self, public_temporario):
+        """Registros e consultas simultâneos não devem perder nem duplicar exercícios."""
+        with TestClient(app) as cliente:
+            total = len(cliente.get("/api/historico_de_pratica").json()["exercicios"])
+            
+            def registrar(indice: int):
+                ids = []
+                for rodada in range(self.RODADAS):
+                    exercicio = gerar_exercicio(indice * self.RODADAS + rodada)
+                    assert cliente.post("/api/historico_de_pratica", json=exercicio).status_code == 201
+                    ids.append(exercicio["exercicio_id"])
+                    pagina = cliente.get("/api/historico_de_pratica", params={"tipo_pratica": "dialogo", "limite": 5})
+                    assert pagina.status_code == 200
+                return ids
+            
+            with ThreadPoolExecutor(self.THREADS) as executor:
+                registrados = [i for ids in executor.map(registrar, range(self.THREADS)) for i in ids]
+            
+            exercicios = cliente.get("/api/historico_de_pratica").json()["exercicios"]
+            ids = [e["exercicio_id"] for e in exercicios]
+            assert len(ids) == len(set(ids)) == total + self.THREADS * self.RODADAS
+            assert set(registrados) <= set(ids)
+            
+            segmento = public_temporario / main.ARQUIVO_HISTORICO_SEGMENTO
+            assert len(segmento.read_text(encoding="utf-8").splitlines()) == self.THREADS * self.RODADAS
+    
+    def test_leitura_nao_aguarda_escrita_lenta(self, public_temporario, monkeypatch):
+        """Enquanto uma escrita está em andamento, GETs respondem com a versão anterior."""
+        iniciada = threading.Event()
+        liberar = threading.Event()
+        gravar_atomico = main.gravar_atomico
+        
+        def gravar_lento(*args, **kwargs):
+            iniciada.set()
+            liberar.wait(10)
+            gravar_atomico(*args, **kwargs)
+        
+        monkeypatch.setattr(main, "gravar_atomico", gravar_lento)
+        
+        with TestClient(app) as cliente:
+            frases = cliente.get("/api/frases_do_dialogo").json()
+            with ThreadPoolExecutor(2) as executor:
+                escrita = executor.submit(
+                    cliente.put, "/api/frases_do_dialogo", json={**frases, "saudacao": "Servus"}
+                )
+                assert iniciada.wait(10)
+                
+                # Outra escrita do mesmo dataset aguarda na fila sem ocupar o pool dos GETs
+                segunda = executor.submit(
+                    cliente.put, "/api/frases_do_dialogo", json={**frases, "saudacao": "Moin"}
+                )
+                leitura = cliente.get("/api/frases_do_dialogo")
+                assert leitura.status_code == 200
+                assert leitura.json()["saudacao"] == frases["saudacao"]
+                assert not escrita.done()
+                
+                liberar.set()
+                assert escrita.result(10).status_code == 200
+                assert segunda.result(10).status_code == 200
+            
+            assert cliente.get("/api/frases_do_dialogo").json()["saudacao"] == "Moin"
+
+
+class TestValidacaoStreaming:
+    """Testes para a validação item a item com memória limitada."""
+    
+    @staticmethod
+    def _resumo(resultado):
+        return resultado.arquivo, resultado.valido
+    
+    def test_mesmo_resultado_que_o_modo_completo(self, public_temporario):
+        """Os dois modos devem concordar sobre os arquivos reais."""
+        from validator import ValidadorJSON
+        
+        completo = ValidadorJSON(public_temporario)
+        streaming = ValidadorJSON(public_temporario, streaming=True, tamanho_bloco=7)
+        for nome in ("validar_conhecimento_idiomas", "validar_historico_pratica"):
+            assert self._resumo(getattr(streaming, nome)()) == self._resumo(getattr(completo, nome)())
+    
+    def test_erro_de_validacao_informa_posicao_em_bytes(self, public_temporario):
+        """O erro deve apontar o byte onde começa o item inválido."""
+        from validator import ValidadorJSON
+        
+        caminho = public_temporario / main.ARQUIVO_CONHECIMENTO
+        itens = json.loads(caminho.read_text(encoding="utf-8"))
+        itens[1]["idioma"] = "klingon"
+        conteudo = json.dumps(itens, ensure_ascii=False, indent=2).encode("utf-8")
+        caminho.write_bytes(conteudo)
+        
+        resultado = ValidadorJSON(public_temporario, streaming=True, tamanho_bloco=64).validar_conhecimento_idiomas()
+        assert not resultado.valido
+        assert len(resultado.erros) == 1
+        inicio = conteudo.index(b"{", conteudo.index(b"}") + 1)
+        assert resultado.erros[0].startswith(f"Item 1 (byte {inicio}):")
+    
+    def test_json_malformado_informa_posicao_em_bytes(self, public_temporario):
+        """Erros de sintaxe devem indicar a posição em bytes, inclusive com acentos antes."""
+        from validator import ValidadorJSON
+        
+        conteudo = '{"exercicios": [{"campo": "ação"} {}]}'.encode("utf-8")
+        (public_temporario / main.ARQUIVO_HISTORICO).write_bytes(conteudo)
+        
+        resultado = ValidadorJSON(public_temporario, streaming=True, tamanho_bloco=3).validar_historico_pratica()
+        assert not resultado.valido
+        assert resultado.erros[-1] == (
+            f"Erro ao decodificar JSON: Esperado ',' ou ']', encontrado '{{' (byte {conteudo.index(b'} {') + 2})"
+        )
+    
+    def test_array_vazio_invalido(self, public_temporario):
+        """A base de conhecimento continua não podendo estar vazia."""
+        from validator import ValidadorJSON
+        
+        (public_temporario / main.ARQUIVO_CONHECIMENTO).write_text("[ ]", encoding="utf-8")
+        resultado = ValidadorJSON(public_temporario, streaming=True).validar_conhecimento_idiomas()
+        assert not resultado.valido
+        assert "Array não pode estar vazio" in resultado.erros[0]
+    
+    def test_leitor_em_blocos_pequenos(self, tmp_path):
+        """Elementos cortados entre blocos (números, strings e UTF-8) devem ser lidos inteiros."""
+        from leitor_json import iterar_array
+        
+        dados = {"versao": 1.5e3, "exercicios": [1, 23.5, -4e-2, "çãõ€", None, True, {"a": [1, {"b": "x"}]}], "fim": "ok"}
+        conteudo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        caminho = tmp_path / "dados.json"
+        caminho.write_bytes(conteudo)
+        
+        for tamanho in (1, 2, 5, 64):
+            elementos = list(iterar_array(caminho, "exercicios", tamanho))
+            assert [e for _, e in elementos] == dados["exercicios"]
+            for posicao, elemento in elementos:
+                decodificado, _ = json.JSONDecoder().raw_decode(conteudo[posicao:].decode("utf-8"))
+                assert decodificado == elemento
+
+
+class TestValidacaoParalela:
+    """Testes para a validação com vários processos."""
+    
+    @pytest.fixture
+    def public_com_erros(self, public_temporario, monkeypatch):
+        """Base e histórico com itens inválidos espalhados por vários lotes."""
+        import validator
+        
+        monkeypatch.setattr(validator, "TAMANHO_LOTE", 3)
+        caminho = public_temporario / main.ARQUIVO_CONHECIMENTO
+        itens = json.loads(caminho.read_text(encoding="utf-8")) * 4
+        for indice in (1, 7, len(itens) - 1):
+            itens[indice]["idioma"] = "klingon"
+        caminho.write_text(json.dumps(itens, ensure_ascii=False), encoding="utf-8")
+        
+        exercicios = [
+            {"exercicio_id": str(uuid4()), "tipo_pratica": "traducao"},
+            {"tipo_pratica": "desconhecido"},
+        ] * 5
+        (public_temporario / main.ARQUIVO_HISTORICO).write_text(
+            json.dumps({"exercicios": exercicios}), encoding="utf-8"
+        )
+        return public_temporario
+    
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_relatorio_identico_ao_sequencial(self, public_com_erros, capsys, streaming):
+        """O relatório impresso deve ser o mesmo com 1 ou vários processos."""
+        from validator import ValidadorJSON
+        
+        assert not ValidadorJSON(public_com_erros, streaming=streaming).validar_todos()
+        sequencial = capsys.readouterr().out
+        assert not ValidadorJSON(public_com_erros, streaming=streaming, jobs=2).validar_todos()
+        paralelo = capsys.readouterr().out
+        
+        assert "Item 7" in sequencial
+        assert paralelo == sequencial
+    
+    def test_arquivos_validos(self, public_temporario, capsys):
+        """Com os arquivos reais o resultado continua válido."""
+        from validator import ValidadorJSON
+        
+        validador = ValidadorJSON(public_temporario, jobs=2)
+        assert validador.validar_todos()
+        assert [r.valido for r in validador.resultados] == [True] * 4
+
+
+class TestCacheValidacao:
+    """Testes para a validação incremental com cache de hashes."""
+    
+    @staticmethod
+    def _validar(pasta, cache, **opcoes):
+        from validator import ValidadorJSON
+        
+        validador = ValidadorJSON(pasta, arquivo_cache=cache, **opcoes)
+        validador.validar_todos()
+        return validador
+    
+    @staticmethod
+    def _relatorio(validador):
+        return [str(r) for r in validador.resultados]
+    
+    def test_arquivos_inalterados_nao_sao_validados(self, public_temporario, tmp_path_factory, capsys):
+        """A segunda execução deve reaproveitar todos os arquivos."""
+        cache = tmp_path_factory.mktemp("cache") / "cache.json"
+        primeira = self._validar(public_temporario, cache)
+        assert primeira.itens_validados > 0
+        assert cache.exists()
+        
+        segunda = self._validar(public_temporario, cache)
+        assert segunda.arquivos_reaproveitados == 4
+        assert segunda.itens_validados == 0
+        assert self._relatorio(segunda) == self._relatorio(primeira)
+    
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_apenas_itens_alterados_sao_validados(self, public_temporario, tmp_path_factory, capsys, streaming):
+        """Após alterar um item, só ele deve ser validado e o relatório não muda."""
+        from validator import ValidadorJSON
+        
+        cache = tmp_path_factory.mktemp("cache") / "cache.json"
+        self._validar(public_temporario, cache, streaming=streaming)
+        
+        caminho = public_temporario / main.ARQUIVO_CONHECIMENTO
+        itens = json.loads(caminho.read_text(encoding="utf-8"))
+        itens[0]["idioma"] = "klingon"
+        caminho.write_text(json.dumps(itens, ensure_ascii=False), encoding="utf-8")
+        
+        incremental = self._validar(public_temporario, cache, streaming=streaming)
+        assert incremental.arquivos_reaproveitados == 3
+        assert incremental.itens_validados == 1
+        assert incremental.itens_reaproveitados == len(itens) - 1
+        completo = ValidadorJSON(public_temporario, streaming=streaming)
+        completo.validar_todos()
+        assert self._relatorio(incremental) == self._relatorio(completo)
+        
+        # O item inválido nunca entra no cache
+        assert self._validar(public_temporario, cache, streaming=streaming).itens_validados == 1
+    
+    def test_mudanca_de_esquema_descarta_cache(self, public_temporario, tmp_path_factory, monkeypatch, capsys):
+        """Alterar os modelos deve invalidar o cache inteiro."""
+        import validator
+        
+        cache = tmp_path_factory.mktemp("cache") / "cache.json"
+        self._validar(public_temporario, cache)
+        monkeypatch.setattr(validator, "_resumo_esquema", lambda: "outro esquema")
+        
+        validador = self._validar(public_temporario, cache)
+        assert validador.arquivos_reaproveitados == 0
+        assert validador.itens_reaproveitados == 0
+    
+    def test_cache_corrompido_e_ignorado(self, public_temporario, tmp_path_factory, capsys):
+        """Um cache ilegível não deve impedir a validação."""
+        cache = tmp_path_factory.mktemp("cache") / "cache.json"
+        cache.write_text("{não é json", encoding="utf-8")
+        
+        validador = self._validar(public_temporario, cache)
+        assert all(r.valido for r in validador.resultados)
+        assert json.loads(cache.read_text(encoding="utf-8"))["arquivos"]
+
+
+class TestGeradoresBenchmark:
+    """Testes para os geradores de dados sintéticos e a suíte de benchmarks."""
+    
+    def test_dados_gerados_sao_validos(self):
+        """Os geradores devem produzir dados aceitos pelos modelos."""
+        from benchmarks.geradores import gerar_conhecimentos, gerar_frases, gerar_historico, gerar_prompts
+        
+        conhecimentos = [ConhecimentoIdioma(**item) for item in gerar_conhecimentos(300)]
+        assert len({c.conhecimento_id for c in conhecimentos}) == 300
+        assert {c.tipo_conhecimento for c in conhecimentos} == set(TipoConhecimento)
+        assert len(ColecaoPrompts(**gerar_prompts(50)).prompts) == 50
+        historico = HistoricoPratica(**gerar_historico(50))
+        assert len({e.tipo_pratica for e in historico.exercicios}) == 5
+        assert len(FrasesDialogo(**gerar_frases(3)).intermediarias) == 3
+    
+    def test_suite_em_escala_minima(self, monkeypatch, capsys):
+        """A suíte deve executar todos os grupos sem erros de requisição."""
+        from benchmarks import suite
+        
+        monkeypatch.setattr(suite, "rodadas_para", lambda quantidade: (1, 0))
+        pasta = main.PUBLIC_DIR
+        resultados = suite.Suite(list(suite.GRUPOS))
+        suite.executar(resultados, 20)
+        
+        assert {r["group"] for r in resultados.resultados} == set(suite.GRUPOS)
+        assert main.PUBLIC_DIR == pasta
+    
+    def test_escalas(self):
+        """Escalas aceitam sufixos k e m."""
+        from benchmarks.suite import interpretar_escala, rotulo_escala
+        
+        assert [interpretar_escala(e) for e in ("1k", "100K", "1m", "2500")] == [1_000, 100_000, 1_000_000, 2_500]
+        assert [rotulo_escala(q) for q in (1_000, 1_000_000, 2_500)] == ["1k", "1m", "2500"]
+
+
+def contar_estatisticas(exercicios: list, **filtros) -> dict:
+    """Recontagem direta (total, acertos) por idioma, tipo_pratica e dia dos exercícios em JSON."""
+    def acerto(exercicio: dict) -> bool:
+        resultado = exercicio["resultado_exercicio"]
+        if "campos_resultados" in resultado:
+            return all(resultado["campos_resultados"])
+        if "acertou" in resultado:
+            return resultado["acertou"]
+        return resultado["correto"] in (True, "Sim")
+    
+    grupos = {"total": [0, 0], "por_idioma": {}, "por_tipo_pratica": {}, "por_dia": {}}
+    for exercicio in exercicios:
+        if any(exercicio[campo] != valor for campo, valor in filtros.items()):
+            continue
+        chaves = {
+            "por_idioma": exercicio["idioma"],
+            "por_tipo_pratica": exercicio["tipo_pratica"],
+            "por_dia": exercicio["data_hora"][:10]
+        }
+        for contadores in [grupos["total"]] + [grupos[g].setdefault(c, [0, 0]) for g, c in chaves.items()]:
+            contadores[0] += 1
+            contadores[1] += int(acerto(exercicio))
+    return grupos
+
+
+def comparar_estatisticas(data: dict, esperado: dict) -> None:
+    """Confere a resposta de /estatisticas contra contar_estatisticas."""
+    assert [data["total"], data["acertos"]] == esperado["total"]
+    for grupo in ("por_idioma", "por_tipo_pratica", "por_dia"):
+        assert {chave: [c["total"], c["acertos"]] for chave, c in data[grupo].items()} == esperado[grupo]
+        for contagem in data[grupo].values():
+            assert contagem["taxa_acerto"] == pytest.approx(contagem["acertos"] / contagem["total"])
+
+
+class TestEstatisticasHistorico:
+    """Testes para GET /api/historico_de_pratica/estatisticas."""
+    
+    @pytest.fixture
+    def historico_misto(self, public_temporario):
+        """Grava 500 exercícios dos cinco tipos distribuídos em 7 dias."""
+        from benchmarks.geradores import gerar_exercicios
+        
+        exercicios = gerar_exercicios(500)
+        for i, exercicio in enumerate(exercicios):
+            exercicio["data_hora"] = f"2025-01-{1 + i % 7:02d}T{i % 24:02d}:00:00Z"
+        caminho = public_temporario / main.ARQUIVO_HISTORICO
+        caminho.write_text(json.dumps({"exercicios": exercicios}), encoding="utf-8")
+        return exercicios
+    
+    def test_totais_iguais_a_recontagem(self, historico_misto):
+        """Totais e acertos devem coincidir com uma recontagem do histórico."""
+        response = client.get("/api/historico_de_pratica/estatisticas")
+        assert response.status_code == 200
+        data = response.json()
+        comparar_estatisticas(data, contar_estatisticas(historico_misto))
+        assert len(data["por_dia"]) == 7
+        assert 0 < data["acertos"] < data["total"] == 500
+    
+    def test_filtros(self, historico_misto):
+        """idioma, tipo_pratica e o intervalo de dias (inclusivo) restringem a contagem."""
+        data = client.get("/api/historico_de_pratica/estatisticas", params={
+            "idioma": "ingles",
+            "tipo_pratica": "traducao",
+            "data_inicio": "2025-01-02",
+            "data_fim": "2025-01-04"
+        }).json()
+        dentro = [e for e in historico_misto if "2025-01-02" <= e["data_hora"][:10] <= "2025-01-04"]
+        comparar_estatisticas(data, contar_estatisticas(dentro, idioma="ingles", tipo_pratica="traducao"))
+        assert list(data["por_dia"]) == ["2025-01-02", "2025-01-03", "2025-01-04"]
+    
+    def test_intervalo_invertido_retorna_400(self):
+        """data_inicio posterior a data_fim deve retornar 400."""
+        response = client.get("/api/historico_de_pratica/estatisticas", params={
+            "data_inicio": "2025-01-05",
+            "data_fim": "2025-01-01"
+        })
+        assert response.status_code == 400
+    
+    def test_atualizadas_ao_registrar_sem_recontar(self, historico_misto, monkeypatch):
+        """Exercícios registrados entram nas estatísticas sem reconstruir os contadores."""
+        import estatisticas
+        
+        assert client.get("/api/historico_de_pratica/estatisticas").status_code == 200
+        construcoes = []
+        original = estatisticas.EstatisticasHistorico.__init__
+        monkeypatch.setattr(
+            estatisticas.EstatisticasHistorico,
+            "__init__",
+            lambda self, *args: construcoes.append(args) or original(self, *args)
+        )
+        
+        novos = [gerar_exercicio(i, idioma="ingles") for i in range(3)]
+        assert client.post("/api/historico_de_pratica", json=novos).status_code == 201
+        
+        data = client.get("/api/historico_de_pratica/estatisticas").json()
+        comparar_estatisticas(data, contar_estatisticas(historico_misto + novos))
+        assert construcoes == []
+    
+    def test_etag_e_304(self, historico_misto):
+        """A resposta usa o ETag do histórico e muda quando exercícios são registrados."""
+        response = client.get("/api/historico_de_pratica/estatisticas")
+        etag = response.headers["etag"]
+        
+        response = client.get("/api/historico_de_pratica/estatisticas", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        
+        assert client.post("/api/historico_de_pratica", json=gerar_exercicio(1)).status_code == 201
+        response = client.get("/api/historico_de_pratica/estatisticas", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["total"] == 501
+    
+    def test_sqlite_igual_ao_json(self, historico_misto, public_temporario, monkeypatch):
+        """O armazenamento SQLite mantém os mesmos contadores em tabela, inclusive após anexar."""
+        import sqlite3
+        from armazenamento import ArmazenamentoSQLite, importar_arquivos
+        
+        banco = public_temporario / "teste.sqlite3"
+        importar_arquivos(banco, public_temporario)
+        monkeypatch.setattr(main, "armazenamento", ArmazenamentoSQLite(banco))
+        
+        novos = [gerar_exercicio(i, idioma="ingles") for i in range(3)]
+        assert client.post("/api/historico_de_pratica", json=novos).status_code == 201
+        esperado = contar_estatisticas(historico_misto + novos)
+        comparar_estatisticas(client.get("/api/historico_de_pratica/estatisticas").json(), esperado)
+        
+        # Banco sem a tabela preenchida (criado antes dela) é contado ao abrir
+        with sqlite3.connect(banco) as conexao:
+            conexao.execute("DELETE FROM estatisticas")
+            conexao.execute("DELETE FROM metadados WHERE chave = 'estatisticas'")
+        monkeypatch.setattr(main, "armazenamento", ArmazenamentoSQLite(banco))
+        comparar_estatisticas(client.get("/api/historico_de_pratica/estatisticas").json(), esperado)
+
+    
+    def test_sqlite_construidas_uma_vez_por_versao(self, historico_misto, public_temporario, monkeypatch):
+        """No SQLite, GETs repetidos reaproveitam os contadores e registrar exercícios os atualiza sem reler a tabela."""
+        import estatisticas
+        from armazenamento import ArmazenamentoSQLite, importar_arquivos
+        
+        banco = public_temporario / "teste.sqlite3"
+        importar_arquivos(banco, public_temporario)
+        monkeypatch.setattr(main, "armazenamento", ArmazenamentoSQLite(banco))
+        construcoes = []
+        original = estatisticas.EstatisticasHistorico.__init__
+        monkeypatch.setattr(
+            estatisticas.EstatisticasHistorico,
+            "__init__",
+            lambda self, *args: construcoes.append(args) or original(self, *args)
+        )
+        
+        for _ in range(3):
+            assert client.get("/api/historico_de_pratica/estatisticas").status_code == 200
+        assert construcoes == [()]
+        
+        novos = [gerar_exercicio(i, idioma="ingles") for i in range(3)]
+        assert client.post("/api/historico_de_pratica", json=novos).status_code == 201
+        construcoes.clear()
+        data = client.get("/api/historico_de_pratica/estatisticas").json()
+        comparar_estatisticas(data, contar_estatisticas(historico_misto + novos))
+        assert construcoes == []
+
+def exercicio_revisao(conhecimento_id: str, dia: int, correto: str = "Sim") -> dict:
+    """Exercício de diálogo do conhecimento às 12h do dia `dia` de janeiro de 2025."""
+    return {
+        **gerar_exercicio(0, conhecimento_id=conhecimento_id),
+        "data_hora": f"2025-01-{dia:02d}T12:00:00Z",
+        "resultado_exercicio": {"correto": correto}
+    }
+
+
+class TestRevisao:
+    """Testes para a fila de revisão espaçada em /api/revisao."""
+    
+    @pytest.fixture
+    def historico_revisao(self, public_temporario):
+        """Três conhecimentos da base: A lembrado duas vezes, B esquecido e C lembrado uma vez."""
+        ids = [c["conhecimento_id"] for c in client.get("/api/base_de_conhecimento").json()[:3]]
+        self.a, self.b, self.c = ids
+        exercicios = [
+            exercicio_revisao(self.a, 1),
+            exercicio_revisao(self.b, 1, "Não"),
+            exercicio_revisao(self.a, 2),
+            exercicio_revisao(self.c, 3)
+        ]
+        caminho = public_temporario / main.ARQUIVO_HISTORICO
+        caminho.write_text(json.dumps({"exercicios": exercicios}), encoding="utf-8")
+        return exercicios
+    
+    @staticmethod
+    def fila(**params) -> list:
+        response = client.get("/api/revisao", params=params)
+        assert response.status_code == 200
+        return response.json()["itens"]
+    
+    def test_ordem_por_vencimento(self, historico_revisao):
+        """Os itens vencidos vêm do mais atrasado ao mais recente, com intervalos SM-2."""
+        itens = self.fila(data_hora="2025-01-20T00:00:00Z")
+        assert [i["conhecimento_id"] for i in itens] == [self.b, self.c, self.a]
+        assert [i["vencimento"][:10] for i in itens] == ["2025-01-02", "2025-01-04", "2025-01-08"]
+        assert [i["intervalo_dias"] for i in itens] == [1.0, 1.0, 6.0]
+        assert itens[2]["repeticoes"] == 2 and itens[2]["exercicios"] == 2
+        assert itens[0]["facilidade"] < itens[1]["facilidade"]
+    
+    def test_limite_e_data_de_referencia(self, historico_revisao):
+        """Apenas itens vencidos no momento de referência, até o limite."""
+        assert [i["conhecimento_id"] for i in self.fila(data_hora="2025-01-03T00:00:00Z")] == [self.b]
+        assert len(self.fila(data_hora="2025-01-20T00:00:00Z", limite=2)) == 2
+        assert self.fila(data_hora="2024-12-31T00:00:00Z") == []
+        assert client.get("/api/revisao", params={"limite": 0}).status_code == 422
+    
+    def test_registro_atualiza_fila_sem_reconstruir(self, historico_revisao, monkeypatch):
+        """Exercícios registrados reagendam o conhecimento sem reconstruir a fila."""
+        import revisao
+        
+        assert self.fila(data_hora="2025-01-20T00:00:00Z")
+        construcoes = []
+        original = revisao.AgendadorRevisao.__init__
+        monkeypatch.setattr(
+            revisao.AgendadorRevisao,
+            "__init__",
+            lambda self, *args: construcoes.append(args) or original(self, *args)
+        )
+        
+        novo = exercicio_revisao(self.b, 5)
+        assert client.post("/api/historico_de_pratica", json=novo).status_code == 201
+        itens = self.fila(data_hora="2025-01-20T00:00:00Z")
+        assert [i["conhecimento_id"] for i in itens] == [self.c, self.b, self.a]
+        assert construcoes == []
+    
+    def test_exercicio_fora_de_ordem_recalcula(self, historico_revisao):
+        """Um exercício anterior ao último do item gera o mesmo estado de uma carga completa."""
+        from revisao import AgendadorRevisao
+        from models import ADAPTADOR_EXERCICIO
+        
+        atrasado = exercicio_revisao(self.a, 1, "Não")
+        assert client.post("/api/historico_de_pratica", json=atrasado).status_code == 201
+        
+        exercicios = [ADAPTADOR_EXERCICIO.validate_python(e) for e in historico_revisao + [atrasado]]
+        esperado = AgendadorRevisao(exercicios).vencidos(datetime(2025, 2, 1), 10)
+        itens = self.fila(data_hora="2025-02-01T00:00:00Z")
+        assert itens == [json.loads(i.model_dump_json()) for i in esperado]
+    
+    def test_conhecimento_removido_omitido(self, historico_revisao):
+        """Conhecimentos removidos da base não aparecem na fila."""
+        assert client.delete(f"/api/base_de_conhecimento/{self.b}").status_code == 204
+        itens = self.fila(data_hora="2025-01-20T00:00:00Z")
+        assert [i["conhecimento_id"] for i in itens] == [self.c, self.a]
+    
+    def test_filtro_pelos_ids_da_base(self, historico_revisao, public_temporario, monkeypatch):
+        """A fila confere os conhecimentos pelos ids em memória, sem consultar registro por registro."""
+        from armazenamento import ArmazenamentoSQLite, importar_arquivos
+        
+        def proibido(conhecimento_id):
+            raise AssertionError("obter_conhecimento não deve ser chamado pela fila")
+        
+        esperado = self.fila(data_hora="2025-01-20T00:00:00Z")
+        banco = public_temporario / "teste.sqlite3"
+        importar_arquivos(banco, public_temporario)
+        for armazenamento in (main.armazenamento, ArmazenamentoSQLite(banco)):
+            monkeypatch.setattr(main, "armazenamento", armazenamento)
+            monkeypatch.setattr(armazenamento, "obter_conhecimento", proibido)
+            assert self.fila(data_hora="2025-01-20T00:00:00Z") == esperado
+        
+        # Os ids acompanham as escritas na base
+        del armazenamento.obter_conhecimento
+        assert client.delete(f"/api/base_de_conhecimento/{self.b}").status_code == 204
+        itens = self.fila(data_hora="2025-01-20T00:00:00Z")
+        assert [i["conhecimento_id"] for i in itens] == [self.c, self.a]
+    
+    def test_heap_igual_a_ordenacao_completa(self):
+        """Percorrer o heap deve coincidir com ordenar todos os estados, inclusive por idioma."""
+        from benchmarks.geradores import gerar_exercicios
+        from models import ADAPTADOR_EXERCICIO
+        from revisao import AgendadorRevisao
+        
+        exercicios = [ADAPTADOR_EXERCICIO.validate_python(e) for e in gerar_exercicios(3000)]
+        agendador = AgendadorRevisao(exercicios[:1500])
+        for inicio in range(1500, 3000, 100):
+            agendador.adicionar(exercicios[inicio:inicio + 100])
+        completo = AgendadorRevisao(exercicios)
+        
+        for idioma in (None, Idioma.ALEMAO):
+            todos = completo.vencidos(datetime(2100, 1, 1), len(exercicios), idioma)
+            assert all(idioma in (None, i.idioma) for i in todos)
+            assert [i.vencimento for i in todos] == sorted(i.vencimento for i in todos)
+            ate = todos[len(todos) // 2].vencimento
+            esperados = [i for i in todos if i.vencimento <= ate][:50]
+            assert agendador.vencidos(ate, 50, idioma) == esperados
+    
+    def test_sqlite_igual_ao_json(self, historico_revisao, public_temporario, monkeypatch):
+        """O armazenamento SQLite mantém a mesma fila, inclusive após anexar exercícios."""
+        from armazenamento import ArmazenamentoSQLite, importar_arquivos
+        
+        novo = exercicio_revisao(self.b, 5)
+        assert client.post("/api/historico_de_pratica", json=novo).status_code == 201
+        esperado = self.fila(data_hora="2025-01-20T00:00:00Z")
+        
+        banco = public_temporario / "teste.sqlite3"
+        caminho = public_temporario / main.ARQUIVO_HISTORICO
+        caminho.write_text(json.dumps({"exercicios": historico_revisao}), encoding="utf-8")
+        (public_temporario / main.ARQUIVO_HISTORICO_SEGMENTO).unlink()
+        importar_arquivos(banco, public_temporario)
+        monkeypatch.setattr(main, "armazenamento", ArmazenamentoSQLite(banco))
+        
+        assert self.fila(data_hora="2025-01-20T00:00:00Z") != esperado
+        assert client.post("/api/historico_de_pratica", json=novo).status_code == 201
+        assert self.fila(data_hora="2025-01-20T00:00:00Z") == esperado
+
+
+class TestBuscaConhecimento:
+    """Testes para GET /api/base_de_conhecimento/busca."""
+    
+    @pytest.fixture
+    def base_busca(self, public_temporario):
+        """Acrescenta à base registros com acentos e termos repetidos em campos diferentes."""
+        registros = [
+            {**gerar_conhecimento("das Mädchen"), "traducao": "a menina", "divisao_silabica": "Mäd-chen"},
+            {**gerar_conhecimento("Mädchenname"), "traducao": "nome de solteira"},
+            {**gerar_conhecimento("die Straße"), "traducao": "a rua"},
+            {**gerar_conhecimento("the girl"), "idioma": "ingles", "traducao": "a menina das Mädchen"}
+        ]
+        for registro in registros:
+            response = client.post(f"/api/base_de_conhecimento/{registro['conhecimento_id']}", json=registro)
+            assert response.status_code == 201
+        return registros
+    
+    @staticmethod
+    def buscar(**params) -> list:
+        response = client.get("/api/base_de_conhecimento/busca", params=params)
+        assert response.status_code == 200
+        return [c["texto_original"] for c in response.json()]
+    
+    def test_sem_acentos_e_maiusculas(self, base_busca):
+        """"Madchen" encontra "Mädchen"; "STRASSE" encontra "Straße"."""
+        assert self.buscar(q="Madchen") == ["das Mädchen", "the girl", "Mädchenname"]
+        assert self.buscar(q="STRASSE") == ["die Straße"]
+    
+    def test_relevancia(self, base_busca):
+        """Palavra inteira vem antes de prefixo, texto_original antes de traducao e textos curtos antes."""
+        assert self.buscar(q="madchen")[0] == "das Mädchen"
+        assert self.buscar(q="madchenname") == ["Mädchenname"]
+        assert self.buscar(q="menina") == ["the girl", "das Mädchen"]
+        assert self.buscar(q="chenna") == ["Mädchenname"]
+    
+    def test_todos_os_termos(self, base_busca):
+        """Todos os termos devem ocorrer em algum dos campos."""
+        assert self.buscar(q="mädchen menina") == ["das Mädchen", "the girl"]
+        assert self.buscar(q="mädchen rua") == []
+        assert self.buscar(q="?!") == []
+    
+    def test_filtros_e_limite(self, base_busca):
+        """idioma, tipo_conhecimento e limite restringem os resultados."""
+        assert self.buscar(q="madchen", idioma="ingles") == ["the girl"]
+        assert self.buscar(q="madchen", tipo_conhecimento="frase") == []
+        assert self.buscar(q="madchen", limite=1) == ["das Mädchen"]
+        assert client.get("/api/base_de_conhecimento/busca", params={"q": ""}).status_code == 422
+        assert client.get("/api/base_de_conhecimento/busca", params={"q": "a", "limite": 101}).status_code == 422
+    
+    def test_escritas_atualizam_sem_reconstruir(self, base_busca, monkeypatch):
+        """POST, PATCH e DELETE de itens atualizam o índice de busca sem reconstruí-lo."""
+        import busca
+        
+        assert self.buscar(q="madchen")
+        construcoes = []
+        original = busca.IndiceBusca.__init__
+        monkeypatch.setattr(
+            busca.IndiceBusca,
+            "__init__",
+            lambda self, conhecimentos=(): construcoes.append(conhecimentos) or original(self, conhecimentos)
+        )
+        
+        mae = base_busca[0]["conhecimento_id"]
+        assert client.patch(f"/api/base_de_conhecimento/{mae}", json={"texto_original": "die Mutter"}).status_code == 200
+        novo = gerar_conhecimento("Müdigkeit")
+        assert client.post(f"/api/base_de_conhecimento/{novo['conhecimento_id']}", json=novo).status_code == 201
+        assert client.delete(f"/api/base_de_conhecimento/{base_busca[1]['conhecimento_id']}").status_code == 204
+        
+        assert self.buscar(q="madchen") == ["the girl"]
+        assert self.buscar(q="mutter") == ["die Mutter"]
+        assert self.buscar(q="mudigkeit") == ["Müdigkeit"]
+        assert all(conhecimentos == () for conhecimentos in construcoes)
+    
+    def test_put_reconstroi(self, base_busca):
+        """Após substituir a base inteira, a busca reflete a nova base."""
+        base = client.get("/api/base_de_conhecimento").json()
+        assert self.buscar(q="strasse") == ["die Straße"]
+        assert client.put("/api/base_de_conhecimento", json=base[:-2]).status_code == 200
+        assert self.buscar(q="strasse") == []
+    
+    def test_sqlite_igual_ao_json(self, base_busca, public_temporario, monkeypatch):
+        """O armazenamento SQLite mantém o mesmo índice, inclusive após escritas por item."""
+        from armazenamento import ArmazenamentoSQLite, importar_arquivos
+        
+        consultas = ["madchen", "menina", "a", "mädchen menina"]
+        esperados = [self.buscar(q=q) for q in consultas]
+        banco = public_temporario / "teste.sqlite3"
+        importar_arquivos(banco, public_temporario)
+        monkeypatch.setattr(main, "armazenamento", ArmazenamentoSQLite(banco))
+        assert [self.buscar(q=q) for q in consultas] == esperados
+        
+        mae = base_busca[0]["conhecimento_id"]
+        assert client.patch(f"/api/base_de_conhecimento/{mae}", json={"texto_original": "die Mutter"}).status_code == 200
+        assert client.delete(f"/api/base_de_conhecimento/{base_busca[3]['conhecimento_id']}").status_code == 204
+        assert self.buscar(q="madchen") == ["Mädchenname"]
+        assert self.buscar(q="mutter") == ["die Mutter"]
+
+
+class TestPatchPrompts:
+    """Testes para PATCH /api/prompts (JSON Patch, RFC 6902)."""
+    
+    @staticmethod
+    def patch(operacoes, **cabecalhos):
+        return client.patch(
+            "/api/prompts",
+            content=json.dumps(operacoes),
+            headers={"Content-Type": "application/json-patch+json", **cabecalhos}
+        )
+    
+    @staticmethod
+    def novo_prompt(prompt_id: str) -> dict:
+        return {
+            "prompt_id": prompt_id,
+            "descricao": "Prompt criado por JSON Patch",
+            "template": "Olá {{nome}}",
+            "parametros": ["nome"],
+            "resposta_estruturada": False,
+            "ultima_edicao": "2025-11-20T10:00:00Z"
+        }
+    
+    def test_replace_retorna_nova_versao(self, public_temporario):
+        """A resposta traz a coleção alterada e o ETag que o GET passa a devolver."""
+        response = self.patch([{"op": "replace", "path": "/prompts/0/template", "value": "Resuma: {{texto}}"}])
+        assert response.status_code == 200
+        assert response.json()["prompts"][0]["template"] == "Resuma: {{texto}}"
+        
+        leitura = client.get("/api/prompts")
+        assert leitura.json()["prompts"][0]["template"] == "Resuma: {{texto}}"
+        assert leitura.headers["etag"] == response.headers["etag"]
+        assert leitura.content == response.content
+    
+    def test_arquivo_igual_ao_put(self, public_temporario):
+        """O arquivo gravado é o mesmo que o PUT da coleção resultante gravaria."""
+        response = self.patch([
+            {"op": "add", "path": "/prompts/-", "value": self.novo_prompt("saudacao_v1")},
+            {"op": "move", "from": "/prompts/0", "path": "/prompts/1"},
+            {"op": "replace", "path": "/descricao", "value": "Coleção ãé"}
+        ])
+        assert response.status_code == 200
+        colecao = ColecaoPrompts(**response.json())
+        
+        caminho = public_temporario / main.ARQUIVO_PROMPTS
+        esperado = json.dumps(colecao.model_dump(mode="json"), ensure_ascii=False, indent=2)
+        assert caminho.read_text(encoding="utf-8") == esperado
+    
+    def test_operacoes(self, public_temporario):
+        """add, remove, copy e test aplicados em sequência."""
+        original = client.get("/api/prompts").json()["prompts"]
+        response = self.patch([
+            {"op": "test", "path": "/prompts/0/prompt_id", "value": original[0]["prompt_id"]},
+            {"op": "copy", "from": "/prompts/0", "path": "/prompts/-"},
+            {"op": "replace", "path": "/prompts/" + str(len(original)) + "/prompt_id", "value": "copia_v1"},
+            {"op": "remove", "path": "/prompts/1"},
+            {"op": "add", "path": "/prompts/0/parametros/0", "value": "idioma"}
+        ])
+        assert response.status_code == 200
+        prompts = response.json()["prompts"]
+        assert [p["prompt_id"] for p in prompts] == (
+            [original[0]["prompt_id"]] + [p["prompt_id"] for p in original[2:]] + ["copia_v1"]
+        )
+        assert prompts[0]["parametros"] == ["idioma"] + original[0]["parametros"]
+        assert prompts[-1]["parametros"] == original[0]["parametros"]
+    
+    def test_prompts_nao_alterados_sao_reaproveitados(self, public_temporario):
+        """Só os prompts tocados pelo patch são validados de novo."""
+        antes = main.obter_entrada_prompts().objeto.prompts
+        assert self.patch([{"op": "replace", "path": "/prompts/1/descricao", "value": "Nova"}]).status_code == 200
+        
+        depois = main.obter_entrada_prompts().objeto.prompts
+        assert depois[0] is antes[0]
+        assert depois[1] is not antes[1] and depois[1].descricao == "Nova"
+        assert all(a is b for a, b in zip(antes[2:], depois[2:]))
+    
+    def test_prompt_id_duplicado(self, public_temporario):
+        """Adicionar ou renomear para um prompt_id existente retorna 400."""
+        original = client.get("/api/prompts").json()["prompts"]
+        response = self.patch([{"op": "add", "path": "/prompts/-", "value": self.novo_prompt(original[0]["prompt_id"])}])
+        assert response.status_code == 400
+        assert "únicos" in response.json()["detail"]
+        
+        response = self.patch([{"op": "replace", "path": "/prompts/1/prompt_id", "value": original[0]["prompt_id"]}])
+        assert response.status_code == 400
+    
+    def test_troca_de_ids_permitida(self, public_temporario):
+        """Trocar os IDs de dois prompts no mesmo patch não gera duplicidade."""
+        original = client.get("/api/prompts").json()["prompts"]
+        response = self.patch([
+            {"op": "replace", "path": "/prompts/0/prompt_id", "value": original[1]["prompt_id"]},
+            {"op": "replace", "path": "/prompts/1/prompt_id", "value": original[0]["prompt_id"]}
+        ])
+        assert response.status_code == 200
+        
+        # A contagem mantida na nova versão continua detectando duplicidades
+        response = self.patch([{"op": "add", "path": "/prompts/-", "value": self.novo_prompt(original[0]["prompt_id"])}])
+        assert response.status_code == 400
+    
+    def test_prompt_invalido_retorna_422(self, public_temporario):
+        """Um prompt alterado que não passa no modelo retorna 422 e não grava nada."""
+        caminho = public_temporario / main.ARQUIVO_PROMPTS
+        original = caminho.read_text(encoding="utf-8")
+        response = self.patch([{"op": "remove", "path": "/prompts/0/template"}])
+        assert response.status_code == 422
+        assert caminho.read_text(encoding="utf-8") == original
+    
+    def test_colecao_vazia_retorna_400(self, public_temporario):
+        """O patch não pode esvaziar a coleção."""
+        response = self.patch([{"op": "replace", "path": "/prompts", "value": []}])
+        assert response.status_code == 400
+    
+    def test_conflitos_retornam_409(self, public_temporario):
+        """Caminho inexistente e test que falha retornam 409."""
+        assert self.patch([{"op": "remove", "path": "/prompts/999"}]).status_code == 409
+        assert self.patch([{"op": "replace", "path": "/inexistente", "value": 1}]).status_code == 409
+        assert self.patch([{"op": "test", "path": "/prompts/0/resposta_estruturada", "value": 1}]).status_code == 409
+    
+    def test_patch_malformado_retorna_400(self, public_temporario):
+        """Operação desconhecida, membro ausente ou ponteiro inválido retornam 400."""
+        assert self.patch([{"op": "incrementar", "path": "/descricao"}]).status_code == 400
+        assert self.patch([{"op": "add", "path": "/descricao"}]).status_code == 400
+        assert self.patch([{"op": "remove", "path": "prompts/0"}]).status_code == 400
+        assert self.patch([{"op": "remove", "path": "/prompts/01"}]).status_code == 400
+    
+    def test_patch_atomico(self, public_temporario):
+        """Se uma operação falha, nenhuma das anteriores é aplicada."""
+        antes = client.get("/api/prompts").json()
+        response = self.patch([
+            {"op": "replace", "path": "/descricao", "value": "Alterada"},
+            {"op": "remove", "path": "/prompts/999"}
+        ])
+        assert response.status_code == 409
+        assert client.get("/api/prompts").json() == antes
+    
+    def test_if_match(self, public_temporario):
+        """If-Match com ETag antigo retorna 412; com o atual, aplica o patch."""
+        etag = client.get("/api/prompts").headers["etag"]
+        operacao = [{"op": "replace", "path": "/descricao", "value": "Primeira"}]
+        assert self.patch(operacao, **{"If-Match": etag}).status_code == 200
+        assert self.patch(operacao, **{"If-Match": etag}).status_code == 412
+    
+    def test_nao_altera_documento_original(self):
+        """aplicar_patch copia apenas o caminho alterado e preserva o original."""
+        from patch_json import aplicar_patch
+        
+        documento = {"a": {"b": [1, 2]}, "c": {"d": 1}}
+        novo = aplicar_patch(documento, [
+            {"op": "add", "path": "/a/b/1", "value": 9},
+            {"op": "add", "path": "/a~1b", "value": {"~": True}},
+            {"op": "move", "from": "/a~1b", "path": "/e"}
+        ])
+        assert documento == {"a": {"b": [1, 2]}, "c": {"d": 1}}
+        assert novo == {"a": {"b": [1, 9, 2]}, "c": {"d": 1}, "e": {"~": True}}
+        assert novo["c"] is documento["c"]
+
+
+class TestRespostasComprimidas:
+    """Testes para as respostas gzip/brotli pré-comprimidas por versão do dataset."""
+    
+    @pytest.fixture
+    def compressoes(self, public_temporario, monkeypatch):
+        """Conta as chamadas de compressão."""
+        chamadas = []
+        original = main.comprimir
+        
+        def comprimir(corpo, codificacao):
+            chamadas.append(codificacao)
+            return original(corpo, codificacao)
+        
+        monkeypatch.setattr(main, "comprimir", comprimir)
+        return chamadas
+    
+    def test_gzip_comprimido_uma_vez_por_versao(self, compressoes):
+        """Requisições repetidas reaproveitam o corpo já comprimido."""
+        for _ in range(3):
+            response = client.get("/api/base_de_conhecimento", headers={"Accept-Encoding": "gzip"})
+            assert response.status_code == 200
+            assert response.headers["content-encoding"] == "gzip"
+            assert isinstance(response.json(), list)
+        assert compressoes == ["gzip"]
+    
+    def test_nova_versao_e_comprimida_de_novo(self, compressoes):
+        """Uma escrita gera uma nova versão, comprimida na leitura seguinte."""
+        client.get("/api/base_de_conhecimento", headers={"Accept-Encoding": "gzip"})
+        registro = gerar_conhecimento("der Apfel")
+        client.post(f"/api/base_de_conhecimento/{registro['conhecimento_id']}", json=registro)
+        
+        response = client.get("/api/base_de_conhecimento", headers={"Accept-Encoding": "gzip"})
+        assert "der Apfel" in [c["texto_original"] for c in response.json()]
+        assert compressoes == ["gzip", "gzip"]
+    
+    def test_sem_accept_encoding(self, compressoes):
+        """Sem Accept-Encoding (ou com gzip;q=0) o corpo vai sem compressão."""
+        for cabecalho in ("identity", "gzip;q=0"):
+            response = client.get("/api/base_de_conhecimento", headers={"Accept-Encoding": cabecalho})
+            assert "content-encoding" not in response.headers
+            assert isinstance(response.json(), list)
+        assert compressoes == []
+    
+    def test_etag_e_vary(self, compressoes):
+        """O ETag é o mesmo nas duas codificações, e a resposta varia com Accept-Encoding."""
+        comprimida = client.get("/api/base_de_conhecimento", headers={"Accept-Encoding": "gzip"})
+        simples = client.get("/api/base_de_conhecimento", headers={"Accept-Encoding": "identity"})
+        assert comprimida.headers["etag"] == simples.headers["etag"]
+        assert comprimida.json() == simples.json()
+        assert comprimida.headers["vary"] == "Accept, Accept-Encoding"
+        
+        response = client.get(
+            "/api/base_de_conhecimento",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": comprimida.headers["etag"]}
+        )
+        assert response.status_code == 304
+        assert response.headers["vary"] == "Accept, Accept-Encoding"
+    
+    def test_respostas_filtradas_nao_sao_comprimidas(self, compressoes):
+        """Páginas e filtros, montados por requisição, não passam pela compressão."""
+        response = client.get("/api/historico_de_pratica", params={"limite": 5}, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert compressoes == []
+    
+    def test_escolher_codificacao(self):
+        """Negociação de Accept-Encoding com pesos e curinga."""
+        from compressao import CODIFICACOES, escolher_codificacao
+        
+        assert escolher_codificacao(None) is None
+        assert escolher_codificacao("deflate") is None
+        assert escolher_codificacao("gzip, deflate") == "gzip"
+        assert escolher_codificacao("*;q=0.5, gzip;q=0") == ("br" if "br" in CODIFICACOES else None)
+        assert escolher_codificacao("br;q=0.1, gzip;q=0.9") == "gzip"
+        assert escolher_codificacao("*") == CODIFICACOES[0]
+
+
+def valor_metrica(texto: str, linha: str) -> float:
+    """Valor da série `linha` (nome com rótulos) na exposição do /metrics (0 se ausente)."""
+    for atual in texto.splitlines():
+        nome, _, valor = atual.rpartition(" ")
+        if nome == linha:
+            return float(valor)
+    return 0.0
+
+
+class TestMetricas:
+    """Testes para GET /metrics (formato de texto do Prometheus)."""
+    
+    def test_formato_texto(self):
+        """Responde em text/plain com HELP e TYPE de cada métrica."""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE api_requisicao_duracao_segundos histogram" in response.text
+        assert "# TYPE api_fase_duracao_segundos histogram" in response.text
+        assert "# TYPE dataset_registros gauge" in response.text
+    
+    def test_latencia_por_rota(self):
+        """Cada requisição entra no histograma da rota (modelo do caminho, sem parâmetros)."""
+        serie = 'api_requisicao_duracao_segundos_count{metodo="PATCH",rota="/api/base_de_conhecimento/{conhecimento_id}"}'
+        antes = valor_metrica(client.get("/metrics").text, serie)
+        for _ in range(3):
+            assert client.patch(f"/api/base_de_conhecimento/{uuid4()}", json={}).status_code == 404
+        texto = client.get("/metrics").text
+        
+        assert valor_metrica(texto, serie) == antes + 3
+        status = 'api_requisicoes_total{metodo="PATCH",rota="/api/base_de_conhecimento/{conhecimento_id}",status="404"}'
+        assert valor_metrica(texto, status) >= 3
+        infinito = 'api_requisicao_duracao_segundos_bucket{metodo="PATCH",rota="/api/base_de_conhecimento/{conhecimento_id}",le="+Inf"}'
+        assert valor_metrica(texto, infinito) == antes + 3
+    
+    def test_fases_da_carga_e_da_gravacao(self, public_temporario):
+        """Carregar e gravar um dataset registra as fases na rota que as causou."""
+        client.get("/api/frases_do_dialogo")
+        frases = client.get("/api/frases_do_dialogo").json()
+        assert client.put("/api/frases_do_dialogo", json=frases).status_code == 200
+        texto = client.get("/metrics").text
+        
+        for fase in ("leitura", "decodificacao", "validacao", "serializacao"):
+            assert valor_metrica(texto, f'api_fase_duracao_segundos_count{{fase="{fase}",rota="/api/frases_do_dialogo"}}') >= 1
+        # A gravação roda na thread do escritor, com a rota de quem a enfileirou
+        assert valor_metrica(texto, 'api_fase_duracao_segundos_count{fase="gravacao",rota="/api/frases_do_dialogo"}') >= 1
+    
+    def test_tamanho_dos_datasets(self, public_temporario):
+        """Registros vêm da versão em memória e bytes do tamanho dos arquivos."""
+        prompts = client.get("/api/prompts").json()["prompts"]
+        texto = client.get("/metrics").text
+        
+        assert valor_metrica(texto, 'dataset_registros{dataset="prompts"}') == len(prompts)
+        tamanho = (public_temporario / main.ARQUIVO_PROMPTS).stat().st_size
+        assert valor_metrica(texto, 'dataset_bytes{dataset="prompts"}') == tamanho
+    
+    def test_rotulos_com_nomes_dos_datasets(self, public_temporario, monkeypatch):
+        """Os rótulos `dataset` são os mesmos nomes usados na API e nos eventos, em ambos os armazenamentos."""
+        from armazenamento import ArmazenamentoSQLite, importar_arquivos
+        
+        client.get("/api/base_de_conhecimento")
+        client.get("/api/historico_de_pratica")
+        assert set(main.armazenamento.tamanhos()) == {"base_de_conhecimento", "historico_de_pratica"}
+        texto = client.get("/metrics").text
+        for dataset in main.ARQUIVOS_DATASETS:
+            assert f'dataset_bytes{{dataset="{dataset}"}}' in texto
+        
+        banco = public_temporario / "teste.sqlite3"
+        registros = importar_arquivos(banco, public_temporario)
+        monkeypatch.setattr(main, "armazenamento", ArmazenamentoSQLite(banco))
+        texto = client.get("/metrics").text
+        assert valor_metrica(texto, 'dataset_registros{dataset="base_de_conhecimento"}') == registros[0]
+        assert valor_metrica(texto, 'dataset_registros{dataset="historico_de_pratica"}') == registros[1]
+    
+    def test_streaming_medido_ate_o_primeiro_bloco(self):
+        """Respostas em streaming entram no histograma com o tempo até o primeiro bloco, não com a conexão inteira."""
+        from types import SimpleNamespace
+        from metricas import MiddlewareMetricas
+        
+        async def aplicacao(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"retry: 2000\n\n", "more_body": True})
+            await asyncio.sleep(0.3)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        
+        async def enviar(mensagem):
+            pass
+        
+        serie = 'api_requisicao_duracao_segundos_{}{{metodo="GET",rota="/teste/streaming"}}'
+        antes = client.get("/metrics").text
+        escopo = {"type": "http", "method": "GET", "path": "/teste", "route": SimpleNamespace(path="/teste/streaming")}
+        asyncio.run(MiddlewareMetricas(aplicacao)(escopo, None, enviar))
+        depois = client.get("/metrics").text
+        
+        assert valor_metrica(depois, serie.format("count")) == valor_metrica(antes, serie.format("count")) + 1
+        assert valor_metrica(depois, serie.format("sum")) - valor_metrica(antes, serie.format("sum")) < 0.3
+    
+    def test_histograma_acumulado(self):
+        """Buckets são acumulados e terminam em +Inf com a contagem total."""
+        from metricas import Histograma
+        
+        histograma = Histograma("teste_segundos", "Teste.", ("rota",), limites=(0.1, 1.0))
+        for valor in (0.05, 0.5, 0.5, 3.0):
+            histograma.observar(valor, "/x")
+        assert histograma.exportar() == [
+            'teste_segundos_bucket{rota="/x",le="0.1"} 1',
+            'teste_segundos_bucket{rota="/x",le="1"} 3',
+            'teste_segundos_bucket{rota="/x",le="+Inf"} 4',
+            'teste_segundos_sum{rota="/x"} 4.05',
+            'teste_segundos_count{rota="/x"} 4'
+        ]
+
+
+def pstats_de(base: Path):
+    """Estatísticas do arquivo .pstats de um perfil gravado."""
+    import pstats
+    return pstats.Stats(str(base.with_suffix(".pstats")))
+
+
+class TestPerfilador:
+    """Testes para o perfilador opcional de requisições."""
+    
+    @pytest.fixture
+    def perfilador(self, tmp_path, monkeypatch):
+        """Middleware do perfilador da aplicação, gravando em uma pasta temporária."""
+        from perfilador import MiddlewarePerfilador
+        
+        client.get("/")
+        middleware = main.app.middleware_stack
+        while not isinstance(middleware, MiddlewarePerfilador):
+            middleware = middleware.app
+        monkeypatch.setattr(middleware, "diretorio", tmp_path / "perfis")
+        return middleware
+    
+    def test_desligado_por_padrao(self, perfilador):
+        """Sem taxa e sem permissão para o cabeçalho, nada é perfilado."""
+        response = client.get("/api/prompts", headers={"X-Perfilar": "1"})
+        assert "x-perfil" not in response.headers
+        assert not perfilador.diretorio.exists()
+    
+    def test_cabecalho_grava_pstats_e_pilhas(self, perfilador, monkeypatch):
+        """Com o cabeçalho permitido, grava .pstats e .collapsed e informa o nome em X-Perfil."""
+        import pstats
+        
+        monkeypatch.setattr(perfilador, "permitir_cabecalho", True)
+        response = client.get("/api/prompts", headers={"X-Perfilar": "1"})
+        assert response.status_code == 200
+        
+        nome = response.headers["x-perfil"]
+        assert "GET-api_prompts" in nome
+        base = perfilador.diretorio / nome
+        estatisticas = pstats.Stats(str(base.with_suffix(".pstats")))
+        # O handler síncrono roda no pool de threads e também é medido
+        assert any(funcao == "get_prompts" for _, _, funcao in estatisticas.stats)
+        for linha in base.with_suffix(".collapsed").read_text(encoding="utf-8").splitlines():
+            pilha, _, contagem = linha.rpartition(" ")
+            assert pilha and int(contagem) > 0
+    
+    def test_escrita_perfilada_na_thread_do_escritor(self, perfilador, monkeypatch, public_temporario):
+        """Um PUT inclui no perfil o que roda na thread do escritor do dataset."""
+        import pstats
+        
+        monkeypatch.setattr(perfilador, "taxa", 1.0)
+        base = client.get("/api/base_de_conhecimento").json()
+        response = client.put("/api/base_de_conhecimento", json=base)
+        assert response.status_code == 200
+        
+        caminho = perfilador.diretorio / (response.headers["x-perfil"] + ".pstats")
+        funcoes = {funcao for _, _, funcao in pstats.Stats(str(caminho)).stats}
+        assert "gravar_atomico" in funcoes
+    
+    def test_validacao_do_corpo_perfilada(self, perfilador, monkeypatch, public_temporario):
+        """A validação do corpo pelo Pydantic, feita no event loop antes do handler, entra no perfil."""
+        monkeypatch.setattr(perfilador, "taxa", 1.0)
+        base = client.get("/api/base_de_conhecimento").json()
+        response = client.put("/api/base_de_conhecimento", json=base)
+        assert response.status_code == 200
+        
+        # ModelField.validate do FastAPI, que valida o corpo com o TypeAdapter do parâmetro
+        estatisticas = pstats_de(perfilador.diretorio / response.headers["x-perfil"]).stats
+        assert any(
+            funcao == "validate" and Path(arquivo).name == "_compat.py"
+            for arquivo, _, funcao in estatisticas
+        )
+    
+    def test_um_perfil_ativo_por_vez(self, perfilador, monkeypatch, public_temporario):
+        """Como no Python 3.12+, um segundo cProfile ativo falharia: handler síncrono e escrita usam um só."""
+        import cProfile
+        import perfilador as modulo
+        
+        ativos = []
+        
+        class PerfilUnico(cProfile.Profile):
+            def enable(self, *args, **kwargs):
+                if ativos:
+                    raise ValueError("Another profiling tool is already active")
+                ativos.append(self)
+                super().enable(*args, **kwargs)
+            
+            def disable(self):
+                super().disable()
+                if self in ativos:
+                    ativos.remove(self)
+        
+        monkeypatch.setattr(modulo.cProfile, "Profile", PerfilUnico)
+        monkeypatch.setattr(perfilador, "permitir_cabecalho", True)
+        leitura = client.get("/api/prompts", headers={"X-Perfilar": "1"})
+        assert leitura.status_code == 200
+        escrita = client.put("/api/prompts", json=leitura.json(), headers={"X-Perfilar": "1"})
+        assert escrita.status_code == 200
+        
+        for response, funcao in ((leitura, "get_prompts"), (escrita, "gravar_atomico")):
+            base = perfilador.diretorio / response.headers["x-perfil"]
+            funcoes = {f for _, _, f in pstats_de(base).stats}
+            assert funcao in funcoes
+            assert base.with_suffix(".collapsed").exists()
+    
+    def test_outra_ferramenta_ativa_grava_so_pilhas(self, perfilador, monkeypatch):
+        """Se o cProfile não puder ser ativado, a requisição segue e só o .collapsed é gravado."""
+        import cProfile
+        import perfilador as modulo
+        
+        class PerfilOcupado(cProfile.Profile):
+            def enable(self, *args, **kwargs):
+                raise ValueError("Another profiling tool is already active")
+        
+        monkeypatch.setattr(modulo.cProfile, "Profile", PerfilOcupado)
+        monkeypatch.setattr(perfilador, "permitir_cabecalho", True)
+        response = client.get("/api/prompts", headers={"X-Perfilar": "1"})
+        assert response.status_code == 200
+        
+        base = perfilador.diretorio / response.headers["x-perfil"]
+        assert base.with_suffix(".collapsed").exists()
+        assert not base.with_suffix(".pstats").exists()
+    
+    def test_taxa_zero_nao_perfila(self, perfilador, monkeypatch):
+        """Com a taxa zerada e sem cabeçalho, nenhuma requisição é perfilada."""
+        monkeypatch.setattr(perfilador, "permitir_cabecalho", True)
+        for _ in range(5):
+            assert "x-perfil" not in client.get("/api/prompts").headers
+        assert not perfilador.diretorio.exists()
+
+
+class TestAquecimento:
+    """Testes para o aquecimento na inicialização e GET /health/ready."""
+    
+    def test_pronto_com_tempo_por_dataset(self, public_temporario):
+        """Com datasets válidos, /health/ready responde 200 com a duração de cada carga."""
+        with TestClient(app) as cliente:
+            response = cliente.get("/health/ready")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["pronto"] is True
+        assert set(data["datasets"]) == {"base_de_conhecimento", "historico_de_pratica", "prompts", "frases_do_dialogo"}
+        for carga in data["datasets"].values():
+            assert carga["pronto"] is True
+            assert carga["duracao_ms"] >= 0
+            assert carga["erro"] is None
+    
+    def test_primeira_requisicao_usa_cache(self, public_temporario):
+        """Depois do aquecimento, a primeira leitura já é um acerto do cache."""
+        with TestClient(app) as cliente:
+            antes = main.cache_datasets.estatisticas()
+            assert cliente.get("/api/frases_do_dialogo").status_code == 200
+            depois = main.cache_datasets.estatisticas()
+        
+        assert depois["acertos"] == antes["acertos"] + 1
+        assert depois["falhas"] == antes["falhas"]
+    
+    def test_dataset_invalido_retorna_503(self, public_temporario):
+        """Um arquivo corrompido é detectado na inicialização e reportado em /health/ready."""
+        (public_temporario / main.ARQUIVO_FRASES).write_text("{ corrompido", encoding="utf-8")
+        with TestClient(app) as cliente:
+            response = cliente.get("/health/ready")
+        
+        assert response.status_code == 503
+        data = response.json()
+        assert data["pronto"] is False
+        assert data["datasets"]["frases_do_dialogo"]["pronto"] is False
+        assert "decodificar JSON" in data["datasets"]["frases_do_dialogo"]["erro"]
+        assert data["datasets"]["prompts"]["pronto"] is True
+    
+    def test_modo_estrito_impede_inicializacao(self, public_temporario, monkeypatch):
+        """Com AQUECIMENTO_ESTRITO, um dataset inválido impede a subida do servidor."""
+        monkeypatch.setattr(main, "AQUECIMENTO_ESTRITO", True)
+        (public_temporario / main.ARQUIVO_PROMPTS).write_text("{}", encoding="utf-8")
+        with pytest.raises(RuntimeError, match="prompts"):
+            with TestClient(app):
+                pass
+    
+    def test_aquecimento_desligado(self, public_temporario, monkeypatch):
+        """Com AQUECIMENTO=false, o servidor fica pronto sem carregar nada."""
+        monkeypatch.setattr(main, "AQUECIMENTO", False)
+        with TestClient(app) as cliente:
+            response = cliente.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["datasets"] == {}
+
+
+class TestRenderizacaoPrompts:
+    """Testes para POST /api/prompts/{prompt_id}/render e os templates compilados."""
+    
+    @staticmethod
+    def renderizar(prompt_id, parametros):
+        return client.post(f"/api/prompts/{prompt_id}/render", json={"parametros": parametros})
+    
+    def test_renderiza_lote(self, public_temporario):
+        """Cada conjunto de parâmetros gera um texto, na ordem do lote; números viram texto."""
+        response = self.renderizar("gerador_resumo_v1", [
+            {"texto_completo": "Erster Text", "numero_de_paragrafos": 2},
+            {"texto_completo": "Zweiter Text", "numero_de_paragrafos": "3"}
+        ])
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["prompt_id"] == "gerador_resumo_v1"
+        assert data["resultados"] == [
+            "Por favor, gere um resumo conciso do seguinte texto: 'Erster Text'. "
+            "O resumo deve ter no máximo 2 parágrafos e destacar os pontos-chave.",
+            "Por favor, gere um resumo conciso do seguinte texto: 'Zweiter Text'. "
+            "O resumo deve ter no máximo 3 parágrafos e destacar os pontos-chave."
+        ]
+        assert response.headers["etag"] == client.get("/api/prompts").headers["etag"]
+    
+    def test_resultado_igual_a_substituicao(self, public_temporario):
+        """O plano compilado produz o mesmo texto que substituir cada marcador no template."""
+        colecao = client.get("/api/prompts").json()
+        for prompt in colecao["prompts"]:
+            valores = {nome: f"<{nome} {i}>" for i, nome in enumerate(prompt["parametros"])}
+            esperado = prompt["template"]
+            for nome, valor in valores.items():
+                esperado = esperado.replace(colecao["marcador_de_paramentros"].replace("param", nome), valor)
+            
+            response = self.renderizar(prompt["prompt_id"], [valores] * 3)
+            assert response.json()["resultados"] == [esperado] * 3
+    
+    def test_parametros_faltando_ou_desconhecidos(self, public_temporario):
+        """Um conjunto sem todos os parâmetros ou com parâmetros extras é rejeitado com o índice."""
+        valido = {"texto_usuario": "Gut"}
+        faltando = self.renderizar("classificador_sentimento_v1", [valido, {}])
+        assert faltando.status_code == 422
+        assert "Conjunto de parâmetros 1" in faltando.json()["detail"]
+        assert "texto_usuario" in faltando.json()["detail"]
+        
+        extra = self.renderizar("classificador_sentimento_v1", [{**valido, "idioma": "alemao"}])
+        assert extra.status_code == 422
+        assert "idioma" in extra.json()["detail"]
+        
+        assert self.renderizar("classificador_sentimento_v1", []).status_code == 422
+    
+    def test_prompt_inexistente(self, public_temporario):
+        """Um prompt_id que não existe na coleção retorna 404."""
+        assert self.renderizar("nao_existe_v1", [{}]).status_code == 404
+    
+    def test_template_divergente_dos_parametros(self, public_temporario):
+        """Um template com marcador não declarado em parametros não é renderizado (409)."""
+        response = TestPatchPrompts.patch([
+            {"op": "replace", "path": "/prompts/2/template", "value": "Analise: {{texto_usuario}} em {{idioma}}"}
+        ])
+        assert response.status_code == 200
+        
+        response = self.renderizar("classificador_sentimento_v1", [{"texto_usuario": "Gut"}])
+        assert response.status_code == 409
+        assert "'idioma'" in response.json()["detail"]
+    
+    def test_marcador_da_colecao_e_repeticoes(self, public_temporario):
+        """O formato do marcador vem da coleção e um parâmetro pode aparecer mais de uma vez."""
+        response = TestPatchPrompts.patch([
+            {"op": "replace", "path": "/marcador_de_paramentros", "value": "<%param%>"},
+            {"op": "replace", "path": "/prompts/2/template", "value": "<%texto_usuario%> / <% texto_usuario %> {{x}}"}
+        ])
+        assert response.status_code == 200
+        
+        response = self.renderizar("classificador_sentimento_v1", [{"texto_usuario": "Gut"}])
+        assert response.json()["resultados"] == ["Gut / Gut {{x}}"]
+    
+    def test_compilado_uma_vez_por_versao(self, public_temporario):
+        """Os templates são compilados uma vez por versão da coleção e de novo após uma escrita."""
+        entrada = main.obter_entrada_prompts()
+        templates = main.templates_prompts(entrada)
+        self.renderizar("classificador_sentimento_v1", [{"texto_usuario": "Gut"}])
+        assert main.templates_prompts(main.obter_entrada_prompts()) is templates
+        
+        TestPatchPrompts.patch([{"op": "replace", "path": "/prompts/2/template", "value": "Nota: {{texto_usuario}}"}])
+        response = self.renderizar("classificador_sentimento_v1", [{"texto_usuario": "Gut"}])
+        assert response.json()["resultados"] == ["Nota: Gut"]
+        assert main.templates_prompts(main.obter_entrada_prompts()) is not templates
+
+
+def ler_eventos(cabecalhos=(), acao=None, quantidade=1, espera=5.0):
+    """
+    Abre GET /api/eventos direto no app ASGI, executa `acao` (em outra thread) e
+    retorna (cabeçalhos, corpo) depois de `quantidade` eventos ou de `espera` segundos.
+    """
+    async def executar():
+        desconectar = asyncio.Event()
+        conectado = asyncio.Event()
+        recebido = asyncio.Event()
+        inicio, partes = {}, []
+        
+        async def receive():
+            await desconectar.wait()
+            return {"type": "http.disconnect"}
+        
+        async def send(mensagem):
+            if mensagem["type"] == "http.response.start":
+                inicio.update({k.decode(): v.decode() for k, v in mensagem["headers"]})
+            elif mensagem.get("body"):
+                partes.append(mensagem["body"])
+                conectado.set()
+                if b"".join(partes).count(b"\nevent: ") >= quantidade:
+                    recebido.set()
+        
+        escopo = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/api/eventos", "raw_path": b"/api/eventos",
+            "query_string": b"", "root_path": "", "client": ("127.0.0.1", 1), "server": ("teste", 80),
+            "headers": [(b"host", b"teste"), *cabecalhos]
+        }
+        tarefa = asyncio.create_task(app(escopo, receive, send))
+        await asyncio.wait_for(conectado.wait(), espera)
+        if acao is not None:
+            await asyncio.to_thread(acao)
+        try:
+            await asyncio.wait_for(recebido.wait(), espera)
+        except asyncio.TimeoutError:
+            pass
+        desconectar.set()
+        await asyncio.wait_for(tarefa, espera)
+        return inicio, b"".join(partes).decode()
+    
+    return asyncio.run(executar())
+
+
+def eventos_do_corpo(corpo: str) -> list:
+    """Dados (JSON) dos eventos `alteracao` de um corpo text/event-stream."""
+    return [
+        json.loads(bloco.split("data: ", 1)[1])
+        for bloco in corpo.split("\n\n")
+        if "event: alteracao" in bloco
+    ]
+
+
+class TestEventos:
+    """Testes para o stream de alterações GET /api/eventos."""
+    
+    @staticmethod
+    def ultimo_id() -> int:
+        eventos = main.canal_eventos.eventos()
+        return eventos[-1].id if eventos else 0
+    
+    def test_escrita_notificada_no_stream(self, public_temporario):
+        """Um PUT é enviado aos clientes conectados com o ETag que o GET passa a devolver."""
+        frases = client.get("/api/frases_do_dialogo").json()
+        
+        cabecalhos, corpo = ler_eventos(
+            acao=lambda: client.put("/api/frases_do_dialogo", json={**frases, "saudacao": f"Hallo {uuid4()}"})
+        )
+        
+        assert cabecalhos["content-type"].startswith("text/event-stream")
+        assert corpo.startswith("retry: ")
+        eventos = eventos_do_corpo(corpo)
+        assert len(eventos) == 1
+        assert eventos[0]["dataset"] == "frases_do_dialogo"
+        assert eventos[0]["origem"] == "servidor"
+        assert eventos[0]["ids"] is None
+        assert eventos[0]["versao"] == client.get("/api/frases_do_dialogo").headers["etag"]
+        assert main.canal_eventos.quantidade_assinantes() == 0
+    
+    def test_ids_dos_registros_alterados(self, public_temporario):
+        """Escritas de itens informam os IDs alterados."""
+        anterior = self.ultimo_id()
+        exercicio = gerar_exercicio(1)
+        assert client.post("/api/historico_de_pratica", json=exercicio).status_code == 201
+        response = client.patch(
+            "/api/prompts",
+            json=[{"op": "add", "path": "/prompts/-", "value": {**TestPatchPrompts.novo_prompt("evento_v1")}}]
+        )
+        assert response.status_code == 200
+        
+        eventos = main.canal_eventos.eventos(anterior)
+        assert [(e.dataset, e.ids) for e in eventos] == [
+            ("historico_de_pratica", [exercicio["exercicio_id"]]),
+            ("prompts", ["evento_v1"])
+        ]
+        assert eventos[1].versao == response.headers["etag"]
+    
+    def test_reconexao_recebe_eventos_perdidos(self, public_temporario):
+        """Com Last-Event-ID, os eventos publicados depois dele são reenviados."""
+        anterior = self.ultimo_id()
+        frases = client.get("/api/frases_do_dialogo").json()
+        for saudacao in ("Servus", "Moin"):
+            client.put("/api/frases_do_dialogo", json={**frases, "saudacao": f"{saudacao} {uuid4()}"})
+        
+        _, corpo = ler_eventos(cabecalhos=[(b"last-event-id", str(anterior).encode())], quantidade=2)
+        
+        eventos = eventos_do_corpo(corpo)
+        assert [e["id"] for e in eventos] == [anterior + 1, anterior + 2]
+        assert f"id: {anterior + 2}\n" in corpo
+    
+    def test_last_event_id_desconhecido_pede_reinicio(self):
+        """Um Last-Event-ID que não está no histórico (ex.: de outra execução) gera o evento reinicio."""
+        _, corpo = ler_eventos(cabecalhos=[(b"last-event-id", b"999999999")], espera=0.5)
+        assert "event: reinicio\n" in corpo
+        assert not eventos_do_corpo(corpo)
+    
+    def test_alteracao_externa_publicada(self, public_temporario):
+        """Um arquivo alterado fora do servidor é publicado com origem externa; escritas da API, não."""
+        frases = client.get("/api/frases_do_dialogo").json()
+        client.put("/api/frases_do_dialogo", json={**frases, "saudacao": f"Hallo {uuid4()}"})
+        anterior = self.ultimo_id()
+        main.verificar_alteracao_externa("frases_do_dialogo")
+        assert main.canal_eventos.eventos(anterior) == []
+        
+        caminho = public_temporario / main.ARQUIVO_FRASES
+        caminho.write_text(json.dumps({**frases, "saudacao": f"Moin {uuid4()}"}), encoding="utf-8")
+        main.verificar_alteracao_externa("frases_do_dialogo")
+        
+        eventos = main.canal_eventos.eventos(anterior)
+        assert len(eventos) == 1
+        assert eventos[0].origem == "externa"
+        assert eventos[0].versao == client.get("/api/frases_do_dialogo").headers["etag"]
+    
+    @pytest.mark.parametrize("usar_watchfiles", [True, False])
+    def test_observador_detecta_arquivo_alterado(self, tmp_path, usar_watchfiles):
+        """A thread do observador chama verificar com o dataset do arquivo alterado."""
+        if usar_watchfiles and eventos.watchfiles is None:
+            pytest.skip("watchfiles não instalado")
+        arquivo = tmp_path / "dados.json"
+        arquivo.write_text("{}", encoding="utf-8")
+        alterados = []
+        sinal = threading.Event()
+        observador = eventos.ObservadorArquivos(lambda d: (alterados.append(d), sinal.set()), intervalo=0.02)
+        observador.iniciar(tmp_path, {"dados.json": "dados"}, usar_watchfiles=usar_watchfiles)
+        try:
+            time.sleep(0.2)
+            (tmp_path / "outro.json").write_text("{}", encoding="utf-8")
+            arquivo.write_text('{"a": 1}', encoding="utf-8")
+            assert sinal.wait(5)
+        finally:
+            observador.parar()
+        assert set(alterados) == {"dados"}
+    
+    def test_observador_ignora_gravacao_do_servidor(self, tmp_path):
+        """Alterações feitas dentro de gravando() não são verificadas."""
+        arquivo = tmp_path / "dados.json"
+        arquivo.write_text("{}", encoding="utf-8")
+        alterados = []
+        observador = eventos.ObservadorArquivos(alterados.append, intervalo=0.02)
+        observador.iniciar(tmp_path, {"dados.json": "dados"}, usar_watchfiles=False)
+        try:
+            with observador.gravando(arquivo):
+                arquivo.write_text('{"a": 1}', encoding="utf-8")
+                time.sleep(0.2)
+            time.sleep(0.1)
+        finally:
+            observador.parar()
+        assert alterados == []
+
+
 class TestDocumentacao:
     """Testes para documentação automática."""
     
@@ -476,6 +2903,14 @@ class TestDocumentacao:
         assert "openapi" in data
         assert "info" in data
         assert "paths" in data
+    
+    def test_exemplo_de_exercicio(self):
+        """O exemplo de exercício aparece na documentação e é um registro válido."""
+        from models import ADAPTADOR_EXERCICIO
+        
+        esquemas = client.get("/openapi.json").json()["components"]["schemas"]
+        exemplo = esquemas["ExercicioTraducao-Input"]["example"]
+        assert ADAPTADOR_EXERCICIO.validate_python(exemplo).tipo_pratica == "traducao"
 
 
 if __name__ == "__main__":
@@ -1,20 +1,135 @@
 """
 Validador de arquivos JSON contra schemas usando modelos Pydantic2.
 Valida os arquivos de dados da pasta /public contra seus respectivos schemas.
+
+No modo streaming, a base de conhecimento e o histórico são lidos em blocos e
+cada item é validado assim que é decodificado, sem carregar o arquivo inteiro;
+os erros indicam a posição em bytes do item no arquivo.
+
+Com jobs > 1, validar_todos valida os arquivos simultaneamente e divide os arrays
+grandes em lotes validados por um pool de processos; o relatório é idêntico ao
+da validação sequencial.
+
+Com um arquivo de cache, validar_todos reaproveita o resultado de execuções
+anteriores: arquivos inalterados não são nem lidos, e nos arquivos alterados só os
+itens novos ou modificados são validados. O cache é descartado quando models.py,
+este módulo ou a versão do Pydantic mudam.
 """
+import argparse
+import hashlib
+import inspect
 import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
-from pydantic import ValidationError
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Set, Tuple
+from pydantic import VERSION as VERSAO_PYDANTIC, ValidationError
+from pydantic_core import to_json
+
+from arquivos import gravar_atomico
+from leitor_json import ErroJSON, TAMANHO_BLOCO, iterar_array
 
 from models import (
     ConhecimentoIdioma,
     ColecaoPrompts,
+    ADAPTADOR_EXERCICIO,
     HistoricoPratica,
     FrasesDialogo
 )
 
 
+# No modo streaming, erros além deste limite são apenas contados
+LIMITE_ERROS_STREAMING = 100
+
+# Itens por lote enviado ao pool de processos
+TAMANHO_LOTE = 1000
+
+# Nome padrão do cache de validação, dentro da pasta validada
+ARQUIVO_CACHE = ".validacao_cache.json"
+
+# (índice no array, posição em bytes no arquivo ou None, item)
+Elemento = Tuple[int, Optional[int], Any]
+
+# Funções de validação por nome, para que possam ser referenciadas nos processos do pool
+_VALIDADORES: Dict[str, Callable[[Any], Any]] = {
+    "conhecimento": lambda item: ConhecimentoIdioma(**item),
+    "conhecimento_streaming": ConhecimentoIdioma.model_validate,
+    "exercicio": ADAPTADOR_EXERCICIO.validate_python,
+}
+
+
+def _validar_lote(
+    validador: str,
+    lote: List[Elemento],
+    prefixo_loc: Optional[Tuple[Any, ...]] = None
+) -> List[Tuple[int, Optional[int], List[str]]]:
+    """
+    Valida um lote de itens (executada no processo atual ou em um processo do pool).
+
+    Args:
+        validador: Chave de _VALIDADORES.
+        lote: Itens e sua localização no arquivo.
+        prefixo_loc: Se informado, cada erro é devolvido separadamente, como em
+            ValidationError.errors() do modelo que contém o array, com o `loc`
+            prefixado por prefixo_loc e pelo índice do item; senão, a mensagem
+            completa do erro do item.
+
+    Returns:
+        (índice, posição em bytes, mensagens) de cada item inválido, em ordem.
+    """
+    validar = _VALIDADORES[validador]
+    invalidos = []
+    for indice, posicao, item in lote:
+        try:
+            validar(item)
+        except ValidationError as e:
+            if prefixo_loc is None:
+                mensagens = [str(e)]
+            else:
+                mensagens = [str({**err, "loc": (*prefixo_loc, indice, *err["loc"])}) for err in e.errors()]
+            invalidos.append((indice, posicao, mensagens))
+    return invalidos
+
+
+def _enumerar(itens: List[Any]) -> Iterator[Elemento]:
+    """Elementos de uma lista já carregada (sem posição em bytes)."""
+    for indice, item in enumerate(itens):
+        yield indice, None, item
+
+
+def _resumo_item(item: Any) -> str:
+    """
+    Hash do conteúdo de um item, independente da formatação do arquivo.
+
+    A ordem das chaves faz parte do hash: reordená-las apenas faz o item ser
+    validado de novo. to_json é bem mais rápido que json.dumps por item.
+    """
+    return hashlib.blake2b(to_json(item), digest_size=16).hexdigest()
+
+
+def _resumo_arquivos(caminhos: Iterable[Path]) -> str:
+    """Hash do conteúdo dos arquivos, distinguindo arquivo ausente de arquivo vazio."""
+    resumo = hashlib.blake2b(digest_size=16)
+    for caminho in caminhos:
+        try:
+            with open(caminho, 'rb') as f:
+                resumo.update(b"+")
+                for bloco in iter(lambda: f.read(1 << 20), b''):
+                    resumo.update(bloco)
+        except FileNotFoundError:
+            resumo.update(b"-")
+        resumo.update(b"\0")
+    return resumo.hexdigest()
+
+
+def _resumo_esquema() -> str:
+    """Hash das regras de validação: models.py, este módulo e a versão do Pydantic."""
+    modulos = [Path(inspect.getfile(ConhecimentoIdioma)), Path(__file__)]
+    return _resumo_arquivos(modulos) + "-" + VERSAO_PYDANTIC
+
+
 class ResultadoValidacao:
     """Resultado da validação de um arquivo."""
     
@@ -34,11 +149,216 @@ class ResultadoValidacao:
 
 
 class ValidadorJSON:
-    """Validador de arquivos JSON da aplicação."""
+    """
+    Validador de arquivos JSON da aplicação.
+
+    Args:
+        pasta_public: Pasta com os arquivos de dados.
+        streaming: Valida a base de conhecimento e o histórico item a item, com
+            memória limitada independentemente do tamanho dos arquivos.
+        tamanho_bloco: Bytes lidos por vez no modo streaming.
+        jobs: Processos usados por validar_todos (1 = validação sequencial).
+        arquivo_cache: Cache de validação; se informado, itens já validados em
+            execuções anteriores não são validados de novo (ver salvar_cache).
+    """
     
-    def __init__(self, pasta_public: str = "public"):
+    def __init__(
+        self,
+        pasta_public: str = "public",
+        streaming: bool = False,
+        tamanho_bloco: int = TAMANHO_BLOCO,
+        jobs: int = 1,
+        arquivo_cache: Optional[Path] = None
+    ):
         self.pasta_public = Path(pasta_public)
+        self.streaming = streaming
+        self.tamanho_bloco = tamanho_bloco
+        self.jobs = jobs
+        self.arquivo_cache = Path(arquivo_cache) if arquivo_cache is not None else None
         self.resultados: List[ResultadoValidacao] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        # Hashes dos itens válidos por validador e resultados de arquivos inteiros
+        # lidos do cache e confirmados nesta execução
+        self._itens_anteriores: Dict[str, Set[str]] = {}
+        self._arquivos_anteriores: Dict[str, Dict[str, Any]] = {}
+        self._itens_confirmados: Dict[str, Set[str]] = {}
+        self._arquivos_confirmados: Dict[str, Dict[str, Any]] = {}
+        self.arquivos_reaproveitados = 0
+        self.itens_reaproveitados = 0
+        self.itens_validados = 0
+        if self.arquivo_cache is not None:
+            self._carregar_cache()
+    
+    def _carregar_cache(self) -> None:
+        """Lê o cache de validação; um cache ausente, corrompido ou de outro esquema é ignorado."""
+        try:
+            with open(self.arquivo_cache, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            if dados.get("esquema") != _resumo_esquema():
+                return
+            self._itens_anteriores = {nome: set(hashes) for nome, hashes in dados["itens"].items()}
+            self._arquivos_anteriores = dict(dados["arquivos"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self._itens_anteriores = {}
+            self._arquivos_anteriores = {}
+    
+    def salvar_cache(self) -> None:
+        """
+        Grava o cache de validação com o que foi confirmado nesta execução.
+
+        Validadores e arquivos não verificados nesta execução mantêm as entradas
+        anteriores; os demais passam a ter apenas os itens vistos agora, de modo
+        que itens removidos dos arquivos não se acumulam no cache.
+        """
+        if self.arquivo_cache is None:
+            return
+        itens = {**self._itens_anteriores, **self._itens_confirmados}
+        arquivos = {**self._arquivos_anteriores, **self._arquivos_confirmados}
+        if itens == self._itens_anteriores and arquivos == self._arquivos_anteriores and self.arquivo_cache.exists():
+            return
+        dados = {
+            "esquema": _resumo_esquema(),
+            "arquivos": arquivos,
+            "itens": {nome: sorted(hashes) for nome, hashes in itens.items()},
+        }
+        gravar_atomico(self.arquivo_cache, lambda f: json.dump(dados, f, ensure_ascii=False))
+    
+    def _validar_com_cache(
+        self,
+        validar: Callable[[], ResultadoValidacao],
+        arquivos: List[str],
+        validadores: List[str]
+    ) -> ResultadoValidacao:
+        """
+        Reaproveita o resultado de um arquivo válido cujo conteúdo não mudou.
+
+        Args:
+            validar: Método de validação do arquivo.
+            arquivos: Arquivos lidos pelo método.
+            validadores: Validadores de item usados pelo método, cujos hashes
+                continuam no cache quando o arquivo é reaproveitado.
+        """
+        if self.arquivo_cache is None:
+            return validar()
+        nome = validar.__name__
+        caminhos = [self.pasta_public / arquivo for arquivo in arquivos]
+        resumo = _resumo_arquivos(caminhos)
+        anterior = self._arquivos_anteriores.get(nome)
+        if anterior is not None and anterior["resumo"] == resumo:
+            # Itens dos arquivos inalterados continuam no cache
+            for validador in validadores:
+                if validador in self._itens_anteriores:
+                    self._itens_confirmados.setdefault(validador, set()).update(self._itens_anteriores[validador])
+            self._arquivos_confirmados[nome] = anterior
+            self.arquivos_reaproveitados += 1
+            return ResultadoValidacao(anterior["arquivo"], True, list(anterior["erros"]))
+        
+        resultado = validar()
+        # Só guarda o resultado se os arquivos não mudaram durante a validação
+        if resultado.valido and _resumo_arquivos(caminhos) == resumo:
+            self._arquivos_confirmados[nome] = {
+                "resumo": resumo,
+                "arquivo": resultado.arquivo,
+                "erros": resultado.erros,
+            }
+        return resultado
+    
+    @contextmanager
+    def _paralelo(self) -> Iterator[None]:
+        """Mantém o pool de processos aberto enquanto o bloco é executado."""
+        if self.jobs <= 1:
+            yield
+            return
+        with ProcessPoolExecutor(self.jobs) as pool:
+            # Inicia os processos agora, antes das threads que validam cada arquivo:
+            # um fork feito com outras threads em execução pode herdar travas ocupadas
+            pool.submit(int).result()
+            self._pool = pool
+            try:
+                yield
+            finally:
+                self._pool = None
+    
+    def _lotes(self, validador: str, elementos: Iterable[Elemento]) -> Iterator[Tuple[List[Elemento], List[str]]]:
+        """
+        Agrupa em lotes os elementos que precisam ser validados.
+
+        Com cache, os itens cujo hash já foi validado são apenas confirmados e não
+        entram nos lotes; cada lote vem acompanhado dos hashes dos seus itens.
+        """
+        anteriores = self._itens_anteriores.get(validador, set())
+        confirmados = self._itens_confirmados.setdefault(validador, set()) if self.arquivo_cache else None
+        lote: List[Elemento] = []
+        resumos: List[str] = []
+        for elemento in elementos:
+            if confirmados is not None:
+                resumo = _resumo_item(elemento[2])
+                if resumo in anteriores:
+                    confirmados.add(resumo)
+                    self.itens_reaproveitados += 1
+                    continue
+                resumos.append(resumo)
+            lote.append(elemento)
+            if len(lote) == TAMANHO_LOTE:
+                yield lote, resumos
+                lote, resumos = [], []
+        if lote:
+            yield lote, resumos
+    
+    def _concluir_lote(
+        self,
+        validador: str,
+        lote: List[Elemento],
+        resumos: List[str],
+        invalidos: List[Tuple[int, Optional[int], List[str]]]
+    ) -> List[Tuple[int, Optional[int], List[str]]]:
+        """Registra no cache os itens válidos do lote e devolve os inválidos."""
+        self.itens_validados += len(lote)
+        if resumos:
+            indices_invalidos = {indice for indice, _, _ in invalidos}
+            self._itens_confirmados[validador].update(
+                resumo for (indice, _, _), resumo in zip(lote, resumos) if indice not in indices_invalidos
+            )
+        return invalidos
+    
+    def _validar_lotes(
+        self,
+        validador: str,
+        elementos: Iterable[Elemento],
+        prefixo_loc: Optional[Tuple[Any, ...]] = None
+    ) -> Iterator[Tuple[int, Optional[int], List[str]]]:
+        """
+        Valida os elementos em lotes, no pool de processos se houver, entregando os
+        itens inválidos na ordem do arquivo (ver _validar_lote).
+
+        No máximo 2 * jobs lotes ficam pendentes, mantendo a memória limitada
+        quando os elementos vêm de uma leitura em streaming.
+        """
+        lotes = self._lotes(validador, elementos)
+        if self._pool is None:
+            for lote, resumos in lotes:
+                yield from self._concluir_lote(validador, lote, resumos, _validar_lote(validador, lote, prefixo_loc))
+            return
+        
+        pendentes = deque()
+        
+        def concluir_proximo():
+            lote, resumos, futuro = pendentes.popleft()
+            return self._concluir_lote(validador, lote, resumos, futuro.result())
+        
+        try:
+            for lote, resumos in lotes:
+                pendentes.append((lote, resumos, self._pool.submit(_validar_lote, validador, lote, prefixo_loc)))
+                if len(pendentes) >= 2 * self.jobs:
+                    yield from concluir_proximo()
+        except Exception:
+            # Erro de leitura: os lotes anteriores são relatados antes, como na validação sequencial
+            while pendentes:
+                yield from concluir_proximo()
+            raise
+        while pendentes:
+            yield from concluir_proximo()
     
     def _carregar_json(self, caminho: Path) -> Tuple[Optional[Any], Optional[str]]:
         """Carrega um arquivo JSON. Retorna (dados, erro)."""
@@ -62,11 +382,60 @@ class ValidadorJSON:
             return f"{nome_arquivo}: Objeto não pode estar vazio"
         return None
     
+    def _validar_array_streaming(
+        self,
+        caminho: Path,
+        chave: Optional[str],
+        validador: str,
+        rotulo: str
+    ) -> Tuple[int, List[str]]:
+        """
+        Valida os elementos de um array JSON à medida que são lidos.
+
+        Returns:
+            (quantidade de elementos, erros encontrados)
+        """
+        quantidade = 0
+        erros: List[str] = []
+        excedentes = 0
+        
+        def enumerar() -> Iterator[Elemento]:
+            nonlocal quantidade
+            for posicao, item in iterar_array(caminho, chave, self.tamanho_bloco):
+                yield quantidade, posicao, item
+                quantidade += 1
+        
+        try:
+            for indice, posicao, (mensagem,) in self._validar_lotes(validador, enumerar()):
+                if len(erros) < LIMITE_ERROS_STREAMING:
+                    erros.append(f"{rotulo} {indice} (byte {posicao}): {mensagem}")
+                else:
+                    excedentes += 1
+        except FileNotFoundError:
+            erros.append(f"Arquivo não encontrado: {caminho}")
+        except ErroJSON as e:
+            erros.append(f"Erro ao decodificar JSON: {e}")
+        except Exception as e:
+            erros.append(f"Erro ao ler arquivo: {e}")
+        if excedentes:
+            erros.append(f"... e mais {excedentes} erro(s) não exibidos")
+        return quantidade, erros
+    
     def validar_conhecimento_idiomas(self) -> ResultadoValidacao:
         """Valida [BASE] Conhecimento de idiomas.json."""
         arquivo = "[BASE] Conhecimento de idiomas.json"
         caminho = self.pasta_public / arquivo
         
+        if self.streaming:
+            quantidade, erros = self._validar_array_streaming(
+                caminho, None, "conhecimento_streaming", "Item"
+            )
+            if erros:
+                return ResultadoValidacao(arquivo, False, erros)
+            if quantidade == 0:
+                return ResultadoValidacao(arquivo, False, [f"{arquivo}: Array não pode estar vazio"])
+            return ResultadoValidacao(arquivo, True)
+        
         dados, erro = self._carregar_json(caminho)
         if erro:
             return ResultadoValidacao(arquivo, False, [erro])
@@ -83,11 +452,8 @@ class ValidadorJSON:
                 return ResultadoValidacao(arquivo, False, ["Dados devem ser um array"])
             
             # Valida cada item do array
-            for idx, item in enumerate(dados):
-                try:
-                    ConhecimentoIdioma(**item)
-                except ValidationError as e:
-                    erros.append(f"Item {idx}: {e}")
+            for idx, _, (mensagem,) in self._validar_lotes("conhecimento", _enumerar(dados)):
+                erros.append(f"Item {idx}: {mensagem}")
             
             if erros:
                 return ResultadoValidacao(arquivo, False, erros)
@@ -121,7 +487,42 @@ class ValidadorJSON:
         except Exception as e:
             return ResultadoValidacao(arquivo, False, [f"Erro na validação: {e}"])
     
+    def _validar_segmento_historico(self, caminho: Path) -> List[str]:
+        """Valida o segmento JSON Lines do histórico. Retorna a lista de erros."""
+        erros = []
+        try:
+            with open(caminho, 'rb') as f:
+                posicao = 0
+                for numero, linha in enumerate(f, start=1):
+                    inicio, posicao = posicao, posicao + len(linha)
+                    if not linha.strip():
+                        continue
+                    try:
+                        ADAPTADOR_EXERCICIO.validate_json(linha)
+                    except ValidationError as e:
+                        local = f"linha {numero} (byte {inicio})" if self.streaming else f"linha {numero}"
+                        erros.append(f"{caminho.name} {local}: {e}")
+        except Exception as e:
+            erros.append(f"Erro ao ler arquivo: {e}")
+        return erros
+    
     def validar_historico_pratica(self) -> ResultadoValidacao:
+        """
+        Valida [BASE] Histórico de prática.json (opcional) e, se existir,
+        o segmento append-only [BASE] Histórico de Prática.jsonl.
+        """
+        resultado = self._validar_historico_base()
+        
+        segmento = self.pasta_public / "[BASE] Histórico de Prática.jsonl"
+        if not segmento.exists():
+            return resultado
+        
+        erros_segmento = self._validar_segmento_historico(segmento)
+        if erros_segmento:
+            return ResultadoValidacao(resultado.arquivo, False, resultado.erros + erros_segmento)
+        return resultado
+    
+    def _validar_historico_base(self) -> ResultadoValidacao:
         """Valida [BASE] Histórico de prática.json (opcional)."""
         arquivo = "[BASE] Histórico de Prática.json"
         caminho = self.pasta_public / arquivo
@@ -134,6 +535,14 @@ class ValidadorJSON:
                 ["Arquivo opcional não existe - será criado novo histórico"]
             )
         
+        if self.streaming:
+            _, erros = self._validar_array_streaming(
+                caminho, "exercicios", "exercicio", "Exercício"
+            )
+            if erros:
+                return ResultadoValidacao(arquivo, False, erros)
+            return ResultadoValidacao(arquivo, True)
+        
         dados, erro = self._carregar_json(caminho)
         if erro:
             return ResultadoValidacao(arquivo, False, [erro])
@@ -145,6 +554,16 @@ class ValidadorJSON:
         
         # Valida contra modelo Pydantic
         try:
+            exercicios = dados.get("exercicios") if isinstance(dados, dict) else None
+            em_lotes = self._pool is not None or self.arquivo_cache is not None
+            if em_lotes and isinstance(exercicios, list):
+                # Mesmos erros de HistoricoPratica(**dados), com os exercícios validados em lotes
+                erros = [
+                    mensagem
+                    for _, _, mensagens in self._validar_lotes("exercicio", _enumerar(exercicios), ("exercicios",))
+                    for mensagem in mensagens
+                ]
+                return ResultadoValidacao(arquivo, not erros, erros)
             HistoricoPratica(**dados)
             return ResultadoValidacao(arquivo, True)
         except ValidationError as e:
@@ -187,13 +606,25 @@ class ValidadorJSON:
         print("=" * 70)
         print()
         
-        # Valida cada arquivo
-        self.resultados = [
-            self.validar_conhecimento_idiomas(),
-            self.validar_prompts(),
-            self.validar_historico_pratica(),
-            self.validar_frases_dialogo()
+        # Valida cada arquivo: (método, arquivos lidos, validadores de item)
+        conhecimento = "conhecimento_streaming" if self.streaming else "conhecimento"
+        validacoes = [
+            (self.validar_conhecimento_idiomas, ["[BASE] Conhecimento de idiomas.json"], [conhecimento]),
+            (self.validar_prompts, ["[BASE] Prompts.json"], []),
+            (
+                self.validar_historico_pratica,
+                ["[BASE] Histórico de Prática.json", "[BASE] Histórico de Prática.jsonl"],
+                ["exercicio"]
+            ),
+            (self.validar_frases_dialogo, ["[BASE] Frases do Diálogo.json"], [])
         ]
+        validar = lambda validacao: self._validar_com_cache(*validacao)
+        if self.jobs > 1:
+            with self._paralelo(), ThreadPoolExecutor(len(validacoes)) as arquivos:
+                self.resultados = list(arquivos.map(validar, validacoes))
+        else:
+            self.resultados = [validar(validacao) for validacao in validacoes]
+        self.salvar_cache()
         
         # Exibe resultados
         for resultado in self.resultados:
@@ -215,8 +646,40 @@ class ValidadorJSON:
 
 def main():
     """Função principal para executar a validação."""
-    validador = ValidadorJSON()
+    parser = argparse.ArgumentParser(description="Valida os arquivos JSON da pasta public.")
+    parser.add_argument("pasta", nargs="?", default="public", help="Pasta com os arquivos (padrão: public)")
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Valida item a item com memória limitada (recomendado para arquivos grandes)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Processos usados na validação (padrão: 1; 0 = um por núcleo)"
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const="",
+        metavar="ARQUIVO",
+        help=f"Revalida apenas itens novos ou alterados (padrão: <pasta>/{ARQUIVO_CACHE})"
+    )
+    args = parser.parse_args()
+    
+    jobs = args.jobs or os.cpu_count() or 1
+    arquivo_cache = None
+    if args.cache is not None:
+        arquivo_cache = Path(args.cache) if args.cache else Path(args.pasta) / ARQUIVO_CACHE
+    validador = ValidadorJSON(args.pasta, streaming=args.streaming, jobs=jobs, arquivo_cache=arquivo_cache)
     sucesso = validador.validar_todos()
+    if arquivo_cache is not None:
+        print(
+            f"Cache de validação: {validador.arquivos_reaproveitados} arquivo(s) inalterado(s), "
+            f"{validador.itens_reaproveitados} item(ns) reaproveitado(s), "
+            f"{validador.itens_validados} item(ns) validado(s)"
+        )
     
     # Retorna código de saída apropriado
     exit(0 if sucesso else 1)
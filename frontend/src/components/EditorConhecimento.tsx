@@ -9,7 +9,15 @@ interface EditorConhecimentoProps {
 type ModoEdicao = 'visualizar' | 'editar' | 'criar';
 
 export function EditorConhecimento({ onVoltar }: EditorConhecimentoProps) {
-  const { conhecimentos, loading, error, refetch, salvarConhecimentos } = useConhecimento();
+  const {
+    conhecimentos,
+    loading,
+    error,
+    refetch,
+    criarConhecimento,
+    atualizarConhecimento,
+    excluirConhecimento
+  } = useConhecimento();
   const [conhecimentoSelecionado, setConhecimentoSelecionado] = useState<ConhecimentoIdioma | null>(null);
   const [modoEdicao, setModoEdicao] = useState<ModoEdicao>('visualizar');
   const [conhecimentoEditando, setConhecimentoEditando] = useState<ConhecimentoIdioma | null>(null);
@@ -71,22 +79,14 @@ export function EditorConhecimento({ onVoltar }: EditorConhecimentoProps) {
     setSalvando(true);
 
     try {
-      let novosConhecimentos: ConhecimentoIdioma[];
-
-      if (modoEdicao === 'criar') {
-        novosConhecimentos = [...conhecimentos, { 
-          ...conhecimentoEditando, 
-          data_hora: new Date().toISOString() 
-        }];
-      } else {
-        novosConhecimentos = conhecimentos.map(c => 
-          c.conhecimento_id === conhecimentoEditando.conhecimento_id 
-            ? { ...conhecimentoEditando, data_hora: new Date().toISOString() }
-            : c
-        );
-      }
-
-      const sucesso = await salvarConhecimentos(novosConhecimentos);
+      const conhecimento: ConhecimentoIdioma = {
+        ...conhecimentoEditando,
+        data_hora: new Date().toISOString()
+      };
+
+      const sucesso = modoEdicao === 'criar'
+        ? await criarConhecimento(conhecimento)
+        : await atualizarConhecimento(conhecimento);
       
       if (sucesso) {
         setModoEdicao('visualizar');
@@ -104,8 +104,7 @@ export function EditorConhecimento({ onVoltar }: EditorConhecimentoProps) {
     if (!confirm('Tem certeza que deseja excluir este conhecimento?')) return;
 
     setSalvando(true);
-    const novosConhecimentos = conhecimentos.filter(c => c.conhecimento_id !== conhecimentoId);
-    const sucesso = await salvarConhecimentos(novosConhecimentos);
+    const sucesso = await excluirConhecimento(conhecimentoId);
     
     if (sucesso) {
       setConhecimentoSelecionado(null);
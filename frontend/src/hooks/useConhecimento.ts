@@ -8,7 +8,9 @@ interface UseConhecimentoReturn {
   loading: boolean;
   error: string | null;
   refetch: () => void;
-  salvarConhecimentos: (novosConhecimentos: ConhecimentoIdioma[]) => Promise<boolean>;
+  criarConhecimento: (conhecimento: ConhecimentoIdioma) => Promise<boolean>;
+  atualizarConhecimento: (conhecimento: ConhecimentoIdioma) => Promise<boolean>;
+  excluirConhecimento: (conhecimentoId: string) => Promise<boolean>;
 }
 
 export function useConhecimento(): UseConhecimentoReturn {
@@ -37,28 +39,61 @@ export function useConhecimento(): UseConhecimentoReturn {
     }
   };
 
-  const salvarConhecimentos = async (novosConhecimentos: ConhecimentoIdioma[]): Promise<boolean> => {
+  const enviarItem = async (
+    conhecimentoId: string,
+    method: 'POST' | 'PATCH' | 'DELETE',
+    body?: ConhecimentoIdioma
+  ): Promise<Response> => {
+    const response = await fetch(`${BACKEND_URL}/api/base_de_conhecimento/${conhecimentoId}`, {
+      method,
+      headers: body ? { 'Content-Type': 'application/json' } : undefined,
+      body: body ? JSON.stringify(body) : undefined
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || `Erro ao salvar: ${response.statusText}`);
+    }
+
+    return response;
+  };
+
+  const criarConhecimento = async (conhecimento: ConhecimentoIdioma): Promise<boolean> => {
     try {
-      const response = await fetch(`${BACKEND_URL}/api/base_de_conhecimento`, {
-        method: 'PUT',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(novosConhecimentos)
-      });
+      const response = await enviarItem(conhecimento.conhecimento_id, 'POST', conhecimento);
+      const criado: ConhecimentoIdioma = await response.json();
+      setConhecimentos(atuais => [...atuais, criado]);
+      return true;
+    } catch (err) {
+      console.error('Erro ao criar conhecimento:', err);
+      setError(err instanceof Error ? err.message : 'Erro ao criar conhecimento');
+      return false;
+    }
+  };
 
-      if (!response.ok) {
-        const errorData = await response.json().catch(() => ({}));
-        throw new Error(errorData.detail || `Erro ao salvar: ${response.statusText}`);
-      }
+  const atualizarConhecimento = async (conhecimento: ConhecimentoIdioma): Promise<boolean> => {
+    try {
+      const response = await enviarItem(conhecimento.conhecimento_id, 'PATCH', conhecimento);
+      const atualizado: ConhecimentoIdioma = await response.json();
+      setConhecimentos(atuais => atuais.map(c =>
+        c.conhecimento_id === atualizado.conhecimento_id ? atualizado : c
+      ));
+      return true;
+    } catch (err) {
+      console.error('Erro ao atualizar conhecimento:', err);
+      setError(err instanceof Error ? err.message : 'Erro ao atualizar conhecimento');
+      return false;
+    }
+  };
 
-      const conhecimentosAtualizados: ConhecimentoIdioma[] = await response.json();
-      setConhecimentos(conhecimentosAtualizados);
-      
+  const excluirConhecimento = async (conhecimentoId: string): Promise<boolean> => {
+    try {
+      await enviarItem(conhecimentoId, 'DELETE');
+      setConhecimentos(atuais => atuais.filter(c => c.conhecimento_id !== conhecimentoId));
       return true;
     } catch (err) {
-      console.error('Erro ao salvar conhecimentos:', err);
-      setError(err instanceof Error ? err.message : 'Erro ao salvar conhecimentos');
+      console.error('Erro ao excluir conhecimento:', err);
+      setError(err instanceof Error ? err.message : 'Erro ao excluir conhecimento');
       return false;
     }
   };
@@ -72,6 +107,8 @@ export function useConhecimento(): UseConhecimentoReturn {
     loading,
     error,
     refetch: fetchConhecimentos,
-    salvarConhecimentos
+    criarConhecimento,
+    atualizarConhecimento,
+    excluirConhecimento
   };
 }
@@ -71,4 +71,5 @@ export interface ExercicioPratica {
 
 export interface HistoricoPratica {
   exercicios: ExercicioPratica[];
+  proximo_cursor?: string | null;
 }